@@ -0,0 +1,55 @@
+"""Exportzeit von write_euer_workbook für 10k, 100k und 500k Buchungen.
+
+Aufruf aus dem Projektverzeichnis::
+
+    python benchmarks/bench_export.py [ZEILEN ...]
+
+Die Buchungen kommen aus :mod:`generator`. openpyxl schreibt das XML
+deutlich schneller, wenn ``lxml`` installiert ist.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from euer_export import write_euer_workbook  # noqa: E402
+from euer_store import TransactionStore  # noqa: E402
+from euer_totals import Totals  # noqa: E402
+from generator import synthetic_bookings  # noqa: E402
+
+
+def synthetic_store(count):
+    store = TransactionStore()
+    for ordinal, kategorie, cents in synthetic_bookings(count):
+        store.append_values(ordinal, kategorie, cents)
+    return store
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 500_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            store = synthetic_store(count)
+            totals = Totals.from_store(store, 2291.78)
+            path = os.path.join(tmp, f"bench-{count}.xlsx")
+            start = time.perf_counter()
+            write_euer_workbook(
+                path,
+                "Benchmark GmbH",
+                2291.78,
+                store,
+                totals.einnahmen_cents / 100,
+                totals.ausgaben_cents / 100,
+                totals.endbestand_cents / 100,
+            )
+            elapsed = time.perf_counter() - start
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{count:>8} Buchungen: {elapsed:7.2f} s  "
+                  f"({count / elapsed:8.0f} Zeilen/s, {size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
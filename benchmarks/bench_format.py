@@ -0,0 +1,68 @@
+"""Betragsformatierung: alter replace-Ansatz gegen euer_format.
+
+Aufruf aus dem Projektverzeichnis::
+
+    python benchmarks/bench_format.py [ZEILEN]
+
+Gemessen werden ein Listen-Redraw (wiederkehrende Beträge, Cache warm),
+lauter verschiedene Beträge (Cache hilft kaum) und die Batch-API
+``format_column`` für eine ganze Betragsspalte.
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from euer_format import format_cents, format_column  # noqa: E402
+
+WIEDERHOLUNGEN = 5
+
+
+def format_replace(betrag):
+    """The formatting that used to be copy-pasted across the GUI."""
+    betrag = abs(betrag)
+    if betrag >= 1000:
+        betrag_str = (
+            f"{betrag:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        )
+    else:
+        betrag_str = f"{betrag:.2f}".replace(".", ",")
+    return f"{betrag_str} €"
+
+
+def best_of(func):
+    return min(timeit.repeat(func, number=1, repeat=WIEDERHOLUNGEN))
+
+
+def report(name, count, alt_s, neu_s):
+    print(f"  {name:<24} {neu_s * 1e9 / count:7.0f} ns/Zeile  ({alt_s / neu_s:4.1f}x)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    # Typical cash book: a few hundred distinct amounts repeat all the time.
+    haeufig = [rng.randint(-90000, 90000) for _ in range(500)]
+    wiederkehrend = [rng.choice(haeufig) for _ in range(count)]
+    verschieden = [rng.randint(-10**9, 10**9) for _ in range(count)]
+
+    for name, cents in (("wiederkehrend", wiederkehrend), ("verschieden", verschieden)):
+        betraege = [c / 100 for c in cents]
+        assert [format_replace(b) for b in betraege] == format_column(cents)
+        format_cents.cache_clear()
+        alt_s = best_of(lambda: [format_replace(b) for b in betraege])
+        print(f"{count} Beträge, {name}:")
+        print(f"  {'replace (alt)':<24} {alt_s * 1e9 / count:7.0f} ns/Zeile")
+        report("format_cents", count, alt_s,
+               best_of(lambda: [format_cents(c) for c in cents]))
+        report("format_column", count, alt_s, best_of(lambda: format_column(cents)))
+        info = format_cents.cache_info()
+        print(f"  Cache: {info.hits} Treffer, {info.misses} Fehlgriffe, "
+              f"{info.currsize}/{info.maxsize} Einträge")
+
+
+if __name__ == "__main__":
+    main()
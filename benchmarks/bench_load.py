@@ -0,0 +1,50 @@
+"""Startzeit von load_recent/load für eine große db.csv messen.
+
+Aufruf aus dem Projektverzeichnis::
+
+    python benchmarks/bench_load.py [ZEILEN]
+
+Ziel: die Vorschau (Kopfzeilen + letzter Monat), die das Fenster beim Start
+anzeigt, ist für 100.000 Zeilen in unter STARTUP_ZIEL_S Sekunden geladen.
+Die db.csv kommt aus :mod:`generator`.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from euer_storage import CsvStorage  # noqa: E402
+from generator import write_db  # noqa: E402
+
+STARTUP_ZIEL_S = 0.05
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "db.csv")
+        write_db(path, count)
+        storage = CsvStorage(path)
+
+        preview_s, (_, _, recent) = measure(storage.load_recent)
+        full_s, (_, _, alle) = measure(storage.load)
+
+    status = "OK" if preview_s <= STARTUP_ZIEL_S else "ZU LANGSAM"
+    print(f"{count} Zeilen")
+    print(f"  Vorschau:  {preview_s * 1000:8.1f} ms ({len(recent)} Buchungen) "
+          f"[Ziel {STARTUP_ZIEL_S * 1000:.0f} ms: {status}]")
+    print(f"  Komplett:  {full_s * 1000:8.1f} ms ({len(alle)} Buchungen)")
+    return 0 if status == "OK" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Benchmark-Suite der heißen Pfade, ohne Fenster.
+
+Aufruf aus dem Projektverzeichnis::
+
+    python benchmarks/bench_suite.py [ZEILEN ...] [--json ergebnis.json]
+                                     [--vergleich alt.json] [--toleranz 0.2]
+
+Für jede Größe (Standard 1k, 100k, 1M Buchungen) wird mit
+:mod:`generator` eine db.csv erzeugt und gemessen:
+
+``load_db``
+    Vorschau beim Start (Kopf und letzter Monat).
+``load_history``
+    Komplette Historie aus db.csv laden und die Summen aufbauen.
+``load_snapshot``
+    Dasselbe aus dem binären Schnappschuss (:mod:`euer_snapshot`).
+``save_all_to_csv``
+    db.csv atomar neu schreiben.
+``refresh_transaction_list``
+    100 Neuzeichnungen des sichtbaren Listenfensters an zufälligen Stellen.
+``format_currency`` / ``format_column``
+    Alle Beträge einzeln bzw. als Spalte formatieren, Cache jeweils kalt.
+``exportieren``
+    Das ganze Buch als Arbeitsmappe schreiben (nur bis ``--export-bis``
+    Buchungen, der Export von 1M Zeilen dauert Minuten).
+
+Gemeldet wird die beste Zeit aus ``--wiederholungen`` Läufen und, aus einem
+eigenen Lauf unter ``tracemalloc``, der Spitzenwert des zusätzlich belegten
+Speichers. ``--json`` schreibt die Ergebnisse; ``--vergleich`` vergleicht
+mit einer früheren Datei und endet mit Status 1, wenn ein Szenario um mehr
+als ``--toleranz`` langsamer geworden ist.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from euer_buch import Kassenbuch  # noqa: E402
+from euer_format import format_buchung, format_cents, format_column, format_currency  # noqa: E402
+from euer_storage import CsvStorage  # noqa: E402
+from generator import write_db  # noqa: E402
+
+GROESSEN = [1_000, 100_000, 1_000_000]
+EXPORT_BIS = 100_000
+# Rows shown by the main list and the number of redraws per measurement
+FENSTER = 40
+NEUZEICHNUNGEN = 100
+
+
+def messen(run, setup=None, wiederholungen=3, speicher=True):
+    """Best wall time of ``run(setup())`` and its tracemalloc peak in bytes."""
+    zeiten = []
+    for _ in range(wiederholungen):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        run(arg)
+        zeiten.append(time.perf_counter() - start)
+    peak = None
+    if speicher:
+        arg = setup() if setup is not None else None
+        tracemalloc.start()
+        try:
+            basis = tracemalloc.get_traced_memory()[0]
+            run(arg)
+            peak = tracemalloc.get_traced_memory()[1] - basis
+        finally:
+            tracemalloc.stop()
+    return {"s": min(zeiten), "peak_bytes": peak}
+
+
+def szenarien(pfad, verzeichnis, zeilen, export_bis):
+    """``{name: (run, setup)}`` for one generated db.csv."""
+
+    def neues_buch(_=None, snapshot=False):
+        return Kassenbuch(CsvStorage(pfad, journal=False, snapshot=snapshot), pfad)
+
+    # Loading once with the snapshot enabled writes it for load_snapshot.
+    geladen = neues_buch(snapshot=True)
+    geladen.laden()
+    transaktionen = geladen.transaktionen
+    euro = [cents / 100 for cents in transaktionen.cents]
+    rng = random.Random(1)
+    oben = [rng.randrange(max(1, zeilen - FENSTER)) for _ in range(NEUZEICHNUNGEN)]
+
+    def kalt():
+        format_cents.cache_clear()
+
+    def refresh(_):
+        for top in oben:
+            [format_buchung(transaktionen, i)
+             for i in range(top, min(top + FENSTER, zeilen))]
+
+    liste = {
+        "load_db": (lambda buch: buch.laden_vorschau(), neues_buch),
+        "load_history": (lambda buch: buch.laden(), neues_buch),
+        "load_snapshot": (
+            lambda buch: buch.laden(), lambda: neues_buch(snapshot=True)
+        ),
+        "save_all_to_csv": (lambda _: geladen.neu_schreiben(), None),
+        "refresh_transaction_list": (refresh, kalt),
+        "format_currency": (lambda _: [format_currency(b) for b in euro], kalt),
+        "format_column": (lambda _: format_column(transaktionen.cents), kalt),
+    }
+    if zeilen <= export_bis:
+        from euer_export import write_euer_workbook
+
+        totals = geladen.totals
+        ziel = os.path.join(verzeichnis, "Umsatz bench.xlsx")
+        liste["exportieren"] = (
+            lambda _: write_euer_workbook(
+                ziel,
+                geladen.firmenname,
+                geladen.anfangsbestand,
+                transaktionen,
+                totals.einnahmen_cents / 100,
+                totals.ausgaben_cents / 100,
+                totals.endbestand_cents / 100,
+            ),
+            None,
+        )
+    return liste
+
+
+def ausfuehren(groessen, wiederholungen, speicher, export_bis):
+    ergebnisse = {}
+    for zeilen in groessen:
+        print(f"{zeilen} Buchungen")
+        with tempfile.TemporaryDirectory() as tmp:
+            pfad = os.path.join(tmp, "db.csv")
+            write_db(pfad, zeilen)
+            for name, (run, setup) in szenarien(pfad, tmp, zeilen, export_bis).items():
+                # The big sizes take long enough for a single run to be stable.
+                n = wiederholungen if zeilen < 1_000_000 else 1
+                wert = messen(run, setup, n, speicher)
+                ergebnisse.setdefault(name, {})[str(zeilen)] = wert
+                peak = wert["peak_bytes"]
+                speicher_text = f"  {peak / 1e6:8.1f} MB" if peak is not None else ""
+                print(f"  {name:<26} {wert['s'] * 1000:10.1f} ms{speicher_text}")
+    return ergebnisse
+
+
+def vergleichen(alt, neu, toleranz):
+    """Print the ratios to an earlier run; returns the regressed scenarios."""
+    regressionen = []
+    print(f"Vergleich (Toleranz {toleranz:.0%})")
+    for name, werte in neu.items():
+        for zeilen, wert in werte.items():
+            vorher = alt.get(name, {}).get(zeilen)
+            if vorher is None or not vorher["s"]:
+                continue
+            faktor = wert["s"] / vorher["s"]
+            markierung = ""
+            if faktor > 1 + toleranz:
+                markierung = "  REGRESSION"
+                regressionen.append((name, zeilen))
+            print(f"  {name:<26} {zeilen:>8}  {faktor:5.2f}x{markierung}")
+    return regressionen
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark-Suite der heißen Pfade")
+    p.add_argument("zeilen", nargs="*", type=int, default=GROESSEN)
+    p.add_argument("--wiederholungen", type=int, default=3)
+    p.add_argument("--ohne-speicher", action="store_true",
+                   help="keinen tracemalloc-Lauf (halbiert die Laufzeit)")
+    p.add_argument("--export-bis", type=int, default=EXPORT_BIS)
+    p.add_argument("--json", help="Ergebnisse als JSON schreiben")
+    p.add_argument("--vergleich", help="mit früheren JSON-Ergebnissen vergleichen")
+    p.add_argument("--toleranz", type=float, default=0.2)
+    args = p.parse_args()
+
+    ergebnisse = ausfuehren(
+        args.zeilen, args.wiederholungen, not args.ohne_speicher, args.export_bis
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "zeitpunkt": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "plattform": platform.platform(),
+                    "ergebnisse": ergebnisse,
+                },
+                f,
+                indent=2,
+            )
+    if args.vergleich:
+        with open(args.vergleich, encoding="utf-8") as f:
+            alt = json.load(f)["ergebnisse"]
+        if vergleichen(alt, ergebnisse, args.toleranz):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Synthetische, realistische db.csv-Dateien für Benchmarks.
+
+Aufruf aus dem Projektverzeichnis::
+
+    python benchmarks/generator.py db.csv [ZEILEN] [--jahre N] [--seed S]
+
+Die Buchungen verteilen sich gleichmäßig über ``jahre`` Jahre bis Ende
+2025, sonntags ist geschlossen. Die Mischung entspricht einem kleinen
+Laden: vor allem Tagesumsätze der Kasse, dazu Tankbelege und
+Wareneinkäufe, selten Bargeldeinzahlungen und der Buchhaltungsservice.
+Beträge streuen log-normal um einen typischen Wert je Kategorie. Gleiche
+Argumente erzeugen immer dieselbe Datei.
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from euer_storage import atomic_write_rows  # noqa: E402
+from euer_store import cents_to_text  # noqa: E402
+
+ENDE = date(2025, 12, 31)
+
+# Kategorie: (Anteil, Vorzeichen, typischer Betrag in Cent, Streuung)
+MISCHUNG = {
+    "💰  Tagesumsatz Kasse": (0.50, 1, 60_000, 0.5),
+    "⛽  Tankbeleg": (0.20, -1, 6_500, 0.3),
+    "🛍️  Wareneinkauf": (0.25, -1, 35_000, 0.8),
+    "💶  Bargeldeinzahlung": (0.03, -1, 150_000, 0.4),
+    "📊  Buchhaltungsservice": (0.02, -1, 25_000, 0.1),
+}
+
+
+def geschaeftstage(jahre, ende=ENDE):
+    """Ordinals of all days except Sundays in the last ``jahre`` years."""
+    start = date(ende.year - jahre + 1, 1, 1)
+    return [
+        tag.toordinal()
+        for tag in (start + timedelta(days=i) for i in range((ende - start).days + 1))
+        if tag.weekday() != 6
+    ]
+
+
+def synthetic_bookings(zeilen, jahre=5, seed=42):
+    """Yield ``(ordinal, kategorie, cents)`` in date order."""
+    rng = random.Random(seed)
+    tage = geschaeftstage(jahre)
+    kategorien = list(MISCHUNG)
+    anteile = [MISCHUNG[k][0] for k in kategorien]
+    # Draw the categories in blocks; one choices() call per row is slow.
+    block = 4096
+    for start in range(0, zeilen, block):
+        for i, kategorie in enumerate(
+            rng.choices(kategorien, anteile, k=min(block, zeilen - start)), start
+        ):
+            _, vorzeichen, typisch, streuung = MISCHUNG[kategorie]
+            cents = max(1, round(typisch * rng.lognormvariate(0, streuung)))
+            yield tage[i * len(tage) // zeilen], kategorie, vorzeichen * cents
+
+
+def synthetic_rows(zeilen, jahre=5, seed=42):
+    """The db.csv rows (header included) of :func:`synthetic_bookings`."""
+    yield ["Firma", "Benchmark GmbH"]
+    yield ["Anfangsbestand", "2291.78"]
+    iso = {}
+    for row_id, (ordinal, kategorie, cents) in enumerate(
+        synthetic_bookings(zeilen, jahre, seed)
+    ):
+        datum = iso.get(ordinal)
+        if datum is None:
+            datum = iso[ordinal] = date.fromordinal(ordinal).isoformat()
+        yield [datum, kategorie, cents_to_text(cents), row_id]
+
+
+def write_db(path, zeilen, jahre=5, seed=42):
+    atomic_write_rows(path, synthetic_rows(zeilen, jahre, seed))
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("pfad")
+    p.add_argument("zeilen", nargs="?", type=int, default=100_000)
+    p.add_argument("--jahre", type=int, default=5)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+    write_db(args.pfad, args.zeilen, args.jahre, args.seed)
+    print(f"{args.zeilen} Buchungen über {args.jahre} Jahre nach {args.pfad}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""Das Kassenbuch einer Firma ohne Oberfläche.
+
+:class:`Kassenbuch` hält Firmenname, Anfangsbestand, Buchungen
+(:class:`~euer_store.TransactionStore`) und Summen
+(:class:`~euer_totals.Totals`) einer Datenbank zusammen und ändert sie nur
+gemeinsam mit dem Speicher: schlägt das Schreiben fehl, wird die Änderung
+im Speicher zurückgenommen und der ``OSError`` weitergereicht. Jede
+Änderung liefert die :class:`~euer_undo.Operation` für das Undo-Protokoll
+und meldet die betroffenen Zeilen-IDs an ``on_change`` (z. B.
+``ChangeBus.publish``). Solange nur die Vorschau geladen ist, lehnt das
+Buch Änderungen mit :class:`HistorieNichtGeladen` ab: ohne Journal schreibt
+jede Änderung die ganze Datei aus dem Speicher neu.
+
+Die Tk-Oberfläche und die Kommandozeile (:mod:`euer_cli`) arbeiten beide
+auf dieser Klasse. Das Modul importiert weder tkinter noch openpyxl; der
+Export lädt :mod:`euer_export` erst beim Aufruf.
+"""
+
+from euer_storage import open_storage
+from euer_store import TransactionStore
+from euer_timing import gemessen
+from euer_totals import Totals
+from euer_undo import Operation, store_zeilen, zeilen_store
+
+
+class HistorieNichtGeladen(RuntimeError):
+    """Raised for a change while only the preview is loaded."""
+
+
+class Kassenbuch:
+    """Header, bookings and aggregates of one company's database.
+
+    Until :meth:`laden` or :meth:`uebernehmen` has run only the preview
+    from :meth:`laden_vorschau` is in memory (``vollstaendig`` is false);
+    changes need the complete history.
+    """
+
+    def __init__(self, storage, datei=None, on_change=None):
+        self.storage = storage
+        self.datei = datei
+        self.on_change = on_change
+        self.firmenname = ""
+        self.anfangsbestand = 0.0
+        self.transaktionen = TransactionStore()
+        self.totals = Totals()
+        self.vollstaendig = False
+
+    @classmethod
+    def oeffnen(cls, datei, journal=True, on_change=None, katalog=None):
+        """Open the database ``datei`` with the backend its extension selects."""
+        return cls(
+            open_storage(datei, journal=journal, katalog=katalog), datei, on_change
+        )
+
+    def state(self):
+        """``(firmenname, anfangsbestand, transaktionen)`` for the storage."""
+        return self.firmenname, self.anfangsbestand, self.transaktionen
+
+    def _melden(self, **aenderung):
+        if self.on_change is not None:
+            self.on_change(**aenderung)
+
+    # --- Laden ---------------------------------------------------------
+    @gemessen("buch.laden_vorschau")
+    def laden_vorschau(self):
+        """Load the header and the most recent period (``storage.load_recent``)."""
+        firmenname, self.anfangsbestand, self.transaktionen = self.storage.load_recent()
+        if firmenname:
+            self.firmenname = firmenname
+        self._melden(neu=True)
+
+    @gemessen("buch.laden")
+    def laden(self):
+        """Load the complete history synchronously."""
+        self.uebernehmen(self.storage.load())
+
+    @gemessen("buch.uebernehmen")
+    def uebernehmen(self, geladen):
+        """Take over the result of ``storage.load()``, e.g. from a worker thread."""
+        firmenname, self.anfangsbestand, self.transaktionen = geladen
+        if firmenname:
+            self.firmenname = firmenname
+        self.totals = Totals.from_store(self.transaktionen, self.anfangsbestand)
+        self.vollstaendig = True
+        self._melden(neu=True)
+
+    # --- Abfragen ------------------------------------------------------
+    def kassenbestand_cents(self, ordinal):
+        """Cash balance at the end of the day ``ordinal``, or ``None``.
+
+        Before the history is loaded only the SQLite backend can answer.
+        """
+        if self.vollstaendig:
+            return self.totals.kassenbestand(ordinal)
+        return self.storage.kassenbestand_cents(ordinal)
+
+    @gemessen("buch.summen")
+    def summen(self, von=None, bis=None):
+        """``(einnahmen, ausgaben, anzahl)`` in cents between two ordinals.
+
+        Both bounds are inclusive and optional. The SQLite backend sums in
+        SQL; otherwise the history is loaded first if necessary.
+        """
+        if not self.vollstaendig:
+            if hasattr(self.storage, "summen"):
+                return self.storage.summen(von, bis)
+            self.laden()
+        if von is None and bis is None:
+            return (
+                self.totals.einnahmen_cents,
+                self.totals.ausgaben_cents,
+                len(self.transaktionen),
+            )
+        summe = [0, 0, 0]
+        for ordinal, werte in self.totals.per_tag.items():
+            if (von is None or ordinal >= von) and (bis is None or ordinal <= bis):
+                for i, wert in enumerate(werte):
+                    summe[i] += wert
+        return tuple(summe)
+
+    # --- Änderungen ----------------------------------------------------
+    def _vollstaendig_pruefen(self):
+        if not self.vollstaendig:
+            raise HistorieNichtGeladen("die Historie ist noch nicht geladen")
+
+    @gemessen("buch.hinzufuegen")
+    def hinzufuegen(self, ordinal, kategorie, cents):
+        """Book ``cents`` (signed) on the day ``ordinal``."""
+        self._vollstaendig_pruefen()
+        transaktionen = self.transaktionen
+        row_id = transaktionen.append_values(ordinal, kategorie, cents)
+        try:
+            self.storage.add(transaktionen.get(row_id), self.state)
+        except OSError:
+            transaktionen.pop()
+            raise
+        self.totals.add(ordinal, kategorie, cents)
+        self._melden(hinzugefuegt=[row_id])
+        return Operation("hinzufuegen", self.datei, ((row_id, ordinal, kategorie, cents),))
+
+    @gemessen("buch.loeschen")
+    def loeschen(self, row_id):
+        """Delete the booking ``row_id``; ``KeyError`` if there is none."""
+        self._vollstaendig_pruefen()
+        transaktionen = self.transaktionen
+        idx = transaktionen.position(row_id)
+        zeile = (
+            row_id,
+            transaktionen.datum_ordinals[idx],
+            transaktionen.kategorien[transaktionen.kategorie_codes[idx]],
+            transaktionen.cents[idx],
+        )
+        del transaktionen[idx]
+        try:
+            self.storage.delete(row_id, self.state)
+        except OSError:
+            transaktionen.append_values(*zeile[1:], row_id)
+            raise
+        self.totals.remove(*zeile[1:])
+        self._melden(entfernt=[row_id])
+        return Operation("loeschen", self.datei, (zeile,))
+
+    @gemessen("buch.importieren")
+    def importieren(self, neue):
+        """Append the store ``neue`` with one storage write.
+
+        Returns ``None`` if there was nothing to import.
+        """
+        self._vollstaendig_pruefen()
+        if not len(neue):
+            return None
+        transaktionen = self.transaktionen
+        start = len(transaktionen)
+        transaktionen.extend(neue)
+        # Persist the rows with the ids they just got in the book.
+        neue = transaktionen.copy(start)
+        try:
+            self.storage.add_many(neue, self.state)
+        except OSError:
+            del transaktionen[start:]
+            raise
+        kategorien = neue.kategorien
+        for ordinal, code, cents in zip(neue.datum_ordinals, neue.kategorie_codes, neue.cents):
+            self.totals.add(ordinal, kategorien[code], cents)
+        self._melden(hinzugefuegt=list(neue.ids))
+        return Operation("hinzufuegen", self.datei, store_zeilen(neue))
+
+    @gemessen("buch.anfangsbestand_setzen")
+    def anfangsbestand_setzen(self, wert):
+        """Change the Anfangsbestand; ``None`` if it is unchanged."""
+        self._vollstaendig_pruefen()
+        alt = self.anfangsbestand
+        self.anfangsbestand = wert
+        self.totals.anfangsbestand_cents = round(wert * 100)
+        try:
+            self.storage.set_anfangsbestand(wert, self.state)
+        except OSError:
+            self.anfangsbestand = alt
+            self.totals.anfangsbestand_cents = round(alt * 100)
+            raise
+        return Operation("anfangsbestand", self.datei, (alt, wert)) if wert != alt else None
+
+    @gemessen("buch.firma_setzen")
+    def firma_setzen(self, name):
+        """Change the Firmenname; ``None`` if it is unchanged."""
+        self._vollstaendig_pruefen()
+        alt = self.firmenname
+        self.firmenname = name
+        try:
+            self.storage.set_firma(name, self.state)
+        except OSError:
+            self.firmenname = alt
+            raise
+        return Operation("firma", self.datei, (alt, name)) if name != alt else None
+
+    @gemessen("buch.entfernen")
+    def entfernen(self, zeilen):
+        """Remove the given undo rows; ``KeyError`` if one is missing."""
+        self._vollstaendig_pruefen()
+        transaktionen = self.transaktionen
+        row_ids = [zeile[0] for zeile in zeilen]
+        positionen = [transaktionen.position(row_id) for row_id in row_ids]
+        for idx in sorted(positionen, reverse=True):
+            del transaktionen[idx]
+        try:
+            self.storage.delete_many(row_ids, self.state)
+        except OSError:
+            for row_id, ordinal, kategorie, cents in zeilen:
+                transaktionen.append_values(ordinal, kategorie, cents, row_id)
+            raise
+        for _, ordinal, kategorie, cents in zeilen:
+            self.totals.remove(ordinal, kategorie, cents)
+        self._melden(entfernt=row_ids)
+
+    @gemessen("buch.wiederherstellen")
+    def wiederherstellen(self, zeilen):
+        """Put the given undo rows back in place, with their old ids."""
+        self._vollstaendig_pruefen()
+        transaktionen = self.transaktionen
+        for row_id, ordinal, kategorie, cents in zeilen:
+            transaktionen.append_values(ordinal, kategorie, cents, row_id)
+        try:
+            self.storage.add_many(zeilen_store(zeilen), self.state)
+        except OSError:
+            for row_id, *_ in zeilen:
+                del transaktionen[transaktionen.position(row_id)]
+            raise
+        for _, ordinal, kategorie, cents in zeilen:
+            self.totals.add(ordinal, kategorie, cents)
+        self._melden(hinzugefuegt=[zeile[0] for zeile in zeilen])
+
+    def anwenden(self, op, rueckwaerts):
+        """Revert (``rueckwaerts``) or re-apply an operation of this book.
+
+        ``neue_firma`` concerns the workspace and is left to the caller.
+        """
+        if op.art in ("hinzufuegen", "loeschen"):
+            if (op.art == "hinzufuegen") == rueckwaerts:
+                self.entfernen(op.daten)
+            else:
+                self.wiederherstellen(op.daten)
+        elif op.art == "anfangsbestand":
+            self.anfangsbestand_setzen(op.daten[0 if rueckwaerts else 1])
+        elif op.art == "firma":
+            self.firma_setzen(op.daten[0 if rueckwaerts else 1])
+        else:
+            raise ValueError(f"unbekannte Operation: {op.art}")
+
+    @gemessen("buch.neu_schreiben")
+    def neu_schreiben(self):
+        """Write the whole database atomically and drop the journal."""
+        self._vollstaendig_pruefen()
+        self.storage.rewrite(*self.state())
+
+    def kompaktieren(self):
+        """Fold the journal back in the background once it has grown enough."""
+        if self.vollstaendig and self.storage.needs_compaction():
+            self.storage.compact_in_background(*self.state())
+
+    # --- Export --------------------------------------------------------
+    def monat_exportieren(self, jahr, monat, directory="."):
+        """Write ``Umsatz YY.MM.xlsx`` for one month; returns the ExportErgebnis."""
+        from euer_export import export_month
+
+        return export_month(
+            jahr, monat, self.firmenname, self.anfangsbestand, self.transaktionen,
+            directory,
+        )
+
+    def jahr_exportieren(self, jahr, directory="."):
+        """All months of ``jahr`` plus the summary; returns the ExportErgebnis list."""
+        from euer_export import export_year
+
+        return export_year(
+            jahr, self.firmenname, self.anfangsbestand, self.transaktionen,
+            directory,
+        )
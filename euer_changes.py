@@ -0,0 +1,95 @@
+"""Änderungsbus für die Listenansichten.
+
+Statt nach jedem Hinzufügen oder Löschen alle offenen Fenster komplett neu
+aufzubauen, meldet der Code die betroffenen Zeilen-IDs an einen
+:class:`ChangeBus`. Der sammelt alle Änderungen eines Frames und ruft die
+Abonnenten einmal mit einer :class:`Aenderung` auf (hinzugefügte und
+entfernte IDs). Wurde der Datenbestand ersetzt (Firmenwechsel, Historie
+geladen, anderer Tag), trägt die Änderung stattdessen ``neu=True``.
+"""
+
+from bisect import bisect_left
+from collections import namedtuple
+
+FRAME_MS = 16
+
+# Row ids are sorted ascending; ``neu`` means "re-query everything".
+Aenderung = namedtuple("Aenderung", "hinzugefuegt entfernt neu")
+
+
+class ChangeBus:
+    """Collects row-id changes and delivers them at most once per frame.
+
+    ``schedule(delay_ms, callback)`` runs ``callback`` later on the GUI
+    thread, e.g. ``app.after``.
+    """
+
+    def __init__(self, schedule, delay_ms=FRAME_MS):
+        self._schedule = schedule
+        self._delay_ms = delay_ms
+        self._subscribers = []
+        self._hinzugefuegt = set()
+        self._entfernt = set()
+        self._neu = False
+        self._scheduled = False
+
+    def subscribe(self, callback):
+        """Call ``callback(aenderung)`` for every flush; returns an unsubscribe."""
+        self._subscribers.append(callback)
+
+        def unsubscribe():
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def publish(self, hinzugefuegt=(), entfernt=(), neu=False):
+        if neu:
+            self._neu = True
+            self._hinzugefuegt.clear()
+            self._entfernt.clear()
+        elif not self._neu:
+            self._hinzugefuegt.update(hinzugefuegt)
+            for row_id in entfernt:
+                if row_id in self._hinzugefuegt:
+                    # Added and removed within one frame: nobody saw it.
+                    self._hinzugefuegt.discard(row_id)
+                else:
+                    self._entfernt.add(row_id)
+        if not self._scheduled:
+            self._scheduled = True
+            self._schedule(self._delay_ms, self.flush)
+
+    def flush(self):
+        """Deliver the pending changes now (no-op if there are none).
+
+        Call this before acting on a selection, so that the positions shown
+        match the data.
+        """
+        self._scheduled = False
+        if not (self._neu or self._hinzugefuegt or self._entfernt):
+            return
+        aenderung = Aenderung(
+            sorted(self._hinzugefuegt), sorted(self._entfernt), self._neu
+        )
+        self._hinzugefuegt.clear()
+        self._entfernt.clear()
+        self._neu = False
+        for callback in list(self._subscribers):
+            callback(aenderung)
+
+
+def store_positionen(transaktionen, aenderung):
+    """Map a delta onto a view that shows ``transaktionen`` in store order.
+
+    Returns ``(entfernt, eingefuegt)``: the positions the removed rows had in
+    the old list and the positions of the added rows in the current one,
+    both ascending (see :meth:`VirtualListView.apply_delta`).
+    """
+    hinzugefuegt = aenderung.hinzugefuegt
+    entfernt = [
+        transaktionen.rank(row_id) - bisect_left(hinzugefuegt, row_id) + i
+        for i, row_id in enumerate(aenderung.entfernt)
+    ]
+    eingefuegt = [transaktionen.position(row_id) for row_id in hinzugefuegt]
+    return entfernt, eingefuegt
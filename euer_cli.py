@@ -0,0 +1,218 @@
+"""Kommandozeile für das Kassenbuch, ohne Fenster.
+
+Aufruf aus dem Projektverzeichnis::
+
+    python euer_cli.py add 2025-11-03 "Tagesumsatz Kasse" 294,10
+    python euer_cli.py export --month 2025-11 [--dir VERZEICHNIS]
+    python euer_cli.py export --year 2025
+    python euer_cli.py totals [--month 2025-11 | --year 2025]
+    python euer_cli.py kategorien [SUCHE]
+    python euer_cli.py kategorie "Miete Lager" --ausgabe
+
+Ohne ``--db`` wird die aktive Firma aus ``firmen.json`` benutzt, sonst
+``db.csv``. Die Kategorie darf ohne Symbol geschrieben werden, das
+Vorzeichen folgt wie im Fenster aus dem Kategorienkatalog
+(:mod:`euer_kategorien`). Eine neue Kategorie braucht beim ersten
+``add`` ``--einnahme`` oder ``--ausgabe`` und wird dann angelegt. Exporte werden wie im
+Fenster im Exportverlauf (:mod:`euer_settings`) vermerkt. Das Modul importiert
+weder tkinter noch, außer für ``export``, openpyxl.
+"""
+
+import argparse
+import csv
+import os
+import sys
+from datetime import date
+
+from euer_buch import Kassenbuch
+from euer_format import format_cents, format_signed_cents
+from euer_import import parse_betrag_cents
+from euer_kategorien import Katalog
+from euer_settings import ExportHistory
+from euer_timing import aktivieren, bericht
+from euer_workspace import Workspace
+
+DB_CSV = "db.csv"
+
+
+def _datum(text):
+    if text == "heute":
+        return date.today()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ungültiges Datum: {text!r}") from None
+
+
+def _monat(text):
+    try:
+        jahr, monat = map(int, text.split("-"))
+        return date(jahr, monat, 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ungültiger Monat: {text!r}") from None
+
+
+def _zeitraum(args):
+    """Inclusive ordinals of ``--month``/``--year`` (``None`` for everything)."""
+    if args.month is not None:
+        start = args.month
+        ende = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    elif args.year is not None:
+        start, ende = date(args.year, 1, 1), date(args.year + 1, 1, 1)
+    else:
+        return None, None
+    return start.toordinal(), ende.toordinal() - 1
+
+
+def cmd_add(buch, args):
+    katalog = args.katalog
+    kategorie = katalog.finden(args.kategorie)
+    if kategorie is None:
+        if args.einnahme is None:
+            print(f"Unbekannte Kategorie {args.kategorie!r}; neu anlegen mit"
+                  " --einnahme oder --ausgabe", file=sys.stderr)
+            for vorschlag in katalog.vorschlaege(args.kategorie, 5):
+                print(f"  meinten Sie {vorschlag!r}?", file=sys.stderr)
+            return 2
+    try:
+        cents = parse_betrag_cents(args.betrag)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    if kategorie is None:
+        kategorie = args.kategorie
+        katalog.setzen(kategorie, args.einnahme)
+    cents = katalog.vorzeichen_cents(kategorie, cents)
+    buch.laden()
+    buch.hinzufuegen(args.datum.toordinal(), kategorie, cents)
+    print(f"{args.datum.isoformat()} {kategorie}: {format_signed_cents(cents)}")
+    return 0
+
+
+def cmd_export(buch, args):
+    buch.laden()
+    os.makedirs(args.dir, exist_ok=True)
+    if args.month is not None:
+        ergebnisse = [buch.monat_exportieren(args.month.year, args.month.month, args.dir)]
+    else:
+        ergebnisse = buch.jahr_exportieren(args.year, args.dir)
+    historie = ExportHistory()
+    historie.load()
+    for ergebnis in ergebnisse:
+        if ergebnis.unveraendert:
+            print(f"{ergebnis.filename}: unverändert")
+            continue
+        historie.record(
+            buch.datei,
+            ergebnis.filename,
+            round(ergebnis.einnahmen * 100),
+            round(ergebnis.ausgaben * 100),
+            round((ergebnis.einnahmen - ergebnis.ausgaben) * 100),
+            round(ergebnis.endbestand * 100),
+        )
+        print(f"{ergebnis.filename}: exportiert")
+    historie.save_index()
+    return 0
+
+
+def cmd_totals(buch, args):
+    von, bis = _zeitraum(args)
+    einnahmen, ausgaben, anzahl = buch.summen(von, bis)
+    stichtag = bis if bis is not None else date.today().toordinal()
+    bestand = buch.kassenbestand_cents(stichtag)
+    print(f"Einnahmen:     {format_cents(einnahmen):>15}")
+    print(f"Ausgaben:      {format_cents(ausgaben):>15}")
+    print(f"Gewinn:        {format_signed_cents(einnahmen - ausgaben):>15}")
+    print(f"Buchungen:     {anzahl:>15}")
+    if bestand is not None:
+        print(f"Kassenbestand: {format_signed_cents(bestand):>15}"
+              f"  ({date.fromordinal(stichtag).strftime('%d.%m.%Y')})")
+    return 0
+
+
+def cmd_kategorien(buch, args):
+    katalog = args.katalog
+    namen = katalog.vorschlaege(args.suche, len(katalog)) if args.suche else katalog.namen
+    for name in namen:
+        art = "Einnahme" if katalog.ist_einnahme(name) else "Ausgabe"
+        print(f"{art:<9} {name}")
+    return 0
+
+
+def cmd_kategorie(buch, args):
+    katalog = args.katalog
+    name = katalog.finden(args.name) or args.name
+    kategorie = katalog.setzen(name, args.einnahme)
+    art = "Einnahme" if kategorie.einnahme else "Ausgabe"
+    print(f"{kategorie.id}: {kategorie.name} ({art})")
+    return 0
+
+
+def _vorzeichen(p, required):
+    gruppe = p.add_mutually_exclusive_group(required=required)
+    gruppe.add_argument("--einnahme", dest="einnahme", action="store_const", const=True)
+    gruppe.add_argument("--ausgabe", dest="einnahme", action="store_const", const=False)
+
+
+def parser():
+    p = argparse.ArgumentParser(prog="euer", description="EÜR Kassenbuch")
+    p.add_argument("--db", help="Datenbank (Standard: aktive Firma oder db.csv)")
+    p.add_argument("--messen", action="store_true",
+                   help="Zeiten von Laden, Speichern und Export auf stderr ausgeben")
+    sub = p.add_subparsers(dest="befehl", required=True)
+
+    add = sub.add_parser("add", help="Buchung erfassen")
+    add.add_argument("datum", type=_datum, help="JJJJ-MM-TT oder 'heute'")
+    add.add_argument("kategorie")
+    add.add_argument("betrag", help="z. B. 294,10")
+    _vorzeichen(add, required=False)
+    add.set_defaults(func=cmd_add)
+
+    export = sub.add_parser("export", help="Excel-Export eines Monats oder Jahres")
+    zeitraum = export.add_mutually_exclusive_group(required=True)
+    zeitraum.add_argument("--month", type=_monat, help="JJJJ-MM")
+    zeitraum.add_argument("--year", type=int, help="JJJJ")
+    export.add_argument("--dir", default=".", help="Zielverzeichnis")
+    export.set_defaults(func=cmd_export)
+
+    totals = sub.add_parser("totals", help="Einnahmen, Ausgaben und Kassenbestand")
+    zeitraum = totals.add_mutually_exclusive_group()
+    zeitraum.add_argument("--month", type=_monat, help="JJJJ-MM")
+    zeitraum.add_argument("--year", type=int, help="JJJJ")
+    totals.set_defaults(func=cmd_totals)
+
+    kategorien = sub.add_parser("kategorien", help="Kategorien auflisten oder suchen")
+    kategorien.add_argument("suche", nargs="?")
+    kategorien.set_defaults(func=cmd_kategorien)
+
+    kategorie = sub.add_parser("kategorie", help="Kategorie anlegen oder Vorzeichen ändern")
+    kategorie.add_argument("name")
+    _vorzeichen(kategorie, required=True)
+    kategorie.set_defaults(func=cmd_kategorie)
+    return p
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    if args.messen:
+        aktivieren()
+    datei = args.db or Workspace(DB_CSV).aktiv
+    # Shared with the storage, which files categories under their ids.
+    katalog = args.katalog = Katalog.laden()
+    buch = Kassenbuch.oeffnen(datei, katalog=katalog)
+    try:
+        ergebnis = args.func(buch, args)
+        if katalog.geaendert:
+            katalog.speichern()
+        return ergebnis
+    except (OSError, csv.Error, UnicodeDecodeError) as exc:
+        print(f"Fehler: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        buch.storage.close()
+        if args.messen:
+            print(bericht(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
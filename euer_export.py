@@ -0,0 +1,711 @@
+"""Schneller Excel-Export der EÜR mit Write-only-Arbeitsmappen.
+
+Die Zeilen werden direkt in ein Write-only-Arbeitsblatt gestreamt, statt
+zuerst ein vollständiges Arbeitsblatt im Speicher aufzubauen. Alle Formate
+sind benannte Zellformatvorlagen (``EÜR …``), die einmal pro Arbeitsmappe
+angelegt und danach nur noch per Namen zugewiesen werden.
+
+:func:`export_year` erzeugt für ein Jahr eine Arbeitsmappe pro Monat plus
+eine Jahresübersicht. Der Endbestand jedes Monats ist der Anfangsbestand des
+nächsten; die Monatsmappen werden parallel in einem Prozesspool erzeugt.
+Der Pool startet seine Prozesse per ``spawn``: ein ``fork`` aus dem
+Export-Thread würde Sperren und den Tk-Zustand des Fensters mitkopieren.
+
+:class:`ExportJob` führt einen Export in einem Worker-Thread auf einem
+Schnappschuss der Daten aus, meldet den Fortschritt und kann abgebrochen
+werden.
+
+Jede geschriebene Arbeitsmappe wird mit einem Fingerabdruck ihrer
+Eingaben (Firma, Buchungen, Zeitraum) und ihrem Anfangs- und Endbestand in
+``.euer-export-cache.json`` im Zielverzeichnis vermerkt. Ist die Datei
+unverändert vorhanden und der Fingerabdruck gleich, wird sie nicht neu
+erzeugt; haben sich nur die Bestände verschoben, werden in der vorhandenen
+Datei nur diese beiden Zellen ersetzt. Ändert sich beim Jahresexport ein
+Monat, wird so nur dieser Monat neu geschrieben.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import zipfile
+from collections import namedtuple
+from xml.sax.saxutils import escape
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+
+from euer_format import format_cents, format_column, format_currency, format_signed_cents
+from euer_storage import atomic_write, atomic_write_text
+from euer_store import TransactionStore
+from euer_timing import gemessen
+
+SPALTEN_BREITEN = {"A": 12, "B": 12, "C": 40, "D": 18, "E": 18}
+JAHR_SPALTEN_BREITEN = {"A": 14, "B": 18, "C": 18, "D": 18, "E": 18, "F": 18}
+
+MONATE = [
+    "Januar", "Februar", "März", "April", "Mai", "Juni",
+    "Juli", "August", "September", "Oktober", "November", "Dezember",
+]
+
+STANDARD = "EÜR Standard"
+KOPF = "EÜR Kopf"
+KOPF_BETRAG = "EÜR Kopf Betrag"
+ZENTRIERT = "EÜR Zelle zentriert"
+TEXT = "EÜR Zelle Text"
+BETRAG = "EÜR Betrag"
+SUMME_TEXT = "EÜR Summe Text"
+SUMME_BETRAG = "EÜR Summe Betrag"
+
+# Fortschritt und Abbruch werden alle FORTSCHRITT_ZEILEN Buchungen geprüft
+FORTSCHRITT_ZEILEN = 2000
+
+EXPORT_CACHE_DATEI = ".euer-export-cache.json"
+# Erhöhen, wenn sich das Layout der Arbeitsmappen ändert
+EXPORT_FORMAT_VERSION = 1
+BLATT_XML = "xl/worksheets/sheet1.xml"
+
+
+class ExportAbgebrochen(Exception):
+    """Raised inside the export when the user cancelled it."""
+
+
+# Eine geschriebene Arbeitsmappe mit ihren Summen (Euro); ``unveraendert``
+# heißt, die vorhandene Datei war aktuell und wurde nicht neu geschrieben.
+ExportErgebnis = namedtuple(
+    "ExportErgebnis",
+    "filename einnahmen ausgaben endbestand unveraendert",
+    defaults=(False,),
+)
+
+
+def export_fingerprint(werte, transaktionen=None):
+    """Hash of the export inputs: the ``werte`` tuple plus the store content.
+
+    The columns are hashed as raw buffers, so this costs a few milliseconds
+    even for hundreds of thousands of bookings.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((EXPORT_FORMAT_VERSION, *werte)).encode())
+    if transaktionen is not None:
+        h.update(repr(len(transaktionen)).encode())
+        h.update("\x1f".join(transaktionen.kategorien).encode())
+        for spalte in (
+            transaktionen.datum_ordinals,
+            transaktionen.kategorie_codes,
+            transaktionen.cents,
+        ):
+            h.update(spalte)
+    return h.hexdigest()
+
+
+class ExportCache:
+    """Fingerprints of the workbooks written into one directory."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, EXPORT_CACHE_DATEI)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._eintraege = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._eintraege = {}
+
+    def ist_aktuell(self, filename, fingerprint):
+        """True if ``filename`` exists exactly as written for ``fingerprint``."""
+        eintrag = self._eintraege.get(os.path.basename(filename))
+        if eintrag is None or eintrag["fingerprint"] != fingerprint:
+            return False
+        try:
+            st = os.stat(filename)
+        except FileNotFoundError:
+            return False
+        return eintrag["stat"] == [st.st_size, st.st_mtime_ns]
+
+    def bestaende(self, filename):
+        """``[anfangsbestand, endbestand]`` in cents as last written, or None."""
+        eintrag = self._eintraege.get(os.path.basename(filename))
+        return None if eintrag is None else eintrag.get("bestaende")
+
+    def merken(self, filename, fingerprint, bestaende=None):
+        st = os.stat(filename)
+        eintrag = {
+            "fingerprint": fingerprint,
+            "stat": [st.st_size, st.st_mtime_ns],
+        }
+        if bestaende is not None:
+            eintrag["bestaende"] = list(bestaende)
+        self._eintraege[os.path.basename(filename)] = eintrag
+
+    def speichern(self):
+        atomic_write_text(self.path, json.dumps(self._eintraege, indent=2))
+
+
+def _named_styles():
+    thin = Side(style="thin")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    normal = Font(name="Arial", size=10)
+    bold = Font(name="Arial", bold=True, size=10)
+    header_fill = PatternFill(start_color="E6E6E6", end_color="E6E6E6", fill_type="solid")
+    grey_fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
+
+    return [
+        NamedStyle(STANDARD, font=normal),
+        NamedStyle(KOPF, font=bold, fill=header_fill, border=border,
+                   alignment=Alignment(horizontal="center")),
+        NamedStyle(KOPF_BETRAG, font=bold, fill=header_fill, border=border,
+                   alignment=Alignment(horizontal="right")),
+        NamedStyle(ZENTRIERT, font=normal, border=border,
+                   alignment=Alignment(horizontal="center")),
+        NamedStyle(TEXT, font=normal, border=border,
+                   alignment=Alignment(horizontal="left")),
+        NamedStyle(BETRAG, font=normal, border=border, number_format="@",
+                   alignment=Alignment(horizontal="right")),
+        NamedStyle(SUMME_TEXT, font=bold, fill=grey_fill, border=border,
+                   alignment=Alignment(horizontal="right")),
+        NamedStyle(SUMME_BETRAG, font=bold, border=border, number_format="@",
+                   alignment=Alignment(horizontal="right")),
+    ]
+
+
+def transaktion_text(kategorie):
+    """Category as shown in the export: without the leading emoji."""
+    return kategorie.split(" ", 1)[1] if " " in kategorie else kategorie
+
+
+class _RowWriter:
+    """Append rows of (value, style) pairs to a write-only worksheet."""
+
+    def __init__(self, ws):
+        self.ws = ws
+
+    def cell(self, value, style):
+        cell = WriteOnlyCell(self.ws, value=value)
+        cell.style = style
+        return cell
+
+    def row(self, *cells):
+        self.ws.append([self.cell(value, style) for value, style in cells])
+
+    def blank(self):
+        self.row(*[(None, STANDARD)] * 5)
+
+
+def _betrag_text(euro):
+    """Balance cell text; unlike :func:`format_currency` it keeps the sign."""
+    return format_signed_cents(round(euro * 100))
+
+
+def _zelle_ersetzen(xml, ref, text, start=0):
+    """Replace the cell ``ref`` (e.g. ``b"E3"``) with an inline string."""
+    muster = re.compile(rb'<c r="' + ref + rb'"([^>]*?)(?:/>|>.*?</c>)', re.S)
+    m = muster.search(xml, start)
+    if m is None:
+        raise ValueError(f"Zelle {ref.decode()} nicht gefunden")
+    stil = re.search(rb' s="\d+"', m.group(1))
+    zelle = b'<c r="%s"%s t="inlineStr"><is><t>%s</t></is></c>' % (
+        ref, stil.group(0) if stil else b"", escape(text).encode()
+    )
+    return xml[:m.start()] + zelle + xml[m.end():]
+
+
+@gemessen("export.bestaende")
+def bestaende_ersetzen(filename, anfangsbestand, endbestand):
+    """Set the Anfangsbestand and Endbestand cells of an exported workbook.
+
+    Only the worksheet XML of the existing file is patched, so a month whose
+    bookings are unchanged is not rendered again when an earlier month
+    shifts its balances. Raises ``ValueError`` if the file does not have the
+    layout of :func:`write_euer_workbook`.
+    """
+    with zipfile.ZipFile(filename) as alt:
+        eintraege = [(info, alt.read(info)) for info in alt.infolist()]
+    for i, (info, xml) in enumerate(eintraege):
+        if info.filename == BLATT_XML:
+            break
+    else:
+        raise ValueError(f"{filename}: kein Arbeitsblatt")
+    # The Endbestand value sits right of the last "Endbestand:" label.
+    label = xml.rfind(b">Endbestand:</t>")
+    zelle = xml.rfind(b'<c r="D', 0, label)
+    m = re.compile(rb'<c r="D(\d+)"').match(xml, zelle) if zelle >= 0 else None
+    if label < 0 or m is None:
+        raise ValueError(f"{filename}: keine EÜR-Arbeitsmappe")
+    # Endbestand first: it comes after E3, so the label offset stays valid.
+    xml = _zelle_ersetzen(
+        xml, b"E" + m.group(1), _betrag_text(endbestand), start=zelle
+    )
+    xml = _zelle_ersetzen(xml, b"E3", _betrag_text(anfangsbestand))
+    eintraege[i] = (info, xml)
+
+    def schreiben(f):
+        with zipfile.ZipFile(f, "w") as neu:
+            for info, daten in eintraege:
+                neu.writestr(info, daten)
+
+    atomic_write(filename, schreiben, binary=True)
+
+
+def _abbrechen(ws):
+    # Finish the streamed XML so the abandoned workbook is torn down quietly.
+    ws.close()
+    raise ExportAbgebrochen
+
+
+@gemessen("export.workbook")
+def write_euer_workbook(filename, firmenname, anfangsbestand, transaktionen,
+                        einnahmen, ausgaben, endbestand, progress=None,
+                        cancel=None):
+    """Write the EÜR workbook for ``transaktionen`` to ``filename``.
+
+    ``transaktionen`` is a :class:`~euer_store.TransactionStore`; the totals
+    are passed in (euros) because the caller already keeps them up to date.
+    ``progress(done, total)`` is called every few thousand rows and a set
+    ``cancel`` event aborts with :class:`ExportAbgebrochen`. The file only
+    appears under ``filename`` once it is complete.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet("EÜR")
+    for letter, width in SPALTEN_BREITEN.items():
+        ws.column_dimensions[letter].width = width
+
+    out = _RowWriter(ws)
+    out.row((firmenname, STANDARD), *[(None, STANDARD)] * 4)
+    out.blank()
+    out.row(
+        *[(None, STANDARD)] * 3,
+        ("Anfangsbestand:", SUMME_TEXT),
+        (_betrag_text(anfangsbestand), SUMME_BETRAG),
+    )
+    out.row(
+        ("Beleg-Nr.", KOPF),
+        ("Datum", KOPF),
+        ("Transaktion", KOPF),
+        ("Einnahmen", KOPF_BETRAG),
+        ("Ausgaben", KOPF_BETRAG),
+    )
+
+    # Per-category and per-day texts are computed once, not once per row.
+    # The five styled cells are reused for every row: the write-only sheet
+    # serializes a row as soon as it is appended.
+    texte = [transaktion_text(k) for k in transaktionen.kategorien]
+    betraege = format_column(transaktionen.cents)
+    daten = {}
+    zeile = [
+        out.cell(None, ZENTRIERT),
+        out.cell(None, ZENTRIERT),
+        out.cell(None, TEXT),
+        out.cell(None, BETRAG),
+        out.cell(None, BETRAG),
+    ]
+    nr_cell, datum_cell, text_cell, einnahme_cell, ausgabe_cell = zeile
+    total = len(transaktionen)
+    for idx, (ordinal, code, cents, betrag) in enumerate(
+        zip(
+            transaktionen.datum_ordinals,
+            transaktionen.kategorie_codes,
+            transaktionen.cents,
+            betraege,
+        ),
+        1,
+    ):
+        datum = daten.get(ordinal)
+        if datum is None:
+            datum = daten[ordinal] = transaktionen.iso_datum(ordinal).replace("-", "/")
+        nr_cell.value = idx
+        datum_cell.value = datum
+        text_cell.value = texte[code]
+        einnahme_cell.value = betrag if cents > 0 else ""
+        ausgabe_cell.value = betrag if cents < 0 else ""
+        ws.append(zeile)
+        if idx % FORTSCHRITT_ZEILEN == 0:
+            if cancel is not None and cancel.is_set():
+                _abbrechen(ws)
+            if progress is not None:
+                progress(idx, total)
+
+    out.blank()
+    out.blank()
+    out.row(
+        *[(None, STANDARD)] * 2,
+        ("Gesamt:", SUMME_TEXT),
+        (format_currency(einnahmen), SUMME_BETRAG),
+        (format_currency(ausgaben), SUMME_BETRAG),
+    )
+    out.row(
+        *[(None, STANDARD)] * 3,
+        ("Endbestand:", SUMME_TEXT),
+        (_betrag_text(endbestand), SUMME_BETRAG),
+    )
+    if cancel is not None and cancel.is_set():
+        _abbrechen(ws)
+
+    atomic_write(filename, wb.save, binary=True)
+    if progress is not None:
+        progress(total, total)
+
+
+def export_workbook(filename, firmenname, anfangsbestand, transaktionen,
+                    einnahmen, ausgaben, endbestand, progress=None, cancel=None):
+    """:func:`write_euer_workbook` unless an identical workbook exists.
+
+    Returns the :class:`ExportErgebnis`.
+    """
+    cache = ExportCache(os.path.dirname(filename) or ".")
+    fingerprint = export_fingerprint(
+        (os.path.basename(filename), firmenname, einnahmen, ausgaben),
+        transaktionen,
+    )
+    bestaende = [round(anfangsbestand * 100), round(endbestand * 100)]
+    if cache.ist_aktuell(filename, fingerprint):
+        unveraendert = cache.bestaende(filename) == bestaende
+        if unveraendert or _bestaende_nachtragen(cache, filename, fingerprint, bestaende):
+            cache.speichern()
+            if progress is not None:
+                progress(1, 1)
+            return ExportErgebnis(filename, einnahmen, ausgaben, endbestand, unveraendert)
+    write_euer_workbook(
+        filename,
+        firmenname,
+        anfangsbestand,
+        transaktionen,
+        einnahmen,
+        ausgaben,
+        endbestand,
+        progress=progress,
+        cancel=cancel,
+    )
+    cache.merken(filename, fingerprint, bestaende)
+    cache.speichern()
+    return ExportErgebnis(filename, einnahmen, ausgaben, endbestand)
+
+
+def _bestaende_nachtragen(cache, filename, fingerprint, bestaende):
+    """Patch the balances into an up-to-date workbook; False if that fails."""
+    try:
+        bestaende_ersetzen(filename, bestaende[0] / 100, bestaende[1] / 100)
+    except (ValueError, KeyError, zipfile.BadZipFile):
+        return False
+    cache.merken(filename, fingerprint, bestaende)
+    return True
+
+
+def monats_dateiname(jahr, monat):
+    return f"Umsatz {jahr % 100:02d}.{monat:02d}.xlsx"
+
+
+def export_month(jahr, monat, firmenname, anfangsbestand, transaktionen,
+                 directory=".", progress=None, cancel=None):
+    """Write the ``Umsatz YY.MM.xlsx`` workbook of one month.
+
+    Like a month of :func:`export_year`: the opening balance is
+    ``anfangsbestand`` plus everything booked before the month. Returns the
+    :class:`ExportErgebnis`.
+    """
+    start = date(jahr, monat, 1).toordinal()
+    ende = date(jahr + monat // 12, monat % 12 + 1, 1).toordinal()
+    kategorien = transaktionen.kategorien
+    store = TransactionStore()
+    bestand = round(anfangsbestand * 100)
+    for ordinal, code, cents in zip(
+        transaktionen.datum_ordinals,
+        transaktionen.kategorie_codes,
+        transaktionen.cents,
+    ):
+        if ordinal < start:
+            bestand += cents
+        elif ordinal < ende:
+            store.append_values(ordinal, kategorien[code], cents)
+    einnahmen = store.einnahmen_cents()
+    ausgaben = store.ausgaben_cents()
+    return export_workbook(
+        os.path.join(directory, monats_dateiname(jahr, monat)),
+        firmenname,
+        bestand / 100,
+        store,
+        einnahmen / 100,
+        ausgaben / 100,
+        (bestand + einnahmen - ausgaben) / 100,
+        progress=progress,
+        cancel=cancel,
+    )
+
+
+def jahres_dateiname(jahr):
+    return f"Umsatz {jahr % 100:02d} Jahresübersicht.xlsx"
+
+
+def split_by_month(transaktionen, jahr):
+    """Partition the bookings of ``jahr`` into one store per month.
+
+    Returns ``(vorher_cents, monate)``: the net cents of all bookings before
+    the year and a ``{monat: TransactionStore}`` dict in month order.
+    """
+    start = date(jahr, 1, 1).toordinal()
+    ende = date(jahr + 1, 1, 1).toordinal()
+    kategorien = transaktionen.kategorien
+    vorher = 0
+    monat_von_tag = {}
+    monate = {}
+    for ordinal, code, cents in zip(
+        transaktionen.datum_ordinals,
+        transaktionen.kategorie_codes,
+        transaktionen.cents,
+    ):
+        if ordinal < start:
+            vorher += cents
+            continue
+        if ordinal >= ende:
+            continue
+        monat = monat_von_tag.get(ordinal)
+        if monat is None:
+            monat = monat_von_tag[ordinal] = date.fromordinal(ordinal).month
+        store = monate.get(monat)
+        if store is None:
+            store = monate[monat] = TransactionStore()
+        store.append_values(ordinal, kategorien[code], cents)
+    return vorher, dict(sorted(monate.items()))
+
+
+@gemessen("export.jahresuebersicht")
+def write_year_summary(filename, firmenname, jahr, zeilen):
+    """Write the yearly overview with one row per exported month.
+
+    ``zeilen`` holds ``(monat, anfangsbestand, einnahmen, ausgaben,
+    endbestand)`` tuples in cents.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet(f"EÜR {jahr}")
+    for letter, width in JAHR_SPALTEN_BREITEN.items():
+        ws.column_dimensions[letter].width = width
+
+    out = _RowWriter(ws)
+    out.row((firmenname, STANDARD))
+    out.row((f"Jahresübersicht {jahr}", STANDARD))
+    out.row(
+        ("Monat", KOPF),
+        ("Anfangsbestand", KOPF_BETRAG),
+        ("Einnahmen", KOPF_BETRAG),
+        ("Ausgaben", KOPF_BETRAG),
+        ("Gewinn", KOPF_BETRAG),
+        ("Endbestand", KOPF_BETRAG),
+    )
+    for monat, anfang, einnahmen, ausgaben, endbestand in zeilen:
+        out.row(
+            (MONATE[monat - 1], TEXT),
+            (format_signed_cents(anfang), BETRAG),
+            (format_cents(einnahmen), BETRAG),
+            (format_cents(ausgaben), BETRAG),
+            (format_signed_cents(einnahmen - ausgaben), BETRAG),
+            (format_signed_cents(endbestand), BETRAG),
+        )
+    out.row()
+    einnahmen = sum(z[2] for z in zeilen)
+    ausgaben = sum(z[3] for z in zeilen)
+    out.row(
+        ("Gesamt:", SUMME_TEXT),
+        (format_signed_cents(zeilen[0][1]) if zeilen else "", SUMME_BETRAG),
+        (format_cents(einnahmen), SUMME_BETRAG),
+        (format_cents(ausgaben), SUMME_BETRAG),
+        (format_signed_cents(einnahmen - ausgaben), SUMME_BETRAG),
+        (format_signed_cents(zeilen[-1][4]) if zeilen else "", SUMME_BETRAG),
+    )
+    atomic_write(filename, wb.save, binary=True)
+
+
+@gemessen("export.jahr")
+def export_year(jahr, firmenname, anfangsbestand, transaktionen, directory=".",
+                max_workers=None, progress=None, cancel=None):
+    """Write one EÜR workbook per month of ``jahr`` plus a yearly summary.
+
+    The opening balance of the year is ``anfangsbestand`` plus everything
+    booked before it; each month's Endbestand becomes the next month's
+    Anfangsbestand. The monthly workbooks are rendered concurrently in a
+    process pool; months whose workbook is unchanged according to the
+    :class:`ExportCache` are skipped. A change in one month re-renders only
+    that month; later months whose bookings are unchanged just get the
+    carried-forward balances patched in (:func:`bestaende_ersetzen`).
+    Returns the list of :class:`ExportErgebnis`.
+    """
+    cache = ExportCache(directory)
+    vorher, monate = split_by_month(transaktionen, jahr)
+    bestand = round(anfangsbestand * 100) + vorher
+
+    aufgaben = {}
+    nachtragen = {}
+    zeilen = []
+    ergebnisse = []
+    for monat, store in monate.items():
+        einnahmen = store.einnahmen_cents()
+        ausgaben = store.ausgaben_cents()
+        endbestand = bestand + einnahmen - ausgaben
+        filename = os.path.join(directory, monats_dateiname(jahr, monat))
+        aufgabe = (
+            filename,
+            firmenname,
+            bestand / 100,
+            store,
+            einnahmen / 100,
+            ausgaben / 100,
+            endbestand / 100,
+        )
+        fingerprint = export_fingerprint(
+            (os.path.basename(filename), firmenname, *aufgabe[4:6]), store
+        )
+        bestaende = [bestand, endbestand]
+        unveraendert = False
+        if cache.ist_aktuell(filename, fingerprint):
+            unveraendert = cache.bestaende(filename) == bestaende
+            if not unveraendert:
+                nachtragen[filename] = (aufgabe, fingerprint, bestaende)
+        else:
+            aufgaben[filename] = (aufgabe, fingerprint, bestaende)
+        zeilen.append((monat, bestand, einnahmen, ausgaben, endbestand))
+        ergebnisse.append(ExportErgebnis(
+            filename, einnahmen / 100, ausgaben / 100, endbestand / 100, unveraendert
+        ))
+        bestand = endbestand
+
+    try:
+        for filename, (aufgabe, fingerprint, bestaende) in nachtragen.items():
+            if not _bestaende_nachtragen(cache, filename, fingerprint, bestaende):
+                aufgaben[filename] = (aufgabe, fingerprint, bestaende)
+        total = len(aufgaben) + 1
+        if aufgaben:
+            with ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                pending = {
+                    pool.submit(write_euer_workbook, *aufgabe): filename
+                    for filename, (aufgabe, _, _) in aufgaben.items()
+                }
+                while pending:
+                    done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                        filename = pending.pop(future)
+                        cache.merken(filename, *aufgaben[filename][1:])
+                    if cancel is not None and cancel.is_set():
+                        # Months already being rendered still finish, the
+                        # rest is never started.
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        raise ExportAbgebrochen
+                    if progress is not None:
+                        progress(total - len(pending) - 1, total)
+
+        filename = os.path.join(directory, jahres_dateiname(jahr))
+        fingerprint = export_fingerprint((jahres_dateiname(jahr), firmenname, jahr, zeilen))
+        unveraendert = cache.ist_aktuell(filename, fingerprint)
+        if not unveraendert:
+            write_year_summary(filename, firmenname, jahr, zeilen)
+            cache.merken(filename, fingerprint)
+    finally:
+        # Also keeps the months finished before a cancel or an error.
+        cache.speichern()
+    ergebnisse.append(ExportErgebnis(
+        filename,
+        sum(store.einnahmen_cents() for store in monate.values()) / 100,
+        sum(store.ausgaben_cents() for store in monate.values()) / 100,
+        bestand / 100,
+        unveraendert,
+    ))
+    if progress is not None:
+        progress(total, total)
+    return ergebnisse
+
+
+class ExportJob:
+    """Run an export on a worker thread.
+
+    ``work(progress, cancel)`` performs the export on data the caller has
+    already snapshotted and returns a list of :class:`ExportErgebnis`.
+    Status messages land in :attr:`messages` and ``notify()`` is called from
+    the worker after each one, e.g. to post a virtual event to the Tk event
+    queue:
+
+    ``("fortschritt", done, total)``, ``("fertig", ergebnisse)``,
+    ``("abgebrochen",)`` or ``("fehler", exc)``.
+    """
+
+    def __init__(self, work, notify):
+        self.messages = queue.Queue()
+        self._work = work
+        self._cancel = threading.Event()
+        self._notify = notify
+        self._thread = threading.Thread(target=self._run, name="excel-export", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _post(self, *message):
+        self.messages.put(message)
+        self._notify()
+
+    def _run(self):
+        try:
+            ergebnisse = self._work(
+                lambda done, total: self._post("fortschritt", done, total),
+                self._cancel,
+            )
+        except ExportAbgebrochen:
+            self._post("abgebrochen")
+        except Exception as exc:
+            self._post("fehler", exc)
+        else:
+            self._post("fertig", ergebnisse)
+
+
+def month_export_job(jahr, monat, firmenname, anfangsbestand, transaktionen,
+                     notify, directory="."):
+    """Export job for :func:`export_month` over a snapshot of ``transaktionen``."""
+    snapshot = transaktionen.copy()
+
+    def work(progress, cancel):
+        return [
+            export_month(
+                jahr,
+                monat,
+                firmenname,
+                anfangsbestand,
+                snapshot,
+                directory,
+                progress=progress,
+                cancel=cancel,
+            )
+        ]
+
+    return ExportJob(work, notify)
+
+
+def year_export_job(jahr, firmenname, anfangsbestand, transaktionen, notify,
+                    directory="."):
+    """Export job for :func:`export_year` over a snapshot of ``transaktionen``."""
+    snapshot = transaktionen.copy()
+
+    def work(progress, cancel):
+        return export_year(
+            jahr,
+            firmenname,
+            anfangsbestand,
+            snapshot,
+            directory=directory,
+            progress=progress,
+            cancel=cancel,
+        )
+
+    return ExportJob(work, notify)
@@ -0,0 +1,56 @@
+"""Formatierung von Geldbeträgen für Anzeige und Export.
+
+Alle Ansichten formatieren über :func:`format_cents`: Beträge kommen als
+ganze Cent herein, Tausendergruppen und Centstellen werden aus
+vorberechneten Tabellen zusammengesetzt statt per ``replace`` umgebaut.
+Bereits formatierte Beträge liegen in einem begrenzten LRU-Cache, weil in
+Listen und Exporten dieselben Beträge immer wieder vorkommen.
+"""
+
+from functools import lru_cache
+
+FORMAT_CACHE_GROESSE = 8192
+
+# "000" … "999" for the thousands groups and ",00 €" … ",99 €" for the cents.
+_GRUPPEN = [f"{i:03d}" for i in range(1000)]
+_CENT_ENDUNG = [f",{i:02d} €" for i in range(100)]
+
+
+@lru_cache(maxsize=FORMAT_CACHE_GROESSE)
+def format_cents(cents):
+    """Format the absolute value of ``cents`` as ``"1.234,56 €"``."""
+    euro, rest = divmod(abs(cents), 100)
+    if euro < 1000:
+        return f"{euro}{_CENT_ENDUNG[rest]}"
+    gruppen = []
+    while euro >= 1000:
+        euro, gruppe = divmod(euro, 1000)
+        gruppen.append(_GRUPPEN[gruppe])
+    gruppen.append(str(euro))
+    gruppen.reverse()
+    return ".".join(gruppen) + _CENT_ENDUNG[rest]
+
+
+def format_signed_cents(cents):
+    """Like :func:`format_cents` but keeps a leading ``-`` for negatives."""
+    return f"-{format_cents(cents)}" if cents < 0 else format_cents(cents)
+
+
+def format_column(cents_values):
+    """Format a whole column of cents, e.g. ``TransactionStore.cents``."""
+    return list(map(format_cents, cents_values))
+
+
+def format_currency(value):
+    """Format a value using German thousands separators and append €."""
+    if value is None or value == "":
+        return ""
+    return format_cents(round(float(value) * 100))
+
+
+def format_buchung(transaktionen, idx):
+    """Display text of the booking at ``idx`` for the list views."""
+    datum = transaktionen.iso_datum(transaktionen.datum_ordinals[idx]).ljust(10)
+    kategorie = transaktionen.kategorien[transaktionen.kategorie_codes[idx]].ljust(30)
+    betrag_str = format_cents(transaktionen.cents[idx]).rjust(15)
+    return f"{datum} | {kategorie} | {betrag_str}"
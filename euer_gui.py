@@ -1,62 +1,237 @@
-import customtkinter as ctk
-import tkinter as tk
-from tkinter import messagebox, simpledialog
-from datetime import date, timedelta
-import openpyxl
+import time
+
+# Zeitpunkt vor allen übrigen Importen, für --profile-startup
+START_ZEIT = time.perf_counter()
+
+from tkinter import filedialog, messagebox, simpledialog
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
 import csv
-import json
 import os
+import queue
+import sys
+import threading
+import zipfile
+
+# euer_export and euer_import pull in openpyxl, which costs more than the
+# rest of the start-up together; they are imported where they are used.
+from euer_buch import Kassenbuch
+from euer_changes import ChangeBus, store_positionen
+from euer_format import format_buchung, format_cents, format_signed_cents
+from euer_index import ID_BITS, ZEITRAEUME, zeitraum
+from euer_kategorien import Katalog
+from euer_listview import VirtualListView
+from euer_settings import (
+    STANDARD_EINSTELLUNGEN,
+    ExportHistory,
+    einstellungen_laden,
+    einstellungen_speichern,
+)
+from euer_storage import SQLITE_SUFFIXES
+from euer_store import TransactionStore
+from euer_timing import (
+    aktivieren,
+    bericht,
+    ist_aktiv,
+    letzte,
+    letztes_profil,
+    profil_naechste,
+)
+from euer_undo import Operation, UndoLog, beschreibung
+from euer_workspace import Workspace
 
 # === KONFIGURATION ===
 EXCEL_DATEI = "Umsatz 25.09 (2).xlsx"
 DB_CSV = "db.csv"
+# "db.sqlite3" schaltet auf das SQLite-Backend um; ein vorhandenes db.csv
+# wird beim ersten Start einmalig übernommen.
+DB_DATEI = DB_CSV
+# Änderungen als Journal an db.csv anhängen statt die Datei neu zu schreiben
+JOURNAL_MODUS = True
+KOMPAKTIERUNG_INTERVALL_MS = 60_000
+LADEN_POLL_MS = 50
+ALLE_KATEGORIEN = "Alle Kategorien"
+KEINE_SPALTE = "—"
+NEUE_FIRMA = "➕ Neue Firma …"
+# Gibt die Dauer der einzelnen Startphasen auf stderr aus
+PROFILE_STARTUP = "--profile-startup" in sys.argv[1:]
+# Misst Speichern, Liste, Summen und Export und zeigt die Zeiten unter der
+# Statuszeile an (auch später mit F12 ein- und ausschaltbar)
+MESSEN = "--messen" in sys.argv[1:]
+MESSUNG_ANZEIGE_MS = 500
+# Einträge in der Vorschlagsliste der Kategorie
+KATEGORIE_VORSCHLAEGE = 15
 
-# === GRUNDSETUP ===
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("blue")
-
-app = ctk.CTk()
-app.title("EÜR Rechner")
-app.geometry("600x400")
+# === DATEN ===
+heutiges_datum = date.today()
+transaction_list = None
+compaction_scheduled = False
+# Firma and Anfangsbestand are asked once the first full load is done
+startdialoge_offen = True
+export_job = None
+messung_after = None
+undo_log = UndoLog()
+einstellungen = dict(STANDARD_EINSTELLUNGEN)
+export_historie = ExportHistory()
+# Katalog and workspace read their files; both are set up in the start
+# block below, so that export workers importing this module stay cheap.
+katalog = None
+# Categories of the current store already offered to the catalog
+kategorien_gesehen = 0
+# (phase, perf_counter) while profiling the start-up, else None
+startup_phasen = [("Start", START_ZEIT)] if PROFILE_STARTUP else None
+workspace = None
+# Das Kassenbuch der aktiven Firma, angelegt in neues_buch()
+buch = None
 
 
+# === FUNKTIONEN ===
 # Funktion zum korrekten Beenden des Programms
 def on_closing():
+    if export_job is not None:
+        export_job.cancel()
+    save_settings()
+    try:
+        export_historie.save_index()
+    except OSError:
+        pass
+    workspace.close()
     app.quit()  # Beendet die Hauptschleife
     app.destroy()  # Zerstört das Fenster
-    import sys
     sys.exit(0)  # Beendet das Programm vollständig
 
 
-# Registriere die Funktion für das Schließen-Event
-app.protocol("WM_DELETE_WINDOW", on_closing)
+def startup_phase(name):
+    if startup_phasen is not None:
+        startup_phasen.append((name, time.perf_counter()))
 
-# === DATEN ===
-heutiges_datum = date.today()
-transaktionen = []
-anfangsbestand = 0.0
-firmenname = ""
-transaction_listbox = None
-open_transaction_windows = []
-
-
-def format_currency(value):
-    """Format a value using German thousands separators and append €."""
-    if value is None or value == "":
-        return ""
-    value = round(float(value), 2)
-    if abs(value) >= 1000:
-        formatted = (
-            f"{abs(value):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def startup_bericht():
+    """Print the start-up phases once, when the history is complete."""
+    global startup_phasen
+    if startup_phasen is None:
+        return
+    print("Startphasen:", file=sys.stderr)
+    for (_, vorher), (name, zeitpunkt) in zip(startup_phasen, startup_phasen[1:]):
+        print(
+            f"  {name:<24} {(zeitpunkt - vorher) * 1000:8.1f} ms"
+            f"  (gesamt {(zeitpunkt - START_ZEIT) * 1000:8.1f} ms)",
+            file=sys.stderr,
         )
-    else:
-        formatted = f"{abs(value):.2f}".replace(".", ",")
-    return f"{formatted} €"
+    startup_phasen = None
+
+
+def load_settings():
+    """Apply the stored window size and last used category."""
+    global einstellungen
+    einstellungen = einstellungen_laden()
+    if einstellungen["geometrie"]:
+        app.geometry(einstellungen["geometrie"])
+    if einstellungen["kategorie"] in katalog:
+        kategorie_option.set(einstellungen["kategorie"])
+
+
+def save_settings():
+    if kategorie_option.get() in katalog:
+        einstellungen["kategorie"] = kategorie_option.get()
+    einstellungen["geometrie"] = app.geometry()
+    try:
+        einstellungen_speichern(einstellungen)
+    except OSError:
+        pass
+
+
+def load_umsatz_history():
+    try:
+        export_historie.load()
+    except (OSError, UnicodeDecodeError) as exc:
+        info_label.configure(text=f"❌ Fehler beim Laden des Exportverlaufs: {exc}")
+
+
+def record_umsatz_export(filename, einnahmen, ausgaben, gewinn, endbestand):
+    """Log an export of the active company (amounts in euro)."""
+    export_historie.record(
+        workspace.aktiv,
+        filename,
+        round(einnahmen * 100),
+        round(ausgaben * 100),
+        round(gewinn * 100),
+        round(endbestand * 100),
+    )
+    letzter_export_anzeigen()
+
+
+def letzter_export_anzeigen():
+    """Show when the month of aktuelles_datum was last exported."""
+    monat = aktuelles_datum.strftime("%m.%Y")
+    eintrag = export_historie.letzter_export(
+        workspace.aktiv, aktuelles_datum.year, aktuelles_datum.month
+    )
+    if eintrag is None:
+        export_label.configure(text=f"{monat} noch nicht exportiert")
+        return
+    zeitpunkt = datetime.fromisoformat(eintrag.zeitpunkt)
+    export_label.configure(
+        text=f"Letzter Export {monat}: {zeitpunkt.strftime('%d.%m.%Y %H:%M')}"
+        f" (Endbestand {format_signed_cents(eintrag.endbestand)})"
+    )
+
+
+def messung_umschalten():
+    """F12: measuring and the timing overlay on/off."""
+    if ist_aktiv():
+        aktivieren(False)
+        messung_label.pack_forget()
+        if messung_after is not None:
+            app.after_cancel(messung_after)
+        return
+    aktivieren()
+    messung_label.pack(after=info_label, pady=(0, 10))
+    messung_anzeigen()
+
+
+def profil_anfordern():
+    """F11: dump a cProfile trace of the next measured action."""
+    if not ist_aktiv():
+        messung_umschalten()
+    profil_naechste(verzeichnis=workspace.verzeichnis(workspace.aktiv))
+    info_label.configure(text="🔬 Die nächste Aktion wird profiliert")
+
+
+def messung_anzeigen():
+    """Refresh the timing overlay while measuring is on."""
+    global messung_after
+    zuletzt = " | ".join(
+        f"{name} {sekunden * 1000:.1f} ms" for name, sekunden in letzte(3)
+    )
+    text = f"Zuletzt: {zuletzt or '—'}\n{bericht()}"
+    if letztes_profil():
+        text += f"\nProfil: {letztes_profil()}"
+    messung_label.configure(text=text)
+    messung_after = app.after(MESSUNG_ANZEIGE_MS, messung_anzeigen)
 
 
-# === FUNKTIONEN ===
 def datum_anzeigen():
     datum_label.configure(text=aktuelles_datum.strftime("%d.%m.%Y"))
+    kassenbestand_anzeigen()
+    letzter_export_anzeigen()
+    # Filtered transaction windows follow the selected date.
+    datum_bus.publish(neu=True)
+
+
+def kassenbestand_anzeigen():
+    """Show the running Kassenbestand at the end of aktuelles_datum."""
+    # The SQLite backend can answer this before the history is loaded.
+    try:
+        bestand = buch.kassenbestand_cents(aktuelles_datum.toordinal())
+    except OSError:
+        bestand = None
+    if bestand is None:
+        kassenbestand_label.configure(text="Kassenbestand: wird berechnet …")
+        return
+    kassenbestand_label.configure(
+        text=f"Kassenbestand: {format_signed_cents(bestand)}"
+    )
 
 
 def datum_plus():
@@ -71,69 +246,138 @@ def datum_minus():
     datum_anzeigen()
 
 
+def neues_buch(datei):
+    """Kassenbuch of the company ``datei``; list views follow its changes."""
+    return Kassenbuch(workspace.storage(datei), datei, on_change=change_bus.publish)
+
+
+def speicherfehler(exc):
+    info_label.configure(text=f"❌ Fehler beim Speichern in CSV: {exc}")
+
+
 def save_all_to_csv():
-    """Write the entire DB (Anfangsbestand header if present + all transactions)."""
+    """Write the entire DB atomically and drop the journal."""
     try:
-        with open(DB_CSV, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f, delimiter=";")
-            if firmenname:
-                writer.writerow(["Firma", firmenname])
-            writer.writerow(["Anfangsbestand", f"{anfangsbestand:.2f}"])
-            for t in transaktionen:
-                writer.writerow([t["Datum"], t["Kategorie"], f"{t['Betrag']:.2f}"])
-    except Exception:
-        pass
+        buch.neu_schreiben()
+    except OSError as exc:
+        speicherfehler(exc)
+
+
+def migrate_db_if_needed():
+    """Take over an existing db.csv once when switching to SQLite."""
+    if (
+        DB_DATEI.lower().endswith(SQLITE_SUFFIXES)
+        and not os.path.exists(DB_DATEI)
+        and os.path.exists(DB_CSV)
+    ):
+        from euer_sqlite import migrate_csv
+
+        migrate_csv(DB_CSV, DB_DATEI, katalog)
 
 
 def load_db():
-    """Load transactions and anfangsbestand from DB_CSV if present."""
-    global anfangsbestand, transaktionen, firmenname
-    if not os.path.exists(DB_CSV):
-        return
+    """Load the header and the most recent period from DB_CSV.
+
+    The full history follows via :func:`load_history_in_background`.
+    """
     try:
-        with open(DB_CSV, newline="", encoding="utf-8") as f:
-            reader = csv.reader(f, delimiter=";")
-            rows = list(reader)
-    except Exception:
+        buch.laden_vorschau()
+    except (OSError, csv.Error, UnicodeDecodeError):
+        return
+
+
+def set_editing_enabled(enabled):
+    state = "normal" if enabled else "disabled"
+    for widget in (
+        betrag_entry,
+        add_arrow_button,
+        delete_button,
+        export_button,
+        year_export_button,
+        new_umsatz_button,
+        show_transactions_button,
+        import_button,
+        reimport_button,
+        firma_option,
+    ):
+        widget.configure(state=state)
+
+
+def load_history_in_background():
+    """Stream the full history on a worker thread while the preview is shown.
+
+    Editing stays disabled until the complete list has replaced the preview,
+    because journal deletes and full rewrites refer to the whole history.
+    """
+    result = queue.Queue(maxsize=1)
+    ziel = buch
+
+    def worker():
+        try:
+            result.put(ziel.storage.load())
+        except (OSError, csv.Error, UnicodeDecodeError) as exc:
+            result.put(exc)
+
+    def poll():
+        try:
+            loaded = result.get_nowait()
+        except queue.Empty:
+            app.after(LADEN_POLL_MS, poll)
+            return
+        # Drop the result if the user switched to another company meanwhile.
+        if ziel is buch:
+            finish_loading(loaded)
+
+    set_editing_enabled(False)
+    threading.Thread(target=worker, name="db-laden", daemon=True).start()
+    app.after(LADEN_POLL_MS, poll)
+
+
+def finish_loading(loaded):
+    global compaction_scheduled, startdialoge_offen
+    if isinstance(loaded, Exception):
+        info_label.configure(text=f"❌ Fehler beim Laden der Historie: {loaded}")
         return
 
-    transaktionen = []
-    anfangsbestand = 0.0
-    firmenname_local = ""
-
-    for row in rows:
-        if not row:
-            continue
-        key = row[0].strip().lower()
-        if key == "firma" and len(row) > 1:
-            firmenname_local = row[1].strip()
-        elif key == "anfangsbestand" and len(row) > 1:
-            try:
-                anfangsbestand = float(row[1].replace(",", "."))
-            except ValueError:
-                anfangsbestand = 0.0
-        elif len(row) >= 3:
-            try:
-                tdate = row[0]
-                kategorie = row[1]
-                betrag = float(row[2].replace(",", "."))
-                transaktionen.append({
-                    "Datum": tdate,
-                    "Kategorie": kategorie,
-                    "Betrag": betrag,
-                })
-            except ValueError:
-                continue
-
-    if firmenname_local:
-        global firmenname
-        firmenname = firmenname_local
+    buch.uebernehmen(loaded)
+    kassenbestand_anzeigen()
+    show_load_status()
+    set_editing_enabled(True)
+    if buch.firmenname:
+        workspace.rename(workspace.aktiv, buch.firmenname)
+    update_firma_option()
+    if not compaction_scheduled:
+        compaction_scheduled = True
+        app.after(KOMPAKTIERUNG_INTERVALL_MS, schedule_compaction)
+    startup_phase("Historie geladen")
+    if startdialoge_offen:
+        # Not before: without journal a header change rewrites db.csv from
+        # the bookings in memory.
+        startdialoge_offen = False
+        ask_firma_if_needed()
+        ask_anfangsbestand_if_needed()
+        show_load_status()
+        startup_phase("Startdialoge")
+    startup_bericht()
+
+
+def show_load_status(suffix=""):
+    bestand_str = format_signed_cents(round(buch.anfangsbestand * 100))
+    firmeninfo = f" | Firma: {buch.firmenname}" if buch.firmenname else ""
+    info_label.configure(
+        text=f"Anfangsbestand: {bestand_str} | geladene Transaktionen: {len(buch.transaktionen)}{firmeninfo}{suffix}"
+    )
+
+
+def schedule_compaction():
+    """Fold the journal back into db.csv in the background from time to time."""
+    buch.kompaktieren()
+    app.after(KOMPAKTIERUNG_INTERVALL_MS, schedule_compaction)
 
 
 def ask_firma_if_needed(force: bool = False):
     """Fragt nach dem Firmennamen, sofern nötig oder erzwungen."""
-    global firmenname
-    if firmenname and not force:
+    if buch.firmenname and not force:
         return
 
     dialog = ctk.CTkToplevel(app)
@@ -147,13 +391,11 @@ def ask_firma_if_needed(force: bool = False):
     entry.pack(pady=5)
 
     def submit():
-        global firmenname
         name = entry.get().strip()
         if not name:
             info_label.configure(text="❌ Bitte Firmennamen eingeben")
             return
-        firmenname = name
-        save_all_to_csv()
+        firmenname_setzen(name)
         dialog.destroy()
 
     submit_btn = ctk.CTkButton(dialog, text="OK", command=submit)
@@ -165,8 +407,7 @@ def ask_firma_if_needed(force: bool = False):
 
 def ask_anfangsbestand_if_needed(force: bool = False):
     """Ask user for Anfangsbestand if not already set from CSV."""
-    global anfangsbestand
-    if anfangsbestand != 0.0 and not force:
+    if buch.anfangsbestand != 0.0 and not force:
         return
 
     dialog = ctk.CTkToplevel(app)
@@ -187,16 +428,10 @@ def ask_anfangsbestand_if_needed(force: bool = False):
             info_label.configure(text="❌ Ungültiger Anfangsbestand")
             return
 
-        global anfangsbestand
-        anfangsbestand = value
-        save_all_to_csv()
-        if anfangsbestand >= 1000:
-            bestand_str = (
-                f"{anfangsbestand:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            )
-        else:
-            bestand_str = f"{anfangsbestand:.2f}".replace(".", ",")
-        info_label.configure(text=f"Anfangsbestand gesetzt: {bestand_str} €")
+        if not anfangsbestand_setzen(value):
+            return
+        bestand_str = format_signed_cents(buch.totals.anfangsbestand_cents)
+        info_label.configure(text=f"Anfangsbestand gesetzt: {bestand_str}")
         dialog.destroy()
 
     submit_btn = ctk.CTkButton(dialog, text="OK", command=submit)
@@ -206,29 +441,116 @@ def ask_anfangsbestand_if_needed(force: bool = False):
     app.wait_window(dialog)
 
 
+def firmenname_setzen(name):
+    try:
+        op = buch.firma_setzen(name)
+    except OSError as exc:
+        speicherfehler(exc)
+        return False
+    workspace.rename(workspace.aktiv, name)
+    update_firma_option()
+    if op is not None:
+        protokollieren_op(op)
+    return True
+
+
+def anfangsbestand_setzen(value):
+    try:
+        op = buch.anfangsbestand_setzen(value)
+    except OSError as exc:
+        speicherfehler(exc)
+        return False
+    kassenbestand_anzeigen()
+    if op is not None:
+        protokollieren_op(op)
+    return True
+
+
+def format_transaction_row(idx):
+    """Display text of buch.transaktionen[idx] for the list views."""
+    return format_buchung(buch.transaktionen, idx)
+
+
+def transaction_count():
+    return len(buch.transaktionen)
+
+
 def refresh_transaction_list():
-    """Refresh the Listbox content from transaktionen."""
-    transaction_listbox.delete(0, tk.END)
-    for t in transaktionen:
-        betrag = abs(t["Betrag"])
-        if betrag >= 1000:
-            betrag_str = (
-                f"{betrag:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            )
-        else:
-            betrag_str = f"{betrag:.2f}".replace(".", ",")
+    """Tell all list views that the bookings were replaced."""
+    change_bus.publish(neu=True)
+
+
+def on_transactions_changed(aenderung):
+    global kategorien_gesehen
+    # Categories of loaded or imported bookings join the catalog; the
+    # store's names only grow, so only the ones not seen yet are new.
+    kategorien = buch.transaktionen.kategorien
+    if aenderung.neu:
+        kategorien_gesehen = 0
+    katalog.aufnehmen(kategorien[kategorien_gesehen:])
+    kategorien_gesehen = len(kategorien)
+    if katalog.geaendert:
+        katalog_speichern()
+    if aenderung.neu:
+        transaction_list.refresh(scroll_to_end=True)
+    else:
+        transaction_list.apply_delta(*store_positionen(buch.transaktionen, aenderung))
+
+
+def katalog_speichern():
+    try:
+        katalog.speichern()
+    except OSError as exc:
+        info_label.configure(text=f"❌ Kategorien nicht gespeichert: {exc}")
+
+
+def kategorie_vorschlagen(event=None):
+    """Narrow the category drop-down to the matches of the typed text."""
+    if event is not None and event.keysym in ("Tab", "Return", "Up", "Down", "Escape"):
+        return
+    kategorie_option.configure(
+        values=katalog.vorschlaege(kategorie_option.get(), KATEGORIE_VORSCHLAEGE)
+    )
 
-        datum = t["Datum"].ljust(10)
-        kategorie = t["Kategorie"].ljust(30)
-        betrag_str = f"{betrag_str} €".rjust(15)
-        display = f"{datum} | {kategorie} | {betrag_str}"
-        transaction_listbox.insert(tk.END, display)
 
-    transaction_listbox.see(tk.END)
-    transaction_listbox.selection_clear(0, tk.END)
+def kategorie_vervollstaendigen(_event=None):
+    """Take the best match for the typed text and go on to the amount."""
+    vorschlaege = katalog.vorschlaege(kategorie_option.get(), 1)
+    if vorschlaege:
+        kategorie_option.set(vorschlaege[0])
+    betrag_entry.focus_set()
+    return "break"
+
+
+def kategorie_waehlen(text):
+    """Catalog name for the entry ``text``; a new one asks for its sign."""
+    text = text.strip()
+    if not text:
+        info_label.configure(text="❌ Keine Kategorie gewählt")
+        return None
+    kategorie = katalog.finden(text)
+    if kategorie is not None:
+        kategorie_option.set(kategorie)
+        return kategorie
+    einnahme = messagebox.askyesnocancel(
+        "Neue Kategorie",
+        f"„{text}“ ist noch nicht im Katalog.\n\n"
+        "Als Einnahme anlegen? (Nein = Ausgabe)",
+        parent=app,
+    )
+    if einnahme is None:
+        return None
+    katalog.setzen(text, einnahme)
+    katalog_speichern()
+    kategorie_vorschlagen()
+    return text
 
 
 def transaktion_hinzufügen():
+    if not buch.vollstaendig:
+        info_label.configure(text="⏳ Buchungen werden noch geladen …")
+        return
+
     # accept comma as decimal separator
     betrag_text = betrag_entry.get().strip().replace(",", ".")
     try:
@@ -237,82 +559,118 @@ def transaktion_hinzufügen():
         info_label.configure(text="❌ Ungültiger Betrag")
         return
 
-    kategorie = kategorie_option.get()
-
-    if "Tagesumsatz Kasse" in kategorie:
-        betrag = abs(betrag_raw)
-    else:
-        betrag = -abs(betrag_raw)
-
-    transaktionen.append({
-        "Datum": aktuelles_datum.strftime("%Y-%m-%d"),
-        "Kategorie": kategorie,
-        "Betrag": betrag,
-    })
-
+    kategorie = kategorie_waehlen(kategorie_option.get())
+    if kategorie is None:
+        return
+    cents = katalog.vorzeichen_cents(kategorie, round(betrag_raw * 100))
     try:
-        save_all_to_csv()
-    except Exception as exc:
-        info_label.configure(text=f"❌ Fehler beim Speichern in CSV: {exc}")
+        op = buch.hinzufuegen(aktuelles_datum.toordinal(), kategorie, cents)
+    except OSError as exc:
+        speicherfehler(exc)
         return
+    kassenbestand_anzeigen()
+    protokollieren_op(op)
 
-    betrag_abs = abs(betrag)
-    if betrag_abs >= 1000:
-        betrag_str = (
-            f"{betrag_abs:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        )
-    else:
-        betrag_str = f"{betrag_abs:.2f}".replace(".", ",")
     info_label.configure(
-        text=f"💾 Transaktion gespeichert ({kategorie}: {betrag_str} €)"
+        text=f"💾 Transaktion gespeichert ({kategorie}: {format_cents(cents)})"
     )
     betrag_entry.delete(0, "end")
-    refresh_transaction_list()
-    for window in list(open_transaction_windows):
-        if window.winfo_exists():
-            window.event_generate("<<TransactionsUpdated>>", when="tail")
-        else:
-            open_transaction_windows.remove(window)
 
 
-def delete_transaction_at_index(idx):
+def delete_transaction(row_id):
+    """Delete a booking by id; returns its undo row or ``None``."""
     try:
-        removed = transaktionen.pop(idx)
-    except Exception:
+        op = buch.loeschen(row_id)
+    except KeyError:
         return None
+    except OSError as exc:
+        speicherfehler(exc)
+        return None
+    kassenbestand_anzeigen()
+    protokollieren_op(op)
 
-    save_all_to_csv()
-    refresh_transaction_list()
-
-    betrag_abs = abs(removed["Betrag"])
-    if betrag_abs >= 1000:
-        betrag_str = (
-            f"{betrag_abs:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        )
-    else:
-        betrag_str = f"{betrag_abs:.2f}".replace(".", ",")
+    _, _, kategorie, cents = op.daten[0]
     info_label.configure(
-        text=f"🗑️ Transaktion gelöscht: {removed['Kategorie']} {betrag_str} €"
+        text=f"🗑️ Transaktion gelöscht: {kategorie} {format_cents(cents)}"
     )
-    return removed
+    return op.daten[0]
 
 
 def delete_selected_transaction():
-    sel = transaction_listbox.curselection()
-    if not sel:
+    change_bus.flush()
+    idx = transaction_list.selected_index()
+    if idx is None:
         info_label.configure(text="❌ Keine Transaktion ausgewählt")
         return
 
-    idx = sel[0]
-    if delete_transaction_at_index(idx) is None:
+    if delete_transaction(buch.transaktionen.row_id(idx)) is None:
         info_label.configure(text="❌ Fehler beim Löschen")
-        return
 
-    for window in list(open_transaction_windows):
-        if not window.winfo_exists():
-            open_transaction_windows.remove(window)
-            continue
-        window.event_generate("<<TransactionsUpdated>>", when="tail")
+
+def protokollieren_op(op):
+    undo_log.record(op)
+    update_undo_buttons()
+
+
+def update_undo_buttons():
+    undo_button.configure(state="normal" if undo_log.next_undo() else "disabled")
+    redo_button.configure(state="normal" if undo_log.next_redo() else "disabled")
+
+
+def operation_anwenden(op, rueckwaerts):
+    """Revert (``rueckwaerts``) or re-apply ``op``; returns success."""
+    if op.art == "neue_firma":
+        vorher, eintrag, position = op.daten
+        if rueckwaerts:
+            switch_firma(vorher)
+            workspace.remove_firma(op.datei)
+        else:
+            workspace.restore_firma(eintrag, position)
+            switch_firma(op.datei)
+        update_firma_option()
+        return True
+    try:
+        buch.anwenden(op, rueckwaerts)
+    except KeyError:
+        return False
+    except OSError as exc:
+        speicherfehler(exc)
+        return False
+    if op.art == "firma":
+        workspace.rename(workspace.aktiv, buch.firmenname)
+        update_firma_option()
+    return True
+
+
+def undo_redo(rueckwaerts):
+    if not buch.vollstaendig:
+        info_label.configure(text="⏳ Buchungen werden noch geladen …")
+        return
+    op = undo_log.next_undo() if rueckwaerts else undo_log.next_redo()
+    if op is None:
+        return
+    # A company creation is undone from the new company itself; everything
+    # else needs its company to be active first.
+    datei = op.daten[0] if op.art == "neue_firma" and not rueckwaerts else op.datei
+    if datei != workspace.aktiv:
+        switch_firma(datei)
+        if not buch.vollstaendig:
+            info_label.configure(
+                text=f"↩️ Zu {workspace.name(datei) or datei} gewechselt, "
+                "bitte nach dem Laden erneut ausführen"
+            )
+            return
+    change_bus.flush()
+    if not operation_anwenden(op, rueckwaerts):
+        return
+    kassenbestand_anzeigen()
+    if rueckwaerts:
+        undo_log.undone()
+        info_label.configure(text=f"↩️ Rückgängig: {beschreibung(op)}")
+    else:
+        undo_log.redone()
+        info_label.configure(text=f"↪️ Wiederholt: {beschreibung(op)}")
+    update_undo_buttons()
 
 
 def open_transaction_window():
@@ -320,61 +678,83 @@ def open_transaction_window():
 
     window = ctk.CTkToplevel(app)
     window.title("Transaktionen")
-    window.geometry("520x320")
+    window.geometry("520x360")
 
-    list_container = tk.Frame(window)
-    list_container.pack(fill="both", expand=True, padx=10, pady=(10, 0))
+    # Row ids of the filtered bookings, or None while everything is shown.
+    row_ids = None
+    von = bis = kategorie = None
 
-    listbox = tk.Listbox(list_container, height=10, width=70)
-    listbox.pack(side="left", fill="both", expand=True)
+    def row_count():
+        return len(buch.transaktionen) if row_ids is None else len(row_ids)
 
-    scrollbar = tk.Scrollbar(list_container, orient="vertical", command=listbox.yview)
-    scrollbar.pack(side="right", fill="y")
-    listbox.config(yscrollcommand=scrollbar.set)
+    def position(i):
+        return i if row_ids is None else buch.transaktionen.position(row_ids[i])
 
-    def populate_listbox():
-        listbox.delete(0, tk.END)
-        for t in transaktionen:
-            betrag = abs(t["Betrag"])
-            if betrag >= 1000:
-                betrag_str = (
-                    f"{betrag:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                )
-            else:
-                betrag_str = f"{betrag:.2f}".replace(".", ",")
+    def row_id_at(i):
+        return buch.transaktionen.row_id(i) if row_ids is None else row_ids[i]
 
-            datum = t["Datum"].ljust(10)
-            kategorie = t["Kategorie"].ljust(30)
-            betrag_str = f"{betrag_str} €".rjust(15)
-            listbox.insert(tk.END, f"{datum} | {kategorie} | {betrag_str}")
+    def apply_filter(_value=None):
+        nonlocal row_ids, von, bis, kategorie
+        von, bis = zeitraum(aktuelles_datum, zeitraum_option.get())
+        kategorie = kategorie_filter.get()
+        if kategorie == ALLE_KATEGORIEN:
+            kategorie = None
+        if von is None and kategorie is None:
+            row_ids = None
+        else:
+            row_ids = buch.transaktionen.query_ids(von, bis, kategorie)
+        list_view.refresh()
+        anzahl_label.configure(text=f"{row_count()} Buchungen")
+
+    filter_bar = ctk.CTkFrame(window)
+    filter_bar.pack(fill="x", padx=10, pady=(10, 0))
 
-    populate_listbox()
+    zeitraum_option = ctk.CTkOptionMenu(
+        filter_bar, values=list(ZEITRAEUME), width=100, command=apply_filter
+    )
+    zeitraum_option.pack(side="left")
+
+    kategorie_filter = ctk.CTkOptionMenu(
+        filter_bar,
+        values=[
+            ALLE_KATEGORIEN,
+            *dict.fromkeys([*katalog.namen, *buch.transaktionen.kategorien]),
+        ],
+        width=220,
+        command=apply_filter,
+    )
+    kategorie_filter.pack(side="left", padx=8)
+
+    anzahl_label = ctk.CTkLabel(filter_bar, text="")
+    anzahl_label.pack(side="right")
+
+    list_view = VirtualListView(
+        window,
+        row_count,
+        lambda i: format_transaction_row(position(i)),
+        height=10,
+        width=70,
+        follow_tail=False,
+    )
+    list_view.pack(fill="both", expand=True, padx=10, pady=(10, 0))
+    apply_filter()
 
     def delete_from_window():
-        selection = listbox.curselection()
-        if not selection:
+        change_bus.flush()
+        selected = list_view.selected_index()
+        if selected is None:
             messagebox.showinfo(
                 "Hinweis",
                 "Bitte eine Transaktion auswählen.",
                 parent=window,
             )
             return
-        idx = selection[0]
-        if delete_transaction_at_index(idx) is None:
+        if delete_transaction(row_id_at(selected)) is None:
             messagebox.showerror(
                 "Fehler",
                 "Transaktion konnte nicht gelöscht werden.",
                 parent=window,
             )
-            return
-        populate_listbox()
-        for other in list(open_transaction_windows):
-            if other is window:
-                continue
-            if other.winfo_exists():
-                other.event_generate("<<TransactionsUpdated>>", when="tail")
-            else:
-                open_transaction_windows.remove(other)
 
     button_bar = ctk.CTkFrame(window)
     button_bar.pack(fill="x", padx=10, pady=10)
@@ -390,430 +770,661 @@ def open_transaction_window():
     close_button = ctk.CTkButton(button_bar, text="Schließen", command=lambda: on_close())
     close_button.pack(side="right")
 
-    def handle_update(_event):
-        if window.winfo_exists():
-            populate_listbox()
+    def schluessel(row_id):
+        transaktionen = buch.transaktionen
+        return transaktionen.datum_ordinals[transaktionen.position(row_id)] << ID_BITS | row_id
+
+    def passt(row_id):
+        transaktionen = buch.transaktionen
+        idx = transaktionen.position(row_id)
+        ordinal = transaktionen.datum_ordinals[idx]
+        return (
+            (von is None or von <= ordinal <= bis)
+            and (
+                kategorie is None
+                or transaktionen.kategorien[transaktionen.kategorie_codes[idx]] == kategorie
+            )
+        )
+
+    def filtered_delta(aenderung):
+        """Apply a delta to ``row_ids``; returns the positions like store_positionen."""
+        weg = set(aenderung.entfernt)
+        entfernt = [i for i, row_id in enumerate(row_ids) if row_id in weg] if weg else []
+        if entfernt:
+            row_ids[:] = [row_id for row_id in row_ids if row_id not in weg]
+        eingefuegt = []
+        for row_id in sorted(filter(passt, aenderung.hinzugefuegt), key=schluessel):
+            i = bisect_left(row_ids, schluessel(row_id), key=schluessel)
+            row_ids.insert(i, row_id)
+            eingefuegt.append(i)
+        return entfernt, eingefuegt
+
+    def handle_change(aenderung):
+        if not window.winfo_exists():
+            return
+        if aenderung.neu:
+            apply_filter()
+            return
+        if row_ids is None:
+            list_view.apply_delta(*store_positionen(buch.transaktionen, aenderung))
+        else:
+            list_view.apply_delta(*filtered_delta(aenderung))
+        anzahl_label.configure(text=f"{row_count()} Buchungen")
 
-    window.bind("<<TransactionsUpdated>>", handle_update)
-    open_transaction_windows.append(window)
+    unsubscribe = (change_bus.subscribe(handle_change), datum_bus.subscribe(handle_change))
 
     def on_close():
-        if window in open_transaction_windows:
-            open_transaction_windows.remove(window)
+        for abmelden in unsubscribe:
+            abmelden()
         window.destroy()
 
     window.protocol("WM_DELETE_WINDOW", on_close)
 
 
-def create_new_umsatz():
-    """Reset the current revenue data to start a new record."""
-    if not messagebox.askyesno(
-        "Neuen Umsatz anlegen",
-        "Alle aktuellen Transaktionen löschen und neu beginnen?",
+def importieren():
+    """Bulk-import a cash-register or bank export (CSV/XLSX)."""
+    if not buch.vollstaendig:
+        info_label.configure(text="⏳ Buchungen werden noch geladen …")
+        return
+    path = filedialog.askopenfilename(
         parent=app,
-    ):
+        title="Export importieren",
+        filetypes=[("Kassen-/Bankexport", "*.csv *.xlsx"), ("Alle Dateien", "*")],
+    )
+    if not path:
         return
+    from euer_import import read_table
+
+    try:
+        kopf, zeilen = read_table(path)
+    except (OSError, csv.Error, ValueError) as exc:
+        info_label.configure(text=f"❌ Fehler beim Lesen: {exc}")
+        return
+    if not zeilen:
+        info_label.configure(text="❌ Keine Zeilen in der Datei")
+        return
+    ask_import_mapping(os.path.basename(path), kopf, zeilen)
+
+
+def ask_import_mapping(name, kopf, zeilen):
+    """Let the user map the source columns, then import everything at once."""
+    from euer_import import Spalten, guess_spalten, prepare_import
+
+    dialog = ctk.CTkToplevel(app)
+    dialog.title(f"Import: {name}")
+    dialog.geometry("380x330")
+
+    spalten_namen = [f"{i + 1}: {titel}" for i, titel in enumerate(kopf)]
+    vorschlag = guess_spalten(kopf)
+    auswahl = {}
+    for feld, text, optional in (
+        ("datum", "Datum", False),
+        ("betrag", "Betrag", False),
+        ("text", "Text → Kategorie", True),
+    ):
+        row = ctk.CTkFrame(dialog)
+        row.pack(fill="x", padx=15, pady=(10, 0))
+        ctk.CTkLabel(row, text=text, width=120, anchor="w").pack(side="left")
+        werte = [KEINE_SPALTE, *spalten_namen] if optional else spalten_namen
+        option = ctk.CTkOptionMenu(row, values=werte, width=200)
+        index = getattr(vorschlag, feld)
+        option.set(spalten_namen[index] if index is not None else werte[0])
+        option.pack(side="right")
+        auswahl[feld] = option
+
+    row = ctk.CTkFrame(dialog)
+    row.pack(fill="x", padx=15, pady=(10, 0))
+    ctk.CTkLabel(row, text="Sonst Kategorie", width=120, anchor="w").pack(side="left")
+    standard_option = ctk.CTkOptionMenu(row, values=katalog.namen, width=200)
+    standard_option.pack(side="right")
+
+    vorzeichen = ctk.CTkCheckBox(dialog, text="Vorzeichen aus der Kategorie ableiten")
+    vorzeichen.select()
+    vorzeichen.pack(padx=15, pady=15, anchor="w")
+
+    def spalte(feld):
+        wert = auswahl[feld].get()
+        return None if wert == KEINE_SPALTE else spalten_namen.index(wert)
+
+    def submit():
+        neue, ergebnis = prepare_import(
+            zeilen,
+            Spalten(spalte("datum"), spalte("betrag"), spalte("text")),
+            katalog.namen,
+            standard_option.get(),
+            buch.transaktionen,
+            vorzeichen_nach_kategorie=bool(vorzeichen.get()),
+            einnahme=katalog.ist_einnahme,
+        )
+        dialog.destroy()
+        if apply_import(neue):
+            info_label.configure(
+                text=f"📥 {ergebnis.neue} importiert, {ergebnis.doppelt} schon vorhanden, "
+                f"{ergebnis.fehlerhaft} fehlerhaft"
+            )
+
+    submit_btn = ctk.CTkButton(dialog, text="Importieren", command=submit)
+    submit_btn.pack(pady=5)
+
+    dialog.grab_set()
+    app.wait_window(dialog)
 
-    global transaktionen, anfangsbestand, aktuelles_datum, firmenname
-    transaktionen = []
-    anfangsbestand = 0.0
-    aktuelles_datum = date.today()
-    firmenname = ""
 
-    if os.path.exists(DB_CSV):
+def umsatz_dateien_einlesen():
+    """Seed the history from archived Umsatz YY.MM.xlsx exports."""
+    if not buch.vollstaendig:
+        info_label.configure(text="⏳ Buchungen werden noch geladen …")
+        return
+    paths = filedialog.askopenfilenames(
+        parent=app,
+        title="Umsatz-Dateien einlesen",
+        initialdir=workspace.verzeichnis(workspace.aktiv),
+        filetypes=[("EÜR-Export", "Umsatz*.xlsx"), ("Excel", "*.xlsx")],
+    )
+    if not paths:
+        return
+    from euer_import import ohne_duplikate, read_euer_workbook
+
+    mappen = []
+    fehler = []
+    for path in paths:
         try:
-            os.remove(DB_CSV)
-        except Exception:
-            pass
+            mappen.append(read_euer_workbook(path, katalog.namen))
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as exc:
+            fehler.append(f"{os.path.basename(path)}: {exc}")
+    mappen = [m for m in mappen if len(m.transaktionen)]
+    mappen.sort(key=lambda m: min(m.transaktionen.datum_ordinals))
+    abweichend = sum(
+        1 for m in mappen
+        if (m.einnahmen_cents, m.ausgaben_cents)
+        != (m.transaktionen.einnahmen_cents(), m.transaktionen.ausgaben_cents())
+    )
 
-    refresh_transaction_list()
-    datum_anzeigen()
-    ask_firma_if_needed(force=True)
-    ask_anfangsbestand_if_needed(force=True)
-    save_all_to_csv()
-    info_label.configure(
-        text="🆕 Neuer Umsatz vorbereitet. Bitte Transaktionen erfassen."
+    # An empty book takes Firma and Anfangsbestand from the oldest file.
+    if mappen and not len(buch.transaktionen) and buch.anfangsbestand == 0.0:
+        if not anfangsbestand_setzen(mappen[0].anfangsbestand_cents / 100):
+            return
+        if not buch.firmenname and mappen[0].firmenname:
+            if not firmenname_setzen(mappen[0].firmenname):
+                return
+
+    neue, doppelt = ohne_duplikate(
+        (
+            (ordinal, m.transaktionen.kategorien[code], cents)
+            for m in mappen
+            for ordinal, code, cents in zip(
+                m.transaktionen.datum_ordinals,
+                m.transaktionen.kategorie_codes,
+                m.transaktionen.cents,
+            )
+        ),
+        buch.transaktionen,
     )
-    for window in list(open_transaction_windows):
-        if window.winfo_exists():
-            window.event_generate("<<TransactionsUpdated>>", when="tail")
-        else:
-            open_transaction_windows.remove(window)
+    if not apply_import(neue):
+        return
+    text = f"📂 {len(mappen)} Dateien: {len(neue)} Buchungen übernommen, {doppelt} schon vorhanden"
+    if abweichend:
+        text += f", {abweichend} mit abweichender Summe"
+    if fehler:
+        text += f" | ❌ {'; '.join(fehler)}"
+    info_label.configure(text=text)
 
 
+def apply_import(neue):
+    """Append ``neue`` with one storage write and one refresh of the views."""
+    try:
+        op = buch.importieren(neue)
+    except OSError as exc:
+        speicherfehler(exc)
+        return False
+    if op is not None:
+        protokollieren_op(op)
+        kassenbestand_anzeigen()
+    return True
+
+
+def firma_labels():
+    """Map the switcher labels to the database paths of the companies."""
+    labels = {}
+    for firma in workspace.firmen:
+        label = firma["name"] or firma["datei"]
+        if label in labels:
+            label = f"{label} ({firma['datei']})"
+        labels[label] = firma["datei"]
+    return labels
+
+
+def update_firma_option():
+    labels = firma_labels()
+    firma_option.configure(values=[*labels, NEUE_FIRMA])
+    for label, datei in labels.items():
+        if datei == workspace.aktiv:
+            firma_option.set(label)
+
+
+def on_firma_selected(label):
+    if label == NEUE_FIRMA:
+        create_new_umsatz()
+        return
+    datei = firma_labels().get(label)
+    if datei is not None:
+        switch_firma(datei)
 
-def delete_selected_transaction():
-    sel = transaction_listbox.curselection()
-    if not sel:
-        info_label.configure(text="❌ Keine Transaktion ausgewählt")
+
+def switch_firma(datei):
+    """Make another company current, from the cache or loaded lazily."""
+    global buch
+    if datei == workspace.aktiv:
+        return
+    if buch.vollstaendig:
+        workspace.remember(workspace.aktiv, buch, buch.transaktionen.nbytes())
+    workspace.set_aktiv(datei)
+
+    cached = workspace.cached(datei)
+    if cached is not None:
+        buch = cached
+        set_editing_enabled(True)
+        suffix = ""
+    else:
+        buch = neues_buch(datei)
+        buch.firmenname = workspace.name(datei)
+        load_db()
+        suffix = " | ältere Buchungen werden geladen …"
+        load_history_in_background()
+
+    refresh_transaction_list()
+    datum_anzeigen()
+    show_load_status(suffix)
+    update_firma_option()
+
+
+def create_new_umsatz():
+    """Start a new book for another company; existing data stays untouched."""
+    global aktuelles_datum
+    name = simpledialog.askstring(
+        "Neuen Umsatz anlegen",
+        "Firmenname für den neuen Umsatz\n(die bisherigen Buchungen bleiben erhalten):",
+        parent=app,
+    )
+    update_firma_option()
+    if not name or not name.strip():
         return
 
-    idx = sel[0]
     try:
-        removed = transaktionen.pop(idx)
-    except Exception:
-        info_label.configure(text="❌ Fehler beim Löschen")
+        datei = workspace.add_firma(name.strip())
+    except OSError as exc:
+        info_label.configure(text=f"❌ Fehler beim Anlegen der Firma: {exc}")
         return
+    neu = neues_buch(datei)
+    neu.uebernehmen((name.strip(), 0.0, TransactionStore()))
+    workspace.remember(datei, neu, 0)
+    vorher = workspace.aktiv
+    aktuelles_datum = date.today()
+    switch_firma(datei)
+    protokollieren_op(Operation(
+        "neue_firma", datei, (vorher, workspace.firmen[-1], len(workspace.firmen) - 1)
+    ))
 
     save_all_to_csv()
-    refresh_transaction_list()
-
-    betrag_abs = abs(removed["Betrag"])
-    if betrag_abs >= 1000:
-        betrag_str = (
-            f"{betrag_abs:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        )
-    else:
-        betrag_str = f"{betrag_abs:.2f}".replace(".", ",")
+    ask_anfangsbestand_if_needed(force=True)
     info_label.configure(
-        text=f"🗑️ Transaktion gelöscht: {removed['Kategorie']} {betrag_str} €"
+        text="🆕 Neuer Umsatz vorbereitet. Bitte Transaktionen erfassen."
     )
 
 
-def open_transaction_window():
-    """Öffnet ein separates Fenster mit den aktuellen Transaktionen."""
+def _notify_export():
+    app.event_generate("<<ExportStatus>>", when="tail")
 
-    window = ctk.CTkToplevel(app)
-    window.title("Transaktionen")
-    window.geometry("520x260")
 
-    list_container = tk.Frame(window)
-    list_container.pack(fill="both", expand=True, padx=10, pady=10)
+def _start_export(job, beschreibung):
+    global export_job
+    export_job = job
+    export_progress.set(0)
+    export_status_frame.pack(after=year_export_button, pady=(0, 10))
+    export_button.configure(state="disabled")
+    year_export_button.configure(state="disabled")
+    info_label.configure(text=f"📤 Export läuft: {beschreibung}")
+    export_job.start()
 
-    listbox = tk.Listbox(list_container, height=10, width=70)
-    listbox.pack(side="left", fill="both", expand=True)
 
-    scrollbar = tk.Scrollbar(list_container, orient="vertical", command=listbox.yview)
-    scrollbar.pack(side="right", fill="y")
-    listbox.config(yscrollcommand=scrollbar.set)
+def exportieren():
+    """Export the displayed month on a worker thread.
 
-    for t in transaktionen:
-        betrag = abs(t["Betrag"])
-        if betrag >= 1000:
-            betrag_str = (
-                f"{betrag:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            )
-        else:
-            betrag_str = f"{betrag:.2f}".replace(".", ",")
+    Same workbook as the month of the year export and ``euer export
+    --month``, so the three never disagree about ``Umsatz YY.MM.xlsx``.
+    """
+    if export_job is not None and export_job.is_alive():
+        return
+    from euer_export import month_export_job, monats_dateiname
+
+    directory = workspace.verzeichnis(workspace.aktiv)
+    _start_export(
+        month_export_job(
+            aktuelles_datum.year,
+            aktuelles_datum.month,
+            buch.firmenname,
+            buch.anfangsbestand,
+            buch.transaktionen,
+            notify=_notify_export,
+            directory=directory,
+        ),
+        os.path.join(
+            directory, monats_dateiname(aktuelles_datum.year, aktuelles_datum.month)
+        ),
+    )
 
-        datum = t["Datum"].ljust(10)
-        kategorie = t["Kategorie"].ljust(30)
-        betrag_str = f"{betrag_str} €".rjust(15)
-        listbox.insert(tk.END, f"{datum} | {kategorie} | {betrag_str}")
 
-    close_button = ctk.CTkButton(window, text="Schließen", command=window.destroy)
-    close_button.pack(pady=(0, 10))
+def exportieren_jahr():
+    """Export every month of the current year plus a yearly summary."""
+    if export_job is not None and export_job.is_alive():
+        return
+    from euer_export import year_export_job
+
+    jahr = aktuelles_datum.year
+    _start_export(
+        year_export_job(
+            jahr,
+            buch.firmenname,
+            buch.anfangsbestand,
+            buch.transaktionen,
+            notify=_notify_export,
+            directory=workspace.verzeichnis(workspace.aktiv),
+        ),
+        f"Jahr {jahr}",
+    )
 
 
-def create_new_umsatz():
-    """Reset the current revenue data to start a new record."""
-    if not messagebox.askyesno(
-        "Neuen Umsatz anlegen",
-        "Alle aktuellen Transaktionen löschen und neu beginnen?",
-        parent=app,
-    ):
-        return
+def cancel_export():
+    if export_job is not None:
+        export_job.cancel()
+        cancel_export_button.configure(state="disabled")
 
-    global transaktionen, anfangsbestand, aktuelles_datum, firmenname
-    transaktionen = []
-    anfangsbestand = 0.0
-    aktuelles_datum = date.today()
-    firmenname = ""
 
-    if os.path.exists(DB_CSV):
+def handle_export_status(_event):
+    """Apply the status messages the export worker posted."""
+    while True:
         try:
-            os.remove(DB_CSV)
-        except Exception:
-            pass
+            message = export_job.messages.get_nowait()
+        except queue.Empty:
+            return
+        if message[0] == "fortschritt":
+            _, done, total = message
+            export_progress.set(done / total if total else 1)
+        else:
+            finish_export(message)
+
+
+def finish_export(message):
+    export_status_frame.pack_forget()
+    cancel_export_button.configure(state="normal")
+    export_button.configure(state="normal")
+    year_export_button.configure(state="normal")
 
+    kind = message[0]
+    if kind == "abgebrochen":
+        info_label.configure(text="⏹️ Export abgebrochen")
+        return
+    if kind == "fehler":
+        info_label.configure(text=f"❌ Fehler beim Export: {message[1]}")
+    else:
+        ergebnisse = message[1]
+        try:
+            for ergebnis in ergebnisse:
+                if ergebnis.unveraendert:
+                    # Same inputs as the export already in the history.
+                    continue
+                record_umsatz_export(
+                    ergebnis.filename,
+                    ergebnis.einnahmen,
+                    ergebnis.ausgaben,
+                    ergebnis.einnahmen - ergebnis.ausgaben,
+                    ergebnis.endbestand,
+                )
+            unveraendert = sum(ergebnis.unveraendert for ergebnis in ergebnisse)
+            if len(ergebnisse) == 1:
+                if unveraendert:
+                    text = f"📤 Export unverändert: {ergebnisse[0].filename}"
+                else:
+                    text = f"📤 Export erfolgreich: {ergebnisse[0].filename}"
+            elif unveraendert:
+                text = (
+                    f"📤 {len(ergebnisse) - unveraendert} Dateien exportiert,"
+                    f" {unveraendert} unverändert"
+                )
+            else:
+                text = f"📤 {len(ergebnisse)} Dateien exportiert"
+            info_label.configure(text=text)
+        except Exception as exc:
+            info_label.configure(text=f"❌ Fehler beim Export: {exc}")
+
+
+def starten():
+    """Second start-up stage, run once the window is on screen.
+
+    Shows the most recent period right away and streams the remaining
+    history in the background; :func:`finish_loading` then asks for Firma
+    and Anfangsbestand if needed.
+    """
+    startup_phase("Fenster sichtbar")
+    load_umsatz_history()
+    startup_phase("Exportverlauf geladen")
+    load_db()
+    update_firma_option()
     refresh_transaction_list()
     datum_anzeigen()
-    ask_firma_if_needed(force=True)
-    ask_anfangsbestand_if_needed(force=True)
-    save_all_to_csv()
-    info_label.configure(
-        text="🆕 Neuer Umsatz vorbereitet. Bitte Transaktionen erfassen."
-    )
+    startup_phase("Vorschau geladen")
+    show_load_status(" | ältere Buchungen werden geladen …")
+    load_history_in_background()
 
 
-def exportieren():
-    try:
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "EÜR"
-
-        header_font = openpyxl.styles.Font(name="Arial", bold=True, size=10)
-        normal_font = openpyxl.styles.Font(name="Arial", size=10)
-        money_format = "@"
-        thin_border = openpyxl.styles.Border(
-            left=openpyxl.styles.Side(style="thin"),
-            right=openpyxl.styles.Side(style="thin"),
-            top=openpyxl.styles.Side(style="thin"),
-            bottom=openpyxl.styles.Side(style="thin"),
-        )
-        header_fill = openpyxl.styles.PatternFill(
-            start_color="E6E6E6", end_color="E6E6E6", fill_type="solid"
-        )
-        grey_fill = openpyxl.styles.PatternFill(
-            start_color="F2F2F2", end_color="F2F2F2", fill_type="solid"
-        )
+if __name__ == "__main__":
+    # Nur beim direkten Start: die per spawn gestarteten Worker-Prozesse des
+    # Jahresexports führen dieses Modul als __mp_main__ erneut aus und dürfen
+    # dabei weder customtkinter laden noch Katalog und Firmen lesen.
+    import customtkinter as ctk
 
-        ws.append([firmenname])
-        ws.append([])
-
-        ws.append([
-            "",
-            "",
-            "",
-            "Anfangsbestand:",
-            format_currency(anfangsbestand),
-        ])
-        anfang_row = ws.max_row
-        for col in range(4, 6):
-            cell = ws.cell(row=anfang_row, column=col)
-            cell.font = header_font
-            cell.border = thin_border
-            if col == 4:
-                cell.fill = grey_fill
-                cell.alignment = openpyxl.styles.Alignment(horizontal="right")
-            else:
-                cell.number_format = money_format
-                cell.alignment = openpyxl.styles.Alignment(horizontal="right")
-
-        header_row = ws.max_row + 1
-        ws.append(["Beleg-Nr.", "Datum", "Transaktion", "Einnahmen", "Ausgaben"])
-        for col in range(1, 6):
-            cell = ws.cell(row=header_row, column=col)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = thin_border
-            if col in [4, 5]:
-                cell.alignment = openpyxl.styles.Alignment(horizontal="right")
-            else:
-                cell.alignment = openpyxl.styles.Alignment(horizontal="center")
-
-        for idx, t in enumerate(transaktionen, 1):
-            betrag = t["Betrag"]
-            einnahme = format_currency(abs(betrag)) if betrag > 0 else ""
-            ausgabe = format_currency(abs(betrag)) if betrag < 0 else ""
-            ws.append(
-                [
-                    idx,
-                    t["Datum"].replace("-", "/"),
-                    t["Kategorie"].split(" ", 1)[1] if " " in t["Kategorie"] else t["Kategorie"],
-                    einnahme,
-                    ausgabe,
-                ]
-            )
+    startup_phase("Importe")
+    katalog = Katalog.laden()
+    workspace = Workspace(DB_DATEI, journal=JOURNAL_MODUS, katalog=katalog)
+    # Before anything opens the database, or SQLite creates an empty one.
+    migrate_db_if_needed()
 
-            current_row = ws.max_row
-            for col in range(1, 6):
-                cell = ws.cell(row=current_row, column=col)
-                cell.font = normal_font
-                cell.border = thin_border
-                if col in [4, 5]:
-                    cell.number_format = money_format
-                    cell.alignment = openpyxl.styles.Alignment(horizontal="right")
-                elif col == 1 or col == 2:
-                    cell.alignment = openpyxl.styles.Alignment(horizontal="center")
-                else:
-                    cell.alignment = openpyxl.styles.Alignment(horizontal="left")
-
-        einnahmen = sum(t["Betrag"] for t in transaktionen if t["Betrag"] > 0)
-        ausgaben = sum(-t["Betrag"] for t in transaktionen if t["Betrag"] < 0)
-        gewinn = einnahmen - ausgaben
-        endbestand = anfangsbestand + gewinn
-
-        ws.append([])
-        last_data_row = ws.max_row
-        for col in range(1, 6):
-            cell = ws.cell(row=last_data_row, column=col)
-            current_border = cell.border
-            cell.border = openpyxl.styles.Border(
-                left=current_border.left,
-                right=current_border.right,
-                top=current_border.top,
-                bottom=openpyxl.styles.Side(style="thin"),
-            )
+    # === GRUNDSETUP ===
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("blue")
 
-        ws.append([])
-
-        ws.append([
-            "",
-            "",
-            "Gesamt:",
-            format_currency(einnahmen),
-            format_currency(ausgaben),
-        ])
-        current_row = ws.max_row
-
-        gesamt_cell = ws.cell(row=current_row, column=3)
-        gesamt_cell.font = header_font
-        gesamt_cell.border = thin_border
-        gesamt_cell.fill = grey_fill
-        gesamt_cell.alignment = openpyxl.styles.Alignment(horizontal="right")
-
-        for col in [4, 5]:
-            cell = ws.cell(row=current_row, column=col)
-            cell.font = header_font
-            cell.border = thin_border
-            cell.number_format = money_format
-            cell.alignment = openpyxl.styles.Alignment(horizontal="right")
-
-        ws.append([
-            "",
-            "",
-            "",
-            "Endbestand:",
-            format_currency(endbestand),
-        ])
-        current_row = ws.max_row
-        for col in range(4, 6):
-            cell = ws.cell(row=current_row, column=col)
-            cell.font = header_font
-            cell.border = thin_border
-            if col == 4:
-                cell.fill = grey_fill
-                cell.alignment = openpyxl.styles.Alignment(horizontal="right")
-            else:
-                cell.number_format = money_format
-                cell.alignment = openpyxl.styles.Alignment(horizontal="right")
+    app = ctk.CTk()
+    app.title("EÜR Rechner")
+    app.geometry("600x400")
 
-        column_widths = {1: 12, 2: 12, 3: 40, 4: 18, 5: 18}
-        for col, width in column_widths.items():
-            ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = width
+    # Registriere die Funktion für das Schließen-Event
+    app.protocol("WM_DELETE_WINDOW", on_closing)
 
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, max_col=5):
-            for cell in row:
-                cell.font = cell.font.copy(name="Arial", size=10)
+    # Data changes and date changes reach the list views once per frame.
+    change_bus = ChangeBus(app.after)
+    datum_bus = ChangeBus(app.after)
+    buch = neues_buch(workspace.aktiv)
 
-        filename = f"Umsatz {aktuelles_datum.strftime('%y.%m')}.xlsx"
-        wb.save(filename)
+    # === GUI ELEMENTE ===
+    aktuelles_datum = heutiges_datum
 
-        record_umsatz_export(filename, einnahmen, ausgaben, gewinn, endbestand)
-        info_label.configure(text=f"📤 Export erfolgreich: {filename}")
-    except Exception as exc:
-        info_label.configure(text=f"❌ Fehler beim Export: {exc}")
+    firma_option = ctk.CTkOptionMenu(app, values=[NEUE_FIRMA], width=250,
+                                     command=on_firma_selected)
+    firma_option.pack(pady=(10, 0))
 
-    name = simpledialog.askstring(
-        "Umsatz speichern",
-        "Name für den Umsatz (Dateiname)",
-        parent=app,
-    )
+    datum_frame = ctk.CTkFrame(app)
+    datum_frame.pack(pady=10)
 
-# === GUI ELEMENTE ===
-aktuelles_datum = heutiges_datum
+    minus_button = ctk.CTkButton(datum_frame, text="◀", width=40, command=datum_minus)
+    minus_button.pack(side="left", padx=5)
 
-datum_frame = ctk.CTkFrame(app)
-datum_frame.pack(pady=10)
+    datum_label = ctk.CTkLabel(datum_frame, text="")
+    datum_label.pack(side="left", padx=10)
 
-minus_button = ctk.CTkButton(datum_frame, text="◀", width=40, command=datum_minus)
-minus_button.pack(side="left", padx=5)
+    plus_button = ctk.CTkButton(datum_frame, text="▶", width=40, command=datum_plus)
+    plus_button.pack(side="left", padx=5)
 
-datum_label = ctk.CTkLabel(datum_frame, text="")
-datum_label.pack(side="left", padx=10)
-datum_anzeigen()
+    kassenbestand_label = ctk.CTkLabel(app, text="")
+    kassenbestand_label.pack()
 
-plus_button = ctk.CTkButton(datum_frame, text="▶", width=40, command=datum_plus)
-plus_button.pack(side="left", padx=5)
+    export_label = ctk.CTkLabel(app, text="")
+    export_label.pack()
 
-kategorien = [
-    "💰  Tagesumsatz Kasse",
-    "⛽  Tankbeleg",
-    "🧹  Rechnung Teppichreinigung",
-    "💶  Bargeldeinzahlung",
-    "👤  Bargeldeinzahlung - Privat",
-    "📊  Buchhaltungsservice",
-    "🛍️  Wareneinkauf",
-]
-kategorie_option = ctk.CTkOptionMenu(app, values=kategorien, width=250)
-kategorie_option.pack(pady=10)
+    undo_frame = ctk.CTkFrame(app)
+    undo_frame.pack(pady=(5, 0))
 
-betrag_row = ctk.CTkFrame(app)
-betrag_row.pack(pady=10)
+    undo_button = ctk.CTkButton(
+        undo_frame,
+        text="↩️ Rückgängig",
+        width=120,
+        state="disabled",
+        command=lambda: undo_redo(True),
+    )
+    undo_button.pack(side="left", padx=5)
+
+    redo_button = ctk.CTkButton(
+        undo_frame,
+        text="↪️ Wiederholen",
+        width=120,
+        state="disabled",
+        command=lambda: undo_redo(False),
+    )
+    redo_button.pack(side="left", padx=5)
 
-betrag_entry = ctk.CTkEntry(betrag_row, placeholder_text="Betrag (€)")
-betrag_entry.pack(side="left", padx=(0, 8))
+    app.bind("<Control-z>", lambda _e: undo_redo(True))
+    app.bind("<Control-y>", lambda _e: undo_redo(False))
+    app.bind("<Control-Z>", lambda _e: undo_redo(False))
+    # Kassenbestand follows in starten(), once the data is there.
+    datum_label.configure(text=aktuelles_datum.strftime("%d.%m.%Y"))
 
+    # Typing narrows the list (euer_kategorien); Tab or Enter takes the
+    # best match. Unknown names become new catalog entries on booking.
+    kategorie_option = ctk.CTkComboBox(
+        app, values=katalog.vorschlaege("", KATEGORIE_VORSCHLAEGE), width=250
+    )
+    kategorie_option.set(katalog.namen[0] if len(katalog) else "")
+    kategorie_option.pack(pady=10)
+    kategorie_option.bind("<KeyRelease>", kategorie_vorschlagen)
+    kategorie_option.bind("<Tab>", kategorie_vervollstaendigen)
+    kategorie_option.bind("<Return>", kategorie_vervollstaendigen)
 
-def on_enter_pressed(event):
-    transaktion_hinzufügen()
+    betrag_row = ctk.CTkFrame(app)
+    betrag_row.pack(pady=10)
 
+    betrag_entry = ctk.CTkEntry(betrag_row, placeholder_text="Betrag (€)")
+    betrag_entry.pack(side="left", padx=(0, 8))
 
-betrag_entry.bind("<Return>", on_enter_pressed)
 
-add_arrow_button = ctk.CTkButton(
-    betrag_row,
-    text="➤",
-    width=40,
-    command=transaktion_hinzufügen,
-)
-add_arrow_button.pack(side="left")
+    def on_enter_pressed(event):
+        transaktion_hinzufügen()
 
-export_button = ctk.CTkButton(
-    app,
-    text="📤 In Excel exportieren",
-    fg_color="green",
-    command=exportieren,
-)
-export_button.pack(pady=10)
 
-new_umsatz_button = ctk.CTkButton(
-    app,
-    text="🆕 Neuen Umsatz anlegen",
-    fg_color="#2980b9",
-    command=create_new_umsatz,
-)
-new_umsatz_button.pack(pady=5)
+    betrag_entry.bind("<Return>", on_enter_pressed)
 
-show_transactions_button = ctk.CTkButton(
-    app,
-    text="📋 Transaktionen anzeigen",
-    command=open_transaction_window,
-)
-show_transactions_button.pack(pady=5)
+    add_arrow_button = ctk.CTkButton(
+        betrag_row,
+        text="➤",
+        width=40,
+        command=transaktion_hinzufügen,
+    )
+    add_arrow_button.pack(side="left")
 
-info_label = ctk.CTkLabel(app, text="")
-info_label.pack(pady=10)
+    export_button = ctk.CTkButton(
+        app,
+        text="📤 In Excel exportieren",
+        fg_color="green",
+        command=exportieren,
+    )
+    export_button.pack(pady=10)
 
-transactions_frame = ctk.CTkFrame(app)
-transactions_frame.pack(pady=(5, 10), fill="both", expand=False)
+    year_export_button = ctk.CTkButton(
+        app,
+        text="📆 Jahresexport",
+        fg_color="green",
+        command=exportieren_jahr,
+    )
+    year_export_button.pack(pady=(0, 10))
+
+    # Only shown while an export is running
+    export_status_frame = ctk.CTkFrame(app)
+    export_progress = ctk.CTkProgressBar(export_status_frame, width=200)
+    export_progress.pack(side="left", padx=(10, 8), pady=5)
+    cancel_export_button = ctk.CTkButton(
+        export_status_frame,
+        text="Abbrechen",
+        width=90,
+        command=cancel_export,
+    )
+    cancel_export_button.pack(side="left", padx=(0, 10), pady=5)
+    app.bind("<<ExportStatus>>", handle_export_status)
+
+    new_umsatz_button = ctk.CTkButton(
+        app,
+        text="🆕 Neuen Umsatz anlegen",
+        fg_color="#2980b9",
+        command=create_new_umsatz,
+    )
+    new_umsatz_button.pack(pady=5)
 
-listbox_container = tk.Frame(transactions_frame)
-listbox_container.pack(side="left", fill="both", expand=True, padx=(10, 0))
+    show_transactions_button = ctk.CTkButton(
+        app,
+        text="📋 Transaktionen anzeigen",
+        command=open_transaction_window,
+    )
+    show_transactions_button.pack(pady=5)
 
-transaction_listbox = tk.Listbox(listbox_container, height=8, width=60)
-transaction_listbox.pack(side="left", fill="both", expand=True)
+    import_button = ctk.CTkButton(
+        app,
+        text="📥 Kassen-/Bankexport importieren",
+        command=importieren,
+    )
+    import_button.pack(pady=5)
 
-scrollbar = tk.Scrollbar(listbox_container, orient="vertical", command=transaction_listbox.yview)
-scrollbar.pack(side="right", fill="y")
-transaction_listbox.config(yscrollcommand=scrollbar.set)
+    reimport_button = ctk.CTkButton(
+        app,
+        text="📂 Umsatz-Dateien einlesen",
+        command=umsatz_dateien_einlesen,
+    )
+    reimport_button.pack(pady=5)
 
-delete_button = ctk.CTkButton(
-    transactions_frame,
-    text="Transaktion löschen",
-    fg_color="#e74c3c",
-    command=delete_selected_transaction,
-)
-delete_button.pack(side="left", padx=10)
-
-# Load existing DB and ask for firma and Anfangsbestand if needed before starting
-load_settings()
-load_umsatz_history()
-load_db()
-refresh_transaction_list()
-ask_firma_if_needed()
-ask_anfangsbestand_if_needed()
-
-if anfangsbestand >= 1000:
-    bestand_str = (
-        f"{anfangsbestand:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    )
-else:
-    bestand_str = f"{anfangsbestand:.2f}".replace(".", ",")
-firmeninfo = f" | Firma: {firmenname}" if firmenname else ""
-info_label.configure(
-    text=f"Anfangsbestand: {bestand_str} € | geladene Transaktionen: {len(transaktionen)}{firmeninfo}"
-)
+    info_label = ctk.CTkLabel(app, text="")
+    info_label.pack(pady=10)
+
+    # Timing overlay, only packed while measuring (--messen or F12)
+    messung_label = ctk.CTkLabel(
+        app, text="", justify="left", font=("Courier", 11), anchor="w"
+    )
+    app.bind("<F12>", lambda _e: messung_umschalten())
+    app.bind("<F11>", lambda _e: profil_anfordern())
+
+    transactions_frame = ctk.CTkFrame(app)
+    transactions_frame.pack(pady=(5, 10), fill="both", expand=False)
+
+    transaction_list = VirtualListView(
+        transactions_frame,
+        transaction_count,
+        format_transaction_row,
+        height=8,
+        width=60,
+    )
+    transaction_list.pack(side="left", fill="both", expand=True, padx=(10, 0))
+    change_bus.subscribe(on_transactions_changed)
 
-app.mainloop()
+    delete_button = ctk.CTkButton(
+        transactions_frame,
+        text="Transaktion löschen",
+        fg_color="#e74c3c",
+        command=delete_selected_transaction,
+    )
+    delete_button.pack(side="left", padx=10)
+
+    # Only the small settings file is read before the window is drawn, so
+    # that it opens in the stored size. The data follows from the event loop.
+    load_settings()
+    if MESSEN:
+        messung_umschalten()
+    set_editing_enabled(False)
+    startup_phase("Oberfläche aufgebaut")
+    app.update_idletasks()
+    app.after(0, starten)
+    app.mainloop()
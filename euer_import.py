@@ -0,0 +1,371 @@
+"""Sammelimport von Kassen- und Bankexporten (CSV oder XLSX).
+
+Ablauf: :func:`read_table` liest Kopfzeile und Zeilen der Quelle,
+:func:`guess_spalten` schlägt die Zuordnung von Datum, Betrag und Text vor,
+:func:`prepare_import` wandelt alle Zeilen spaltenweise um und verwirft
+Buchungen, die es schon gibt. Das Ergebnis ist ein eigener
+:class:`~euer_store.TransactionStore`, den der Aufrufer in einem Rutsch an
+den Bestand anhängt und mit ``storage.add_many`` speichert.
+
+Beträge dürfen deutsch (``1.234,56``, ``12,50 €``, ``12,50-``) oder mit
+Dezimalpunkt geschrieben sein und werden exakt in Cent umgerechnet.
+
+openpyxl wird erst beim Lesen einer XLSX-Datei importiert, damit
+Kommandozeile und Fensterstart es nicht mitladen.
+"""
+
+import csv
+from collections import Counter, namedtuple
+from datetime import date, datetime
+
+from euer_kategorien import ist_einnahme
+from euer_store import TransactionStore
+
+Spalten = namedtuple("Spalten", "datum betrag text")
+ImportErgebnis = namedtuple("ImportErgebnis", "neue doppelt fehlerhaft")
+
+DATUM_SPALTEN = ("datum", "buchungstag", "buchungsdatum", "valuta", "date")
+BETRAG_SPALTEN = ("betrag", "umsatz", "summe", "amount")
+TEXT_SPALTEN = ("kategorie", "buchungstext", "verwendungszweck", "text",
+                "beschreibung")
+
+_OHNE_ZEICHEN = str.maketrans("", "", " \xa0€'+")
+
+
+class _Semikolon(csv.excel):
+    delimiter = ";"
+
+
+# --- Quellen ---------------------------------------------------------------
+def _read_csv(path):
+    # latin-1 never fails, so it ends the list of guesses.
+    for encoding in ("utf-8-sig", "cp1252", "latin-1"):
+        try:
+            with open(path, newline="", encoding=encoding) as f:
+                text = f.read()
+            break
+        except UnicodeDecodeError:
+            continue
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=";,\t")
+    except csv.Error:
+        dialect = _Semikolon
+    return [row for row in csv.reader(text.splitlines(), dialect) if any(row)]
+
+
+def _read_xlsx(path):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return [
+            list(row)
+            for row in wb.worksheets[0].iter_rows(values_only=True)
+            if any(cell not in (None, "") for cell in row)
+        ]
+    finally:
+        wb.close()
+
+
+def read_table(path):
+    """Return ``(kopf, zeilen)`` of a CSV or XLSX export."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        rows = _read_xlsx(path)
+    else:
+        rows = _read_csv(path)
+    if not rows:
+        return [], []
+    kopf = ["" if cell is None else str(cell).strip() for cell in rows[0]]
+    return kopf, rows[1:]
+
+
+def guess_spalten(kopf):
+    """Guess the date, amount and text columns from the header names."""
+
+    def find(namen):
+        for i, name in enumerate(kopf):
+            if any(n in name.lower() for n in namen):
+                return i
+        return None
+
+    return Spalten(find(DATUM_SPALTEN), find(BETRAG_SPALTEN), find(TEXT_SPALTEN))
+
+
+# --- Spaltenweise Umwandlung -----------------------------------------------
+def parse_betrag_cents(text):
+    """Parse a German or English amount exactly into cents."""
+    t = text.translate(_OHNE_ZEICHEN)
+    negativ = t.startswith("-") or t.endswith("-")
+    t = t.strip("-")
+    if "," in t:
+        ganz, _, rest = t.rpartition(",")
+        ganz = ganz.replace(".", "")
+    elif t.count(".") == 1 and len(t.rpartition(".")[2]) != 3:
+        ganz, _, rest = t.partition(".")
+    else:
+        # No decimal separator, or dots as thousands separators only.
+        ganz, rest = t.replace(".", ""), ""
+    if not (ganz or rest) or not (ganz + rest).isdigit():
+        raise ValueError(f"Ungültiger Betrag: {text!r}")
+    cents = int(ganz or "0") * 100 + int((rest + "00")[:2])
+    if len(rest) > 2 and rest[2] >= "5":
+        cents += 1
+    return -cents if negativ else cents
+
+
+def parse_betraege(werte):
+    """Parse a whole column of amounts; ``None`` for unparsable cells.
+
+    Cash-register exports repeat the same amounts over and over, so every
+    distinct text is parsed once.
+    """
+    cache = {}
+    result = []
+    for wert in werte:
+        if isinstance(wert, (int, float)):
+            result.append(round(wert * 100))
+            continue
+        cents = cache.get(wert, False)
+        if cents is False:
+            try:
+                cents = parse_betrag_cents(str(wert))
+            except ValueError:
+                cents = None
+            cache[wert] = cents
+        result.append(cents)
+    return result
+
+
+def _parse_datum(text):
+    text = text.strip()
+    if "." in text:
+        tag, monat, jahr = text.split(".")[:3]
+        jahr = int(jahr[:4])
+        if jahr < 100:
+            jahr += 2000
+        return date(jahr, int(monat), int(tag)).toordinal()
+    return date.fromisoformat(text[:10]).toordinal()
+
+
+def parse_daten(werte):
+    """Parse a column of dates (``01.11.2025``, ISO or cell dates) to ordinals."""
+    cache = {}
+    result = []
+    for wert in werte:
+        if isinstance(wert, (date, datetime)):
+            result.append(wert.toordinal())
+            continue
+        ordinal = cache.get(wert, False)
+        if ordinal is False:
+            try:
+                ordinal = _parse_datum(str(wert))
+            except (ValueError, TypeError):
+                ordinal = None
+            cache[wert] = ordinal
+        result.append(ordinal)
+    return result
+
+
+def _stichwort(kategorie):
+    """``"⛽  Tankbeleg"`` -> ``"tankbeleg"``."""
+    return "".join(
+        ch for ch in kategorie if ch.isalnum() or ch in " -"
+    ).strip().lower()
+
+
+def kategorie_zuordnung(kategorien, standard):
+    """Return ``zuordnen(text)`` mapping texts onto ``kategorien`` by name.
+
+    Texts without a matching category map to ``standard``. Results are
+    cached per distinct text.
+    """
+    stichworte = [(_stichwort(k), k) for k in kategorien]
+    # Longest name first, so "Bargeldeinzahlung - Privat" wins over
+    # "Bargeldeinzahlung".
+    stichworte.sort(key=lambda item: len(item[0]), reverse=True)
+    cache = {}
+
+    def zuordnen(text):
+        kategorie = cache.get(text)
+        if kategorie is None:
+            suche = _stichwort(str(text or ""))
+            kategorie = next(
+                (k for wort, k in stichworte if wort and wort in suche), standard
+            )
+            cache[text] = kategorie
+        return kategorie
+
+    return zuordnen
+
+
+def map_kategorien(texte, kategorien, standard):
+    """Map source texts onto ``kategorien`` by their names; else ``standard``."""
+    return list(map(kategorie_zuordnung(kategorien, standard), texte))
+
+
+# --- Import ----------------------------------------------------------------
+def _spalte(zeilen, index):
+    return [row[index] if index < len(row) else None for row in zeilen]
+
+
+def prepare_import(zeilen, spalten, kategorien, standard_kategorie,
+                   transaktionen, vorzeichen_nach_kategorie=True,
+                   einnahme=ist_einnahme):
+    """Turn source rows into new bookings, skipping ones that already exist.
+
+    Duplicates are found by hashing ``(datum, kategorie, cents)`` against
+    the existing bookings in the imported date range (via the store's date
+    index); a booking that occurs n times in the source and m times in the
+    store is imported ``n - m`` times. With ``vorzeichen_nach_kategorie``
+    the sign follows ``einnahme(kategorie)`` (the catalog's rule in the
+    booking form, :func:`ist_einnahme` by default), otherwise the source
+    sign is kept.
+
+    Returns ``(neue, ImportErgebnis)`` with ``neue`` as a
+    :class:`~euer_store.TransactionStore`.
+    """
+    daten = parse_daten(_spalte(zeilen, spalten.datum))
+    betraege = parse_betraege(_spalte(zeilen, spalten.betrag))
+    if spalten.text is None:
+        zugeordnet = [standard_kategorie] * len(zeilen)
+    else:
+        zugeordnet = map_kategorien(
+            _spalte(zeilen, spalten.text), kategorien, standard_kategorie
+        )
+
+    gueltig = [
+        (ordinal, kategorie, cents)
+        for ordinal, kategorie, cents in zip(daten, zugeordnet, betraege)
+        if ordinal is not None and cents is not None
+    ]
+    fehlerhaft = len(zeilen) - len(gueltig)
+    if vorzeichen_nach_kategorie:
+        gueltig = [
+            (o, k, abs(c) if einnahme(k) else -abs(c)) for o, k, c in gueltig
+        ]
+
+    neue, doppelt = ohne_duplikate(gueltig, transaktionen)
+    return neue, ImportErgebnis(len(neue), doppelt, fehlerhaft)
+
+
+def ohne_duplikate(buchungen, transaktionen):
+    """Return ``(neue, doppelt)`` for ``(ordinal, kategorie, cents)`` tuples.
+
+    See :func:`prepare_import` for how duplicates are counted. Categories
+    are compared by name only, so ``"💰 Tagesumsatz Kasse"`` from older
+    files equals ``"💰  Tagesumsatz Kasse"``.
+    """
+    buchungen = list(buchungen)
+    stichworte = {}
+
+    def stichwort(kategorie):
+        wort = stichworte.get(kategorie)
+        if wort is None:
+            wort = stichworte[kategorie] = _stichwort(kategorie)
+        return wort
+
+    vorhanden = Counter()
+    if buchungen:
+        von = min(o for o, _, _ in buchungen)
+        bis = max(o for o, _, _ in buchungen)
+        kategorie_namen = transaktionen.kategorien
+        for row_id in transaktionen.query_ids(von, bis):
+            idx = transaktionen.position(row_id)
+            vorhanden[(
+                transaktionen.datum_ordinals[idx],
+                stichwort(kategorie_namen[transaktionen.kategorie_codes[idx]]),
+                transaktionen.cents[idx],
+            )] += 1
+
+    neue = TransactionStore()
+    doppelt = 0
+    for ordinal, kategorie, cents in buchungen:
+        key = (ordinal, stichwort(kategorie), cents)
+        if vorhanden[key] > 0:
+            vorhanden[key] -= 1
+            doppelt += 1
+            continue
+        neue.append_values(ordinal, kategorie, cents)
+    return neue, doppelt
+
+
+# --- EÜR-Arbeitsmappen -----------------------------------------------------
+EuerArbeitsmappe = namedtuple(
+    "EuerArbeitsmappe",
+    "firmenname anfangsbestand_cents transaktionen einnahmen_cents "
+    "ausgaben_cents endbestand_cents",
+)
+
+
+def _zelle_cents(wert):
+    """Cents of a workbook cell: exported text or a number typed in Excel."""
+    if isinstance(wert, (int, float)) and not isinstance(wert, bool):
+        return round(wert * 100)
+    if not isinstance(wert, str):
+        raise ValueError(f"Ungültiger Betrag: {wert!r}")
+    return parse_betrag_cents(wert)
+
+
+def _zelle_datum(wert):
+    """Ordinal of a workbook date cell, as text or as a date value."""
+    if isinstance(wert, (date, datetime)):
+        return wert.toordinal()
+    return _parse_datum(str(wert).replace("/", "-"))
+
+
+def read_euer_workbook(path, kategorien=()):
+    """Stream an exported ``Umsatz YY.MM.xlsx`` back into a store.
+
+    The workbook is opened read-only and walked row by row, so archived
+    exports of any size are never loaded as a whole. The text-formatted
+    currency cells (``"2.291,78 €"``) are parsed back into cents and the
+    transaction texts mapped onto ``kategorien`` (unknown texts are kept as
+    they are); cells edited in Excel may hold numbers and dates instead.
+    The ``Gesamt``/``Endbestand`` values are returned as written
+    in the workbook, so callers can check them against the bookings.
+    Raises ``ValueError`` for workbooks that are not EÜR exports.
+    """
+    zuordnen = kategorie_zuordnung(kategorien, None)
+    transaktionen = TransactionStore()
+    firmenname = ""
+    anfangsbestand = einnahmen = ausgaben = endbestand = None
+    in_buchungen = False
+
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in wb.worksheets[0].iter_rows(max_col=5, values_only=True):
+            row = (tuple(row) + (None,) * 5)[:5]
+            nr, datum, text, einnahme, ausgabe = row
+            if in_buchungen:
+                if nr is None:
+                    in_buchungen = False
+                    continue
+                cents = (
+                    _zelle_cents(einnahme) if einnahme
+                    else -_zelle_cents(ausgabe) if ausgabe
+                    else 0
+                )
+                text = str(text or "").strip()
+                kategorie = zuordnen(text) or text
+                transaktionen.append_values(_zelle_datum(datum), kategorie, cents)
+            elif nr == "Beleg-Nr.":
+                in_buchungen = True
+            elif text == "Anfangsbestand:" or einnahme == "Anfangsbestand:":
+                anfangsbestand = _zelle_cents(row[4])
+            elif text == "Gesamt:":
+                einnahmen = _zelle_cents(einnahme)
+                ausgaben = _zelle_cents(ausgabe)
+            elif einnahme == "Endbestand:":
+                endbestand = _zelle_cents(row[4])
+            elif not firmenname and isinstance(nr, str) and anfangsbestand is None:
+                firmenname = nr.strip()
+    finally:
+        wb.close()
+
+    if anfangsbestand is None:
+        raise ValueError(f"{path}: keine EÜR-Arbeitsmappe")
+    return EuerArbeitsmappe(
+        firmenname, anfangsbestand, transaktionen, einnahmen, ausgaben, endbestand
+    )
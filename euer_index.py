@@ -0,0 +1,89 @@
+"""Sortierte Datums- und Kategorie-Indizes über einem TransactionStore.
+
+Jede Buchung bekommt beim Anlegen eine fortlaufende interne Zeilen-ID. Die
+Indizes sind sortierte Listen von Schlüsseln ``ordinal << 32 | id``: eine
+für alle Buchungen und eine pro Kategorie-Code. Ein Datumsbereich ist damit
+ein Paar ``bisect``-Aufrufe (O(log n)), gleiche Tage bleiben in
+Buchungsreihenfolge.
+"""
+
+from bisect import bisect_left, insort
+from datetime import date
+
+ID_BITS = 32
+ID_MASKE = (1 << ID_BITS) - 1
+
+ZEITRAEUME = ("Alle", "Tag", "Monat", "Quartal", "Jahr")
+
+
+def zeitraum(tag, art):
+    """Return the inclusive ``(von, bis)`` ordinals of the period around ``tag``.
+
+    ``art`` is one of :data:`ZEITRAEUME`; ``"Alle"`` yields ``(None, None)``.
+    """
+    if art == "Alle":
+        return None, None
+    if art == "Tag":
+        return tag.toordinal(), tag.toordinal()
+    if art == "Monat":
+        start_monat, monate = tag.month, 1
+    elif art == "Quartal":
+        start_monat, monate = 3 * ((tag.month - 1) // 3) + 1, 3
+    elif art == "Jahr":
+        start_monat, monate = 1, 12
+    else:
+        raise ValueError(f"Unbekannter Zeitraum: {art}")
+    von = date(tag.year, start_monat, 1)
+    folge_monat = start_monat + monate
+    if folge_monat > 12:
+        bis = date(tag.year + 1, folge_monat - 12, 1)
+    else:
+        bis = date(tag.year, folge_monat, 1)
+    return von.toordinal(), bis.toordinal() - 1
+
+
+class DateCategoryIndex:
+    """Date index over all bookings plus one per category code."""
+
+    def __init__(self):
+        self._alle = []
+        self._nach_kategorie = {}
+
+    @classmethod
+    def build(cls, datum_ordinals, kategorie_codes, row_ids):
+        """Build both indexes for whole columns with one sort each."""
+        index = cls()
+        nach_kategorie = {}
+        for ordinal, code, row_id in zip(datum_ordinals, kategorie_codes, row_ids):
+            key = ordinal << ID_BITS | row_id
+            index._alle.append(key)
+            keys = nach_kategorie.get(code)
+            if keys is None:
+                keys = nach_kategorie[code] = []
+            keys.append(key)
+        index._alle.sort()
+        for keys in nach_kategorie.values():
+            keys.sort()
+        index._nach_kategorie = nach_kategorie
+        return index
+
+    def add(self, ordinal, code, row_id):
+        key = ordinal << ID_BITS | row_id
+        insort(self._alle, key)
+        insort(self._nach_kategorie.setdefault(code, []), key)
+
+    def remove(self, ordinal, code, row_id):
+        key = ordinal << ID_BITS | row_id
+        for keys in (self._alle, self._nach_kategorie[code]):
+            del keys[bisect_left(keys, key)]
+
+    def _bounds(self, von, bis, code):
+        keys = self._alle if code is None else self._nach_kategorie.get(code, ())
+        lo = 0 if von is None else bisect_left(keys, von << ID_BITS)
+        hi = len(keys) if bis is None else bisect_left(keys, (bis + 1) << ID_BITS)
+        return keys, lo, hi
+
+    def row_ids(self, von=None, bis=None, code=None):
+        """Row ids booked between the ordinals ``von`` and ``bis`` (inclusive)."""
+        keys, lo, hi = self._bounds(von, bis, code)
+        return [key & ID_MASKE for key in keys[lo:hi]]
@@ -0,0 +1,292 @@
+"""Kategorienkatalog mit Vorzeichenregeln und Suchindex.
+
+Der Katalog liegt als ``kategorien.json`` neben den Einstellungen::
+
+    [{"id": 0, "name": "💰  Tagesumsatz Kasse", "einnahme": true}, ...]
+
+Jede Kategorie hat eine feste ID, die nie neu vergeben wird, und die
+ausdrückliche Regel, ob Beträge als Einnahme (positiv) oder Ausgabe
+(negativ) gebucht werden. Namen, die der Katalog nicht kennt, folgen der
+alten Regel :func:`ist_einnahme`. Namen, die sich nur in Emoji, Leerzeichen
+oder Groß-/Kleinschreibung unterscheiden, sind dieselbe Kategorie.
+
+Für die Eingabezeile hält :class:`Katalog` zwei Indizes über den
+Suchschlüssel (Name ohne Emoji, klein geschrieben): eine sortierte Liste
+aller Wörter für die Präfixsuche per ``bisect`` und Trigramme für
+Tippfehler. :meth:`Katalog.vorschlaege` kostet damit auch bei Hunderten
+Kategorien nur Bruchteile einer Millisekunde.
+
+Die Speicher legen zu jeder Buchung die Katalog-ID ab, so dass eine im
+Katalog umbenannte Kategorie beim nächsten Laden unter dem neuen Namen
+erscheint (:meth:`Katalog.aufloesen`). Weil auch der Lade-Thread dabei
+Kategorien aufnimmt, laufen alle Zugriffe unter einer Sperre.
+"""
+
+import functools
+import json
+import threading
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
+
+from euer_storage import atomic_write_text
+
+KATALOG_DATEI = "kategorien.json"
+
+STANDARD_KATEGORIEN = [
+    ("💰  Tagesumsatz Kasse", True),
+    ("⛽  Tankbeleg", False),
+    ("🧹  Rechnung Teppichreinigung", False),
+    ("💶  Bargeldeinzahlung", False),
+    ("👤  Bargeldeinzahlung - Privat", False),
+    ("📊  Buchhaltungsservice", False),
+    ("🛍️  Wareneinkauf", False),
+]
+
+# Share of the query's trigrams a fuzzy match needs
+TRIGRAMM_ANTEIL = 0.5
+
+Kategorie = namedtuple("Kategorie", "id name einnahme")
+
+
+def suchschluessel(name):
+    """``"⛽  Tankbeleg"`` -> ``"tankbeleg"``."""
+    return " ".join(
+        "".join(ch for ch in name if ch.isalnum() or ch in " -").casefold().split()
+    )
+
+
+def ist_einnahme(kategorie):
+    """Fallback sign rule for categories outside the catalog.
+
+    Only the daily takings are income.
+    """
+    return "Tagesumsatz Kasse" in kategorie
+
+
+def _gesperrt(methode):
+    @functools.wraps(methode)
+    def mit_sperre(self, *args, **kwargs):
+        with self._lock:
+            return methode(self, *args, **kwargs)
+
+    return mit_sperre
+
+
+def _trigramme(schluessel):
+    text = f"  {schluessel} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Katalog:
+    """Categories by id and name, with sign rules and autocomplete index."""
+
+    def __init__(self, eintraege=(), path=None):
+        self.path = path
+        # GUI and loader thread share the catalog; reentrant for setzen()
+        self._lock = threading.RLock()
+        self._eintraege = []
+        self._ids = {}
+        self._schluessel = {}
+        # search key per id, parallel to _eintraege
+        self._schluessel_je_id = []
+        # sorted (wort, id) of every word of every search key
+        self._woerter = []
+        self._trigramme = {}
+        self.geaendert = False
+        for kategorie in eintraege:
+            self._aufnehmen(kategorie)
+
+    @classmethod
+    def standard(cls, path=None):
+        return cls(
+            (Kategorie(i, name, einnahme)
+             for i, (name, einnahme) in enumerate(STANDARD_KATEGORIEN)),
+            path,
+        )
+
+    @classmethod
+    def laden(cls, path=KATALOG_DATEI):
+        """Load the catalog; the built-in categories if the file is missing."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                daten = json.load(f)
+            return cls(
+                (Kategorie(int(d["id"]), d["name"], bool(d["einnahme"])) for d in daten),
+                path,
+            )
+        except (FileNotFoundError, ValueError, KeyError, TypeError, UnicodeDecodeError):
+            # Like the settings, a damaged catalog must not block the start.
+            return cls.standard(path)
+
+    @_gesperrt
+    def speichern(self, path=None):
+        zeilen = [
+            json.dumps(k._asdict(), ensure_ascii=False)
+            for k in self._eintraege if k is not None
+        ]
+        atomic_write_text(
+            path or self.path or KATALOG_DATEI, "[\n" + ",\n".join(zeilen) + "\n]\n"
+        )
+        self.geaendert = False
+
+    def _aufnehmen(self, kategorie):
+        while len(self._eintraege) <= kategorie.id:
+            self._eintraege.append(None)
+            self._schluessel_je_id.append("")
+        schluessel = suchschluessel(kategorie.name)
+        self._eintraege[kategorie.id] = kategorie
+        self._schluessel_je_id[kategorie.id] = schluessel
+        self._ids[kategorie.name] = kategorie.id
+        self._schluessel.setdefault(schluessel, kategorie.id)
+        for wort in set(schluessel.split()):
+            insort(self._woerter, (wort, kategorie.id))
+        for trigramm in _trigramme(schluessel):
+            self._trigramme.setdefault(trigramm, []).append(kategorie.id)
+
+    # --- Zugriff -------------------------------------------------------
+    @_gesperrt
+    def __len__(self):
+        return len(self._ids)
+
+    @_gesperrt
+    def __contains__(self, name):
+        return name in self._ids
+
+    @_gesperrt
+    def __getitem__(self, kategorie_id):
+        kategorie = self._eintraege[kategorie_id]
+        if kategorie is None:
+            raise KeyError(kategorie_id)
+        return kategorie
+
+    @property
+    @_gesperrt
+    def namen(self):
+        """All names in id order."""
+        return [k.name for k in self._eintraege if k is not None]
+
+    def _id(self, name):
+        """Id of ``name``, matched exactly or by its search key."""
+        kategorie_id = self._ids.get(name)
+        if kategorie_id is None:
+            schluessel = suchschluessel(name)
+            if schluessel:
+                kategorie_id = self._schluessel.get(schluessel)
+        return kategorie_id
+
+    @_gesperrt
+    def kategorie_id(self, name):
+        """Interned id of ``name``; unknown names are added to the catalog.
+
+        ``"Tankbeleg"`` resolves to the id of ``"⛽  Tankbeleg"``. A new
+        category takes its sign from :func:`ist_einnahme`.
+        """
+        kategorie_id = self._id(name)
+        if kategorie_id is None:
+            kategorie_id = self.setzen(name, ist_einnahme(name)).id
+        return kategorie_id
+
+    @_gesperrt
+    def setzen(self, name, einnahme):
+        """Add ``name`` or change its sign rule; returns the Kategorie."""
+        kategorie_id = self._id(name)
+        if kategorie_id is not None:
+            kategorie = self._eintraege[kategorie_id]
+            if kategorie.einnahme != einnahme:
+                self._eintraege[kategorie_id] = kategorie._replace(einnahme=einnahme)
+                self.geaendert = True
+            return self._eintraege[kategorie_id]
+        kategorie = Kategorie(len(self._eintraege), name, einnahme)
+        self._aufnehmen(kategorie)
+        self.geaendert = True
+        return kategorie
+
+    @_gesperrt
+    def aufnehmen(self, namen):
+        """Intern the new names of ``namen``, e.g. the categories of a book."""
+        for name in namen:
+            if name not in self._ids:
+                self.kategorie_id(name)
+
+    @_gesperrt
+    def aufloesen(self, kategorie_id, name):
+        """Catalog entry for a stored ``(kategorie_id, name)`` pair.
+
+        The id wins, so a category renamed in the catalog keeps its
+        bookings. Without a known id the name decides; a new name is added.
+        """
+        if kategorie_id is not None and 0 <= kategorie_id < len(self._eintraege):
+            kategorie = self._eintraege[kategorie_id]
+            if kategorie is not None:
+                return kategorie
+        return self._eintraege[self.kategorie_id(name)]
+
+    @_gesperrt
+    def ist_einnahme(self, name):
+        kategorie_id = self._id(name)
+        if kategorie_id is None:
+            return ist_einnahme(name)
+        return self._eintraege[kategorie_id].einnahme
+
+    def vorzeichen_cents(self, name, cents):
+        """Apply the category's sign rule to an amount in cents."""
+        return abs(cents) if self.ist_einnahme(name) else -abs(cents)
+
+    @_gesperrt
+    def finden(self, text):
+        """The category named ``text``, with or without emoji, else ``None``."""
+        kategorie_id = self._id(text)
+        return None if kategorie_id is None else self._eintraege[kategorie_id].name
+
+    # --- Autovervollständigung ------------------------------------------
+    @_gesperrt
+    def vorschlaege(self, text, anzahl=10):
+        """Names matching ``text``, best first.
+
+        Names starting with ``text`` come first, then names with a word
+        starting with it, then names sharing enough trigrams (typos).
+        """
+        schluessel = suchschluessel(text)
+        if not schluessel:
+            return self.namen[:anzahl]
+        treffer = {}
+
+        def dazu(kategorie_id):
+            treffer.setdefault(kategorie_id, None)
+            return len(treffer) >= anzahl
+
+        volle = self._schluessel.get(schluessel)
+        if volle is not None and dazu(volle):
+            return self._namen(treffer)
+        woerter = schluessel.split()
+        letztes = woerter[-1]
+        # Every word of the query must match a word of the name; the last
+        # one may be incomplete.
+        kandidaten = set()
+        i = bisect_left(self._woerter, (letztes, -1))
+        while i < len(self._woerter) and self._woerter[i][0].startswith(letztes):
+            kandidaten.add(self._woerter[i][1])
+            i += 1
+        kandidaten = sorted(kandidaten)
+        for kategorie_id in kandidaten:
+            if self._schluessel_je_id[kategorie_id].startswith(schluessel) and dazu(kategorie_id):
+                return self._namen(treffer)
+        for kategorie_id in kandidaten:
+            name_woerter = self._schluessel_je_id[kategorie_id].split()
+            if all(w in name_woerter for w in woerter[:-1]) and dazu(kategorie_id):
+                return self._namen(treffer)
+        if len(schluessel) >= 3:
+            abfrage = _trigramme(schluessel)
+            zaehler = Counter()
+            for trigramm in abfrage:
+                zaehler.update(self._trigramme.get(trigramm, ()))
+            mindestens = TRIGRAMM_ANTEIL * len(abfrage)
+            for kategorie_id, gemeinsam in zaehler.most_common():
+                if gemeinsam < mindestens:
+                    break
+                if dazu(kategorie_id):
+                    break
+        return self._namen(treffer)
+
+    def _namen(self, ids):
+        return [self._eintraege[i].name for i in ids]
@@ -0,0 +1,181 @@
+"""Virtualisierte Listenansicht für große Transaktionslisten.
+
+Ein ``tk.Listbox`` enthält immer nur die gerade sichtbaren Zeilen. Die
+Scrollbar bildet trotzdem den gesamten Datenbestand ab; beim Scrollen werden
+nur die neu sichtbaren Zeilen formatiert. Änderungen am Datenbestand werden
+gesammelt über :meth:`VirtualListView.apply_delta` als Diff angewendet,
+ein ersetzter Bestand über :meth:`VirtualListView.refresh`.
+"""
+
+import tkinter as tk
+from tkinter import font as tkfont
+
+from euer_timing import messung
+
+
+class VirtualListView(tk.Frame):
+    """Scrollable list that formats only the rows currently on screen.
+
+    ``row_count`` is a callable returning the number of rows and
+    ``format_row(index)`` returns the display text of a row.
+    """
+
+    def __init__(self, master, row_count, format_row, height=10, width=60,
+                 follow_tail=True):
+        super().__init__(master)
+        self._row_count = row_count
+        self._format_row = format_row
+        self.follow_tail = follow_tail
+        self._top = 0
+        self._selected = None
+        self._visible = height
+
+        self.listbox = tk.Listbox(
+            self, height=height, width=width, exportselection=False
+        )
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self._font = tkfont.Font(root=self, font=self.listbox.cget("font"))
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self._on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<Configure>", self._on_configure)
+        self.listbox.bind("<MouseWheel>", self._on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda _e: self._scroll_by(-3))
+        self.listbox.bind("<Button-5>", lambda _e: self._scroll_by(3))
+        self.listbox.bind("<Up>", lambda _e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda _e: self._move_selection(1))
+        self.listbox.bind("<Prior>", lambda _e: self._scroll_by(-self._visible))
+        self.listbox.bind("<Next>", lambda _e: self._scroll_by(self._visible))
+
+    # --- Öffentliche API -----------------------------------------------
+    def refresh(self, scroll_to_end=False):
+        """Re-render the visible window, e.g. after the data was replaced."""
+        self._selected = None
+        if scroll_to_end:
+            self._top = self._max_top()
+        self._render()
+
+    def selected_index(self):
+        """Return the absolute index of the selected row or ``None``."""
+        return self._selected
+
+    def apply_delta(self, entfernt, eingefuegt):
+        """Apply a batch of changes with a single redraw.
+
+        ``entfernt`` are the old positions of the removed rows and
+        ``eingefuegt`` the new positions of the inserted rows, both
+        ascending. The rows on screen stay where they are unless the view
+        follows the tail.
+        """
+        alt_total = self._row_count() - len(eingefuegt) + len(entfernt)
+        at_end = self._top >= max(0, alt_total - self._visible)
+        for index in reversed(entfernt):
+            if self._selected is not None:
+                if self._selected == index:
+                    self._selected = None
+                elif self._selected > index:
+                    self._selected -= 1
+            if index < self._top:
+                self._top -= 1
+        for index in eingefuegt:
+            if self._selected is not None and self._selected >= index:
+                self._selected += 1
+            if index < self._top:
+                self._top += 1
+        if at_end and self.follow_tail:
+            self._top = self._max_top()
+        self._render()
+
+    # --- Darstellung ---------------------------------------------------
+    def _max_top(self):
+        return max(0, self._row_count() - self._visible)
+
+    def _render(self):
+        with messung("liste.render"):
+            self._top = min(max(self._top, 0), self._max_top())
+            end = min(self._top + self._visible, self._row_count())
+            self.listbox.delete(0, tk.END)
+            self.listbox.insert(
+                tk.END, *(self._format_row(i) for i in range(self._top, end))
+            )
+            self._sync_selection()
+            self._update_scrollbar()
+
+    def _sync_selection(self):
+        self.listbox.selection_clear(0, tk.END)
+        if self._selected is None:
+            return
+        local = self._selected - self._top
+        if 0 <= local < self.listbox.size():
+            self.listbox.selection_set(local)
+            self.listbox.activate(local)
+
+    def _update_scrollbar(self):
+        total = self._row_count()
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self._top / total
+        last = min(self._top + self._visible, total) / total
+        self.scrollbar.set(first, last)
+
+    def _scroll_to(self, top):
+        top = min(max(top, 0), self._max_top())
+        if top != self._top:
+            self._top = top
+            self._render()
+
+    def _scroll_by(self, rows):
+        self._scroll_to(self._top + rows)
+        return "break"
+
+    # --- Ereignisse ----------------------------------------------------
+    def _on_scroll(self, action, value, unit=None):
+        if action == "moveto":
+            self._scroll_to(round(float(value) * self._row_count()))
+        elif action == "scroll":
+            step = self._visible if unit == "pages" else 1
+            self._scroll_by(int(value) * step)
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_select(self, _event):
+        selection = self.listbox.curselection()
+        if selection:
+            self._selected = self._top + selection[0]
+
+    def _move_selection(self, step):
+        total = self._row_count()
+        if total == 0:
+            return "break"
+        if self._selected is None:
+            self._selected = self._top
+        else:
+            self._selected = min(max(self._selected + step, 0), total - 1)
+        if self._selected < self._top:
+            self._scroll_to(self._selected)
+        elif self._selected >= self._top + self._visible:
+            self._scroll_to(self._selected - self._visible + 1)
+        self._sync_selection()
+        self.listbox.event_generate("<<ListboxSelect>>")
+        return "break"
+
+    def _on_configure(self, event):
+        padding = 2 * (
+            int(self.listbox.cget("borderwidth"))
+            + int(self.listbox.cget("highlightthickness"))
+        )
+        line_height = (
+            self._font.metrics("linespace")
+            + 1
+            + 2 * int(self.listbox.cget("selectborderwidth"))
+        )
+        visible = max(1, (event.height - padding) // line_height)
+        if visible != self._visible:
+            at_end = self._top >= self._max_top()
+            self._visible = visible
+            if at_end and self.follow_tail:
+                self._top = self._max_top()
+            self._render()
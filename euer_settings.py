@@ -0,0 +1,195 @@
+"""Einstellungen und Verlauf der Excel-Exporte.
+
+Die Einstellungen (zuletzt gewählte Kategorie, Fenstergröße) liegen als
+kleines JSON in ``einstellungen.json``.
+
+Jeder Export wird als Zeile an das Protokoll ``umsatz_historie.csv``
+angehängt und nie umgeschrieben::
+
+    2025-11-30T18:02:11;db.csv;2025;11;Umsatz 25.11.xlsx;535550;401982;133568;362746
+
+(Zeitpunkt, Datenbank der Firma, Jahr, Monat – 0 für die Jahresübersicht –,
+Datei und Einnahmen, Ausgaben, Gewinn, Endbestand in Cent.) Im Speicher
+hält :class:`ExportHistory` je Firma und Zeitraum nur den letzten Export,
+so dass "letzter Export für Monat X" ein Dict-Zugriff ist. Dieser Index
+wird regelmäßig nach ``umsatz_historie.json`` geschrieben, zusammen mit der
+Stelle im Protokoll, bis zu der er reicht. Beim Laden wird nur der Index
+und das kurze Protokollende danach gelesen; die Ladezeit hängt also von
+der Zahl der Zeiträume ab, nicht von der Zahl der Exporte.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+
+from euer_storage import atomic_write_text
+
+EINSTELLUNGEN_DATEI = "einstellungen.json"
+HISTORIE_PROTOKOLL = "umsatz_historie.csv"
+HISTORIE_INDEX = "umsatz_historie.json"
+# The index is rewritten after this many new log records (and on close).
+INDEX_NACH = 50
+
+STANDARD_EINSTELLUNGEN = {"kategorie": None, "geometrie": None}
+
+Eintrag = namedtuple(
+    "Eintrag", "zeitpunkt firma jahr monat datei einnahmen ausgaben gewinn endbestand"
+)
+
+_MONATS_DATEI = re.compile(r"Umsatz (\d\d)\.(\d\d)\.xlsx$")
+_JAHRES_DATEI = re.compile(r"Umsatz (\d\d) Jahresübersicht\.xlsx$")
+
+
+# --- Einstellungen -----------------------------------------------------------
+def einstellungen_laden(path=EINSTELLUNGEN_DATEI):
+    """Return the settings dict, with defaults for everything not stored."""
+    einstellungen = dict(STANDARD_EINSTELLUNGEN)
+    try:
+        with open(path, encoding="utf-8") as f:
+            einstellungen.update(json.load(f))
+    except (FileNotFoundError, ValueError, UnicodeDecodeError):
+        # Missing or damaged settings must not keep the program from starting.
+        pass
+    return einstellungen
+
+
+def einstellungen_speichern(einstellungen, path=EINSTELLUNGEN_DATEI):
+    atomic_write_text(path, json.dumps(einstellungen, ensure_ascii=False, indent=2))
+
+
+# --- Exportverlauf -----------------------------------------------------------
+def zeitraum_aus_dateiname(filename):
+    """``(jahr, monat)`` of an export file name, ``monat`` 0 for the summary.
+
+    Returns ``(None, None)`` for names not written by :mod:`euer_export`.
+    """
+    name = os.path.basename(filename)
+    treffer = _MONATS_DATEI.search(name)
+    if treffer:
+        return 2000 + int(treffer[1]), int(treffer[2])
+    treffer = _JAHRES_DATEI.search(name)
+    if treffer:
+        return 2000 + int(treffer[1]), 0
+    return None, None
+
+
+def _zahl(text):
+    return None if text == "" else int(text)
+
+
+def _eintrag(row):
+    zeitpunkt, firma, jahr, monat, datei, *cents = row
+    return Eintrag(zeitpunkt, firma, _zahl(jahr), _zahl(monat), datei, *map(int, cents))
+
+
+def _zeile(eintrag):
+    return ["" if wert is None else wert for wert in eintrag]
+
+
+class ExportHistory:
+    """Append-only export log with the last export per company and period."""
+
+    def __init__(self, log_path=HISTORIE_PROTOKOLL, index_path=HISTORIE_INDEX):
+        self.log_path = log_path
+        self.index_path = index_path
+        self._letzte = {}
+        self._offset = 0
+        self._seit_index = 0
+
+    def load(self):
+        """Read the index and replay the log records written after it."""
+        self._letzte = {}
+        self._offset = 0
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            st = os.stat(self.log_path)
+            # A replaced or truncated log invalidates the index.
+            if index["inode"] == st.st_ino and index["offset"] <= st.st_size:
+                for row in index["eintraege"]:
+                    self._merken(_eintrag(row))
+                self._offset = index["offset"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._letzte = {}
+            self._offset = 0
+        self._seit_index = self._replay()
+
+    def _replay(self):
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(self._offset)
+                rest = f.read()
+        except FileNotFoundError:
+            return 0
+        # A line cut off by a crash is ignored until it is complete.
+        ende = rest.rfind(b"\n") + 1
+        count = 0
+        for row in csv.reader(io.StringIO(rest[:ende].decode("utf-8")), delimiter=";"):
+            try:
+                self._merken(_eintrag(row))
+            except ValueError:
+                continue
+            count += 1
+        self._offset += ende
+        return count
+
+    def _merken(self, eintrag):
+        self._letzte[eintrag.firma, eintrag.jahr, eintrag.monat] = eintrag
+        self._letzte[eintrag.firma, None, None] = eintrag
+
+    def record(self, firma, filename, einnahmen, ausgaben, gewinn, endbestand):
+        """Append an export (amounts in cents) to the log and the index."""
+        jahr, monat = zeitraum_aus_dateiname(filename)
+        eintrag = Eintrag(
+            datetime.now().isoformat(timespec="seconds"),
+            firma, jahr, monat, filename, einnahmen, ausgaben, gewinn, endbestand,
+        )
+        puffer = io.StringIO()
+        csv.writer(puffer, delimiter=";").writerow(_zeile(eintrag))
+        with open(self.log_path, "ab") as f:
+            f.write(puffer.getvalue().encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        # Read back up to the end instead of jumping there: records another
+        # process appended since the last read come in, in log order.
+        self._seit_index += self._replay()
+        if self._seit_index >= INDEX_NACH:
+            self.save_index()
+        return eintrag
+
+    def letzter_export(self, firma, jahr=None, monat=None):
+        """Last export of ``firma`` for a month (``monat`` 0: the year summary).
+
+        Without ``jahr`` and ``monat`` the company's last export of any
+        period. ``None`` if there is none.
+        """
+        return self._letzte.get((firma, jahr, monat))
+
+    def save_index(self):
+        """Write the index up to the current end of the log."""
+        if not self._seit_index:
+            return
+        try:
+            inode = os.stat(self.log_path).st_ino
+        except FileNotFoundError:
+            return
+        # Each company's overall last export goes last, so that replaying
+        # the list restores it as well.
+        perioden = [e for key, e in self._letzte.items() if key[1:] != (None, None)]
+        firmen = [e for key, e in self._letzte.items() if key[1:] == (None, None)]
+        atomic_write_text(
+            self.index_path,
+            json.dumps(
+                {
+                    "inode": inode,
+                    "offset": self._offset,
+                    "eintraege": [_zeile(e) for e in (*perioden, *firmen)],
+                },
+                ensure_ascii=False,
+            ),
+        )
+        self._seit_index = 0
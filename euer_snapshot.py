@@ -0,0 +1,207 @@
+"""Binärer Schnappschuss von db.csv für den schnellen Start.
+
+Neben ``db.csv`` liegt ``db.csv.snapshot`` mit demselben Stand als feste
+Spalten, so dass der Start keinen Text parsen muss::
+
+    Kopf      Magie "EUERSNAP", Version, Byte-Reihenfolge und Breiten der
+              Spalten, Stempel von db.csv (inode, Größe, mtime_ns),
+              Anfangsbestand in Cent, nächste ID, Anzahl Buchungen und Texte
+    Spalten   datum int32[n], kategorie uint32[n], cents int64[n],
+              id uint32[n], jede auf 8 Byte ausgerichtet
+    Texte     Firmenname, Kategorienamen und deren Katalog-IDs (dezimal,
+              leer ohne Katalog), UTF-8 je mit uint32-Länge; die
+              Kategorie-Spalte zählt ab 0 in die Namen
+
+Der Schnappschuss gilt nur, solange der Stempel zu db.csv passt; ein
+Journal wird wie sonst darüber abgespielt. :class:`Snapshot` öffnet die
+Datei mit ``mmap``: die Vorschau liest nur die Buchungen des letzten Monats
+direkt aus der Abbildung, das vollständige Laden kopiert die Spalten
+blockweise in den veränderbaren :class:`~euer_store.TransactionStore`.
+
+Der Schnappschuss ist nur ein Zwischenspeicher. Fehlt er, ist er veraltet
+oder beschädigt, liefert :meth:`Snapshot.oeffnen` ``None`` und db.csv wird
+wie bisher gelesen.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from datetime import date
+
+from euer_store import TransactionStore
+
+MAGIE = b"EUERSNAP"
+VERSION = 2
+# magic, version, byte order, column widths, db.csv stamp (inode, size,
+# mtime_ns), anfangsbestand cents, next id, bookings, texts
+KOPF = struct.Struct("<8sHB4sxQQqqIII")
+SPALTEN = "iIqI"
+_LAENGE = struct.Struct("<I")
+
+
+def _reihenfolge():
+    return 0 if sys.byteorder == "little" else 1
+
+
+def _breiten():
+    return bytes(array(code).itemsize for code in SPALTEN)
+
+
+def _ausrichten(offset):
+    return (offset + 7) & ~7
+
+
+def _offsets(anzahl):
+    """Start offsets of the four columns and of the text table."""
+    offsets = []
+    offset = KOPF.size
+    for breite in _breiten():
+        offset = _ausrichten(offset)
+        offsets.append(offset)
+        offset += breite * anzahl
+    offsets.append(_ausrichten(offset))
+    return offsets
+
+
+def schnappschuss_bytes(stempel, firmenname, anfangsbestand, transaktionen,
+                        kategorie_ids=None):
+    """Yield the snapshot file in chunks; the columns without copying.
+
+    ``kategorie_ids`` are the catalog ids parallel to the category names.
+    """
+    anzahl = len(transaktionen)
+    if kategorie_ids is None:
+        kategorie_ids = [None] * len(transaktionen.kategorien)
+    texte = [
+        firmenname,
+        *transaktionen.kategorien,
+        *("" if i is None else str(i) for i in kategorie_ids),
+    ]
+    yield KOPF.pack(
+        MAGIE, VERSION, _reihenfolge(), _breiten(), *stempel,
+        round(anfangsbestand * 100), transaktionen.next_id, anzahl, len(texte),
+    )
+    position = KOPF.size
+    spalten = (
+        transaktionen.datum_ordinals,
+        transaktionen.kategorie_codes,
+        transaktionen.cents,
+        transaktionen.ids,
+    )
+    for offset, spalte in zip(_offsets(anzahl), spalten):
+        yield bytes(offset - position)
+        yield memoryview(spalte).cast("B")
+        position = offset + spalte.itemsize * anzahl
+    yield bytes(_offsets(anzahl)[-1] - position)
+    for text in texte:
+        roh = text.encode("utf-8")
+        yield _LAENGE.pack(len(roh))
+        yield roh
+
+
+class Snapshot:
+    """A mapped snapshot file; use as a context manager."""
+
+    def __init__(self, abbildung, kopf):
+        self._abbildung = abbildung
+        (_, _, _, _, _, _, _, anfangsbestand_cents,
+         self.next_id, self.anzahl, anzahl_texte) = kopf
+        self.anfangsbestand = anfangsbestand_cents / 100
+        offsets = _offsets(self.anzahl)
+        ende = offsets[-1]
+        if len(abbildung) < ende:
+            raise ValueError("Schnappschuss zu kurz")
+        texte = []
+        position = ende
+        for _ in range(anzahl_texte):
+            (laenge,) = _LAENGE.unpack_from(abbildung, position)
+            position += _LAENGE.size
+            if position + laenge > len(abbildung):
+                raise ValueError("Schnappschuss zu kurz")
+            texte.append(str(abbildung[position:position + laenge], "utf-8"))
+            position += laenge
+        if len(texte) % 2 != 1:
+            raise ValueError("Texte des Schnappschusses unvollständig")
+        self.firmenname = texte[0]
+        anzahl_kategorien = len(texte) // 2
+        self.kategorien = texte[1:anzahl_kategorien + 1]
+        # catalog id per category name, None if written without a catalog
+        self.kategorie_ids = [
+            int(text) if text else None for text in texte[anzahl_kategorien + 1:]
+        ]
+        # Views into the mapping; they must be released before it is closed.
+        self._puffer = memoryview(abbildung)
+        self._spalten = [
+            self._puffer[offset:offset + array(code).itemsize * self.anzahl].cast(code)
+            for offset, code in zip(offsets, SPALTEN)
+        ]
+
+    @classmethod
+    def oeffnen(cls, path, stempel):
+        """Map ``path`` if it is a valid snapshot of the db.csv ``stempel``.
+
+        Returns ``None`` for a missing, outdated or foreign file.
+        """
+        try:
+            with open(path, "rb") as datei:
+                abbildung = mmap.mmap(datei.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # empty file
+            return None
+        try:
+            kopf = KOPF.unpack_from(abbildung)
+            if (
+                kopf[0] != MAGIE
+                or kopf[1] != VERSION
+                or kopf[2] != _reihenfolge()
+                or kopf[3] != _breiten()
+                or tuple(kopf[4:7]) != tuple(stempel)
+            ):
+                raise ValueError("fremder oder veralteter Schnappschuss")
+            return cls(abbildung, kopf)
+        except (ValueError, struct.error, UnicodeDecodeError):
+            abbildung.close()
+            return None
+
+    def close(self):
+        if self._abbildung is None:
+            return
+        for spalte in self._spalten:
+            spalte.release()
+        self._puffer.release()
+        self._abbildung.close()
+        self._abbildung = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def start_letzter_monat(self):
+        """Position of the first booking of the trailing month run."""
+        datum = self._spalten[0]
+        idx = self.anzahl
+        if not idx:
+            return 0
+        letzter = date.fromordinal(datum[idx - 1])
+        anfang = letzter.replace(day=1).toordinal()
+        ende = date(
+            letzter.year + letzter.month // 12, letzter.month % 12 + 1, 1
+        ).toordinal()
+        while idx > 0 and anfang <= datum[idx - 1] < ende:
+            idx -= 1
+        return idx
+
+    def transaktionen(self, start=0):
+        """Copy the rows from position ``start`` on into a TransactionStore."""
+        spalten = []
+        for code, spalte in zip(SPALTEN, self._spalten):
+            kopie = array(code)
+            kopie.frombytes(spalte[start:].cast("B"))
+            spalten.append(kopie)
+        return TransactionStore.from_columns(*spalten, self.kategorien, self.next_id)
@@ -0,0 +1,456 @@
+"""SQLite-Backend als Alternative zu db.csv.
+
+Die Buchungen liegen in einer Tabelle ``buchungen`` (Datum als ISO-Text,
+Kategorie-ID, Betrag in ganzen Cent, ``id`` ist die stabile Buchungs-ID des
+TransactionStore) mit Indizes auf Datum und Kategorie,
+die Kategorienamen einmal je Name in ``kategorien`` (mit einem
+:class:`~euer_kategorien.Katalog` unter dessen IDs),
+``Firma`` und ``Anfangsbestand`` in ``meta``. Die Datenbank läuft im
+WAL-Modus; jedes Hinzufügen und Löschen ist eine eigene Transaktion über
+genau eine Zeile, ein Journal oder eine Kompaktierung braucht es nicht.
+
+Summen, Monats- und Kategoriewerte sowie der Kassenbestand lassen sich
+direkt in SQL abfragen, ohne die Historie zu laden.
+
+Einmalige Übernahme eines bestehenden db.csv (inklusive Journal)::
+
+    python euer_sqlite.py db.csv db.sqlite3
+"""
+
+import contextlib
+import os
+import sqlite3
+import sys
+import threading
+from datetime import date
+
+from euer_store import TransactionStore
+from euer_timing import gemessen
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS kategorien (
+    id   INTEGER PRIMARY KEY,
+    name TEXT    NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS buchungen (
+    id           INTEGER PRIMARY KEY,
+    datum        TEXT    NOT NULL,
+    kategorie_id INTEGER NOT NULL REFERENCES kategorien (id),
+    cents        INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS buchungen_datum ON buchungen (datum);
+CREATE INDEX IF NOT EXISTS buchungen_kategorie ON buchungen (kategorie_id, datum);
+"""
+
+# einnahmen, ausgaben (positive), anzahl
+_SUMMEN = (
+    "COALESCE(SUM(CASE WHEN cents > 0 THEN cents END), 0),"
+    " COALESCE(-SUM(CASE WHEN cents < 0 THEN cents END), 0),"
+    " COUNT(*)"
+)
+
+
+@contextlib.contextmanager
+def _sql_fehler():
+    # Callers handle storage failures as OSError, same as for db.csv.
+    try:
+        yield
+    except sqlite3.Error as exc:
+        raise OSError(f"SQLite: {exc}") from exc
+
+
+def _iso(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _sql_rows(transaktionen, kategorie_id):
+    iso_datum = transaktionen.iso_datum
+    kategorien = [kategorie_id(name) for name in transaktionen.kategorien]
+    for row_id, ordinal, code, cents in zip(
+        transaktionen.ids,
+        transaktionen.datum_ordinals,
+        transaktionen.kategorie_codes,
+        transaktionen.cents,
+    ):
+        yield row_id, iso_datum(ordinal), kategorien[code], cents
+
+
+class SqliteStorage:
+    """Storage backend on a SQLite database in WAL mode.
+
+    Offers the same methods as :class:`~euer_storage.CsvStorage`; the
+    compaction hooks are no-ops. The connection is opened on first use and
+    shared between the GUI and the loader thread under a lock.
+
+    With a ``katalog`` the ``kategorien`` table uses the catalog's ids and
+    names; an existing database is renumbered when it is opened. Once it
+    holds catalog ids (``katalog_ids`` in ``meta``), a category renamed in
+    the catalog keeps its id and takes the new name.
+    """
+
+    def __init__(self, path, katalog=None):
+        self.path = path
+        self.katalog = katalog
+        self._lock = threading.Lock()
+        self._conn = None
+        # name -> id of the kategorien table, filled on use
+        self._kategorie_ids = {}
+
+    def _connection(self):
+        """Return the open connection (lock held)."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            with conn:
+                conn.executescript(SCHEMA)
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            if self.katalog is not None:
+                with conn:
+                    self._katalog_abgleichen(conn)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._kategorie_ids.clear()
+
+    def _katalog_abgleichen(self, conn):
+        """Renumber the kategorien table to the catalog ids (in a transaction)."""
+        namen = dict(conn.execute("SELECT id, name FROM kategorien"))
+        katalog_ids = conn.execute(
+            "SELECT 1 FROM meta WHERE key = 'katalog_ids'"
+        ).fetchone() is not None
+        neue_ids = {
+            i: self.katalog.aufloesen(i if katalog_ids else None, name).id
+            for i, name in namen.items()
+        }
+        self._katalog_ids_merken(conn)
+        if all(
+            i == neu and namen[i] == self.katalog[neu].name
+            for i, neu in neue_ids.items()
+        ):
+            return
+        # Via negative ids, so that old and new ids never collide.
+        conn.executemany(
+            "UPDATE buchungen SET kategorie_id = ? WHERE kategorie_id = ?",
+            ((-neu - 1, i) for i, neu in neue_ids.items()),
+        )
+        conn.execute(
+            "UPDATE buchungen SET kategorie_id = -kategorie_id - 1"
+            " WHERE kategorie_id < 0"
+        )
+        conn.execute("DELETE FROM kategorien")
+        conn.executemany(
+            "INSERT INTO kategorien (id, name) VALUES (?, ?)",
+            ((neu, self.katalog[neu].name) for neu in sorted(set(neue_ids.values()))),
+        )
+
+    def _katalog_ids_merken(self, conn):
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('katalog_ids', '1')"
+        )
+
+    def _kategorie_id(self, conn, name):
+        """Interned id of the category ``name`` (lock held, in a transaction)."""
+        kategorie_id = self._kategorie_ids.get(name)
+        if kategorie_id is None:
+            if self.katalog is not None:
+                kategorie_id = self.katalog.kategorie_id(name)
+                conn.execute(
+                    "INSERT OR IGNORE INTO kategorien (id, name) VALUES (?, ?)",
+                    (kategorie_id, self.katalog[kategorie_id].name),
+                )
+            else:
+                # Ids picked here may clash with later catalog ids.
+                conn.execute("DELETE FROM meta WHERE key = 'katalog_ids'")
+                conn.execute(
+                    "INSERT OR IGNORE INTO kategorien (name) VALUES (?)", (name,)
+                )
+                (kategorie_id,) = conn.execute(
+                    "SELECT id FROM kategorien WHERE name = ?", (name,)
+                ).fetchone()
+            self._kategorie_ids[name] = kategorie_id
+        return kategorie_id
+
+    def _kategorie_namen(self, conn):
+        namen = dict(conn.execute("SELECT id, name FROM kategorien"))
+        self._kategorie_ids.update((name, i) for i, name in namen.items())
+        return namen
+
+    @contextlib.contextmanager
+    def _transaktion(self):
+        """Connection inside one transaction, under the lock."""
+        with self._lock, _sql_fehler():
+            conn = self._connection()
+            try:
+                with conn:
+                    yield conn
+            except Exception:
+                # Ids inserted by the rolled back transaction are gone.
+                self._kategorie_ids.clear()
+                raise
+
+    # --- Lesen ---------------------------------------------------------
+    def _header(self, conn):
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        anfangsbestand = float(meta.get("anfangsbestand", "0"))
+        return meta.get("firma", ""), anfangsbestand
+
+    @gemessen("sqlite.load_recent")
+    def load_recent(self):
+        """Return the header plus the bookings of the trailing month."""
+        transaktionen = TransactionStore()
+        with self._lock, _sql_fehler():
+            conn = self._connection()
+            firmenname, anfangsbestand = self._header(conn)
+            namen = self._kategorie_namen(conn)
+            recent = []
+            period = None
+            for row in conn.execute(
+                "SELECT id, datum, kategorie_id, cents FROM buchungen ORDER BY id DESC"
+            ):
+                if period is None:
+                    period = row[1][:7]
+                elif row[1][:7] != period:
+                    break
+                recent.append(row)
+        for row_id, datum, kategorie_id, cents in reversed(recent):
+            transaktionen.append_values(
+                transaktionen.ordinal(datum), namen[kategorie_id], cents, row_id
+            )
+        return firmenname, anfangsbestand, transaktionen
+
+    @gemessen("sqlite.load")
+    def load(self):
+        """Return ``(firmenname, anfangsbestand, transaktionen)``."""
+        transaktionen = TransactionStore()
+        ordinal = transaktionen.ordinal
+        append = transaktionen.append_values
+        with self._lock, _sql_fehler():
+            conn = self._connection()
+            firmenname, anfangsbestand = self._header(conn)
+            namen = self._kategorie_namen(conn)
+            for row_id, datum, kategorie_id, cents in conn.execute(
+                "SELECT id, datum, kategorie_id, cents FROM buchungen ORDER BY id"
+            ):
+                append(ordinal(datum), namen[kategorie_id], cents, row_id)
+        return firmenname, anfangsbestand, transaktionen
+
+    # --- Schreiben -----------------------------------------------------
+    # ``state`` is accepted for compatibility with CsvStorage and unused:
+    # every change is written as its own single-row transaction.
+    def _execute(self, sql, params=()):
+        with self._transaktion() as conn:
+            conn.execute(sql, params)
+
+    @gemessen("sqlite.add")
+    def add(self, transaktion, state=None):
+        with self._transaktion() as conn:
+            conn.execute(
+                "INSERT INTO buchungen (id, datum, kategorie_id, cents)"
+                " VALUES (?, ?, ?, ?)",
+                (
+                    transaktion["ID"],
+                    transaktion["Datum"],
+                    self._kategorie_id(conn, transaktion["Kategorie"]),
+                    round(transaktion["Betrag"] * 100),
+                ),
+            )
+
+    @gemessen("sqlite.delete")
+    def delete(self, row_id, state=None):
+        """Delete the booking with id ``row_id``."""
+        self._execute("DELETE FROM buchungen WHERE id = ?", (row_id,))
+
+    @gemessen("sqlite.delete_many")
+    def delete_many(self, row_ids, state=None):
+        """Delete several bookings in a single transaction."""
+        with self._transaktion() as conn:
+            conn.executemany(
+                "DELETE FROM buchungen WHERE id = ?",
+                ((row_id,) for row_id in row_ids),
+            )
+
+    @gemessen("sqlite.set_firma")
+    def set_firma(self, firmenname, state=None):
+        self._execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('firma', ?)",
+            (firmenname,),
+        )
+
+    @gemessen("sqlite.set_anfangsbestand")
+    def set_anfangsbestand(self, anfangsbestand, state=None):
+        self._execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('anfangsbestand', ?)",
+            (f"{anfangsbestand:.2f}",),
+        )
+
+    @gemessen("sqlite.add_many")
+    def add_many(self, neue, state=None):
+        """Insert a batch of bookings in a single transaction."""
+        with self._transaktion() as conn:
+            conn.executemany(
+                "INSERT INTO buchungen (id, datum, kategorie_id, cents)"
+                " VALUES (?, ?, ?, ?)",
+                _sql_rows(neue, lambda name: self._kategorie_id(conn, name)),
+            )
+
+    @gemessen("sqlite.rewrite")
+    def rewrite(self, firmenname, anfangsbestand, transaktionen):
+        """Replace the whole content in one transaction."""
+        with self._transaktion() as conn:
+            conn.execute("DELETE FROM meta")
+            conn.execute("DELETE FROM buchungen")
+            conn.execute("DELETE FROM kategorien")
+            self._kategorie_ids.clear()
+            if firmenname:
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('firma', ?)",
+                    (firmenname,),
+                )
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('anfangsbestand', ?)",
+                (f"{anfangsbestand:.2f}",),
+            )
+            if self.katalog is not None:
+                self._katalog_ids_merken(conn)
+            conn.executemany(
+                "INSERT INTO buchungen (id, datum, kategorie_id, cents)"
+                " VALUES (?, ?, ?, ?)",
+                _sql_rows(transaktionen, lambda name: self._kategorie_id(conn, name)),
+            )
+
+    # --- Kompaktierung (nicht nötig) -----------------------------------
+    def needs_compaction(self):
+        return False
+
+    def compact_in_background(self, firmenname, anfangsbestand, transaktionen):
+        pass
+
+    def wait_for_compaction(self):
+        pass
+
+    # --- Abfragen ------------------------------------------------------
+    def _query(self, sql, params=()):
+        with self._lock, _sql_fehler():
+            return self._connection().execute(sql, params).fetchall()
+
+    @staticmethod
+    def _where(von, bis, kategorie):
+        clauses, params = [], []
+        if von is not None:
+            clauses.append("datum >= ?")
+            params.append(_iso(von))
+        if bis is not None:
+            clauses.append("datum <= ?")
+            params.append(_iso(bis))
+        if kategorie is not None:
+            clauses.append("kategorie_id = (SELECT id FROM kategorien WHERE name = ?)")
+            params.append(kategorie)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    @gemessen("sqlite.summen")
+    def summen(self, von=None, bis=None, kategorie=None):
+        """Return ``(einnahmen, ausgaben, anzahl)`` in cents for a date range.
+
+        ``von`` and ``bis`` are inclusive day ordinals, both optional.
+        """
+        where, params = self._where(von, bis, kategorie)
+        return tuple(self._query(f"SELECT {_SUMMEN} FROM buchungen{where}", params)[0])
+
+    def per_monat(self, von=None, bis=None):
+        """``{(jahr, monat): [einnahmen, ausgaben, anzahl]}`` like Totals."""
+        where, params = self._where(von, bis, None)
+        rows = self._query(
+            f"SELECT substr(datum, 1, 7) AS monat, {_SUMMEN}"
+            f" FROM buchungen{where} GROUP BY monat ORDER BY monat",
+            params,
+        )
+        return {
+            (int(monat[:4]), int(monat[5:7])): [einnahmen, ausgaben, anzahl]
+            for monat, einnahmen, ausgaben, anzahl in rows
+        }
+
+    def per_kategorie(self, von=None, bis=None):
+        """``{kategorie: [einnahmen, ausgaben, anzahl]}`` like Totals."""
+        where, params = self._where(von, bis, None)
+        rows = self._query(
+            f"SELECT (SELECT name FROM kategorien WHERE id = kategorie_id), {_SUMMEN}"
+            f" FROM buchungen{where} GROUP BY kategorie_id",
+            params,
+        )
+        return {row[0]: list(row[1:]) for row in rows}
+
+    @gemessen("sqlite.kassenbestand_cents")
+    def kassenbestand_cents(self, ordinal):
+        """Cash balance at the end of the day ``ordinal`` in cents."""
+        with self._lock, _sql_fehler():
+            conn = self._connection()
+            _, anfangsbestand = self._header(conn)
+            (saldo,) = conn.execute(
+                "SELECT COALESCE(SUM(cents), 0) FROM buchungen WHERE datum <= ?",
+                (_iso(ordinal),),
+            ).fetchone()
+        return round(anfangsbestand * 100) + saldo
+
+
+def migrate_csv(csv_path, sqlite_path, katalog=None):
+    """Copy db.csv (and pending journals) into a new SQLite database.
+
+    Categories get the ids of ``katalog`` if one is given. Returns the
+    number of migrated bookings. An existing database is never
+    overwritten, and the database only appears under ``sqlite_path`` once
+    it is complete.
+    """
+    from euer_storage import CsvStorage
+
+    if os.path.exists(sqlite_path):
+        raise FileExistsError(sqlite_path)
+    firmenname, anfangsbestand, transaktionen = CsvStorage(
+        csv_path, katalog=katalog
+    ).load()
+    tmp_path = sqlite_path + ".tmp"
+    for path in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    storage = SqliteStorage(tmp_path, katalog)
+    try:
+        storage.rewrite(firmenname, anfangsbestand, transaktionen)
+    finally:
+        # Closing the last connection checkpoints and removes the WAL file.
+        storage.close()
+    os.replace(tmp_path, sqlite_path)
+    return len(transaktionen)
+
+
+def main(argv):
+    if len(argv) != 3:
+        print(f"Aufruf: {argv[0]} db.csv db.sqlite3", file=sys.stderr)
+        return 2
+    from euer_kategorien import Katalog
+
+    katalog = Katalog.laden()
+    try:
+        anzahl = migrate_csv(argv[1], argv[2], katalog)
+    except FileExistsError:
+        print(f"{argv[2]} existiert bereits", file=sys.stderr)
+        return 1
+    if katalog.geaendert:
+        katalog.speichern()
+    print(f"{anzahl} Buchungen nach {argv[2]} übernommen")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
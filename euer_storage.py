@@ -0,0 +1,640 @@
+"""Persistenz für db.csv: atomares Schreiben und Append-only-Journal.
+
+Die Datei ``db.csv`` bleibt das kanonische Format (``Firma``,
+``Anfangsbestand`` und eine Zeile pro Transaktion). Im Journal-Modus werden
+Änderungen nicht mehr durch komplettes Neuschreiben gespeichert, sondern als
+kleine Datensätze im gleichen Zeilenformat an ``db.csv.journal`` angehängt.
+Eine Kompaktierung im Hintergrund schreibt den aktuellen Stand regelmäßig
+zurück nach ``db.csv`` und leert das Journal.
+
+Transaktionszeilen tragen in der vierten Spalte ihre stabile ID. Ältere
+Dateien ohne ID-Spalte bekommen beim Laden fortlaufende IDs, die beim
+nächsten Neuschreiben mit gespeichert werden. Eine Journalzeile mit einer
+kleineren ID (wiederhergestellt durch Rückgängig) wird beim Einlesen an
+ihrer alten Stelle eingefügt.
+
+Mit einem :class:`~euer_kategorien.Katalog` steht in der fünften Spalte die
+Katalog-ID der Kategorie, wie im SQLite-Backend. Beim Laden gilt die ID, der
+Name in der zweiten Spalte nur, wenn der Katalog die ID nicht kennt; eine im
+Katalog umbenannte Kategorie erscheint so unter ihrem neuen Namen.
+
+Journal-Datensätze::
+
+    Basis;<inode>;<size>;<mtime_ns>   erste Zeile, Stand von db.csv beim Anlegen
+    2025-11-01;💰  Tagesumsatz Kasse;294.10;<id>;<kategorie-id>
+    Löschen;#<id>
+    Firma;<name>
+    Anfangsbestand;<betrag>
+
+Zusätzlich schreibt :class:`CsvStorage` nach jedem Neuschreiben von db.csv
+einen binären Schnappschuss ``db.csv.snapshot`` (:mod:`euer_snapshot`), der
+mit Inode, Größe und mtime von db.csv gestempelt ist. Passt der Stempel,
+lädt der Start die Spalten aus dem Schnappschuss statt db.csv zu parsen;
+das Journal wird wie sonst darüber abgespielt. Ist db.csv neuer (oder von
+Hand geändert), wird es gelesen und der Schnappschuss neu geschrieben.
+"""
+
+import csv
+import os
+import stat
+import tempfile
+import threading
+
+from euer_snapshot import Snapshot, schnappschuss_bytes
+from euer_store import TransactionStore, parse_cents
+from euer_timing import gemessen
+
+JOURNAL_SUFFIX = ".journal"
+ROTATED_SUFFIX = ".journal.alt"
+SNAPSHOT_SUFFIX = ".snapshot"
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+
+def _read_umask():
+    # os.umask can only be read by setting it; done once at import time.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+def _fsync_directory(directory):
+    """Persist a rename on POSIX systems (no-op elsewhere)."""
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _file_mode(path):
+    """Mode for a rewrite of ``path``: the existing one, else umask default."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write(path, write, binary=False):
+    """Write ``path`` crash-safe: ``write(f)`` into a temp file, fsync, rename.
+
+    The file keeps its permissions; a new one gets the umask default.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    mode = _file_mode(path)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        if binary:
+            f = os.fdopen(fd, "wb")
+        else:
+            f = os.fdopen(fd, "w", newline="", encoding="utf-8")
+        with f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; keep the target's permissions.
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def atomic_write_rows(path, rows):
+    """Write ``rows`` to ``path`` crash-safe: temp file, fsync, rename.
+
+    Either the old or the new file content survives a crash, never a
+    half-written file.
+    """
+    atomic_write(path, lambda f: csv.writer(f, delimiter=";").writerows(rows))
+
+
+def atomic_write_text(path, text):
+    """Like :func:`atomic_write_rows` for a plain text file."""
+    atomic_write(path, lambda f: f.write(text))
+
+
+def atomic_write_bytes(path, chunks):
+    """Like :func:`atomic_write_rows` for binary ``chunks``."""
+    atomic_write(path, lambda f: f.writelines(chunks), binary=True)
+
+
+def transaction_row(t, kategorie_id=None):
+    """Return the db.csv row for a single transaction (dict with ``ID``)."""
+    row = [t["Datum"], t["Kategorie"], f"{t['Betrag']:.2f}", t["ID"]]
+    if kategorie_id is not None:
+        row.append(kategorie_id)
+    return row
+
+
+def db_rows(firmenname, anfangsbestand, transaktionen, kategorie_ids=None):
+    """Yield the rows of the db.csv layout for the given state.
+
+    ``transaktionen`` is a :class:`~euer_store.TransactionStore`,
+    ``kategorie_ids`` the catalog ids of its categories, if any.
+    """
+    if firmenname:
+        yield ["Firma", firmenname]
+    yield ["Anfangsbestand", f"{anfangsbestand:.2f}"]
+    yield from transaktionen.csv_rows(kategorie_ids)
+
+
+def _parse_betrag(text):
+    return float(text.replace(",", "."))
+
+
+def _new_state(katalog=None):
+    return {
+        "firmenname": "",
+        "anfangsbestand": 0.0,
+        "transaktionen": TransactionStore(),
+        "katalog": katalog,
+        # (name, kategorie-id text) -> current catalog name
+        "kategorien": {},
+    }
+
+
+def _kategorie_name(state, row):
+    """Current catalog name of a booking row's category."""
+    schluessel = (row[1], row[4].strip() if len(row) > 4 else "")
+    name = state["kategorien"].get(schluessel)
+    if name is None:
+        kategorie_id = int(schluessel[1]) if schluessel[1].isdigit() else None
+        name = state["katalog"].aufloesen(kategorie_id, row[1]).name
+        state["kategorien"][schluessel] = name
+    return name
+
+
+def apply_row(row, state):
+    """Apply one db.csv or journal row to ``state``.
+
+    ``state`` is a dict with the keys ``firmenname``, ``anfangsbestand`` and
+    ``transaktionen`` (a :class:`~euer_store.TransactionStore`), see
+    :func:`_new_state`; with a ``katalog`` the categories are resolved
+    through it.
+    """
+    if not row:
+        return
+    key = row[0].strip().lower()
+    if key == "firma" and len(row) > 1:
+        state["firmenname"] = row[1].strip()
+    elif key == "anfangsbestand" and len(row) > 1:
+        try:
+            state["anfangsbestand"] = _parse_betrag(row[1])
+        except ValueError:
+            state["anfangsbestand"] = 0.0
+    elif key == "löschen" and len(row) > 1:
+        transaktionen = state["transaktionen"]
+        if row[1].startswith("#"):
+            try:
+                del transaktionen[transaktionen.position(int(row[1][1:]))]
+            except (ValueError, KeyError):
+                pass
+    elif key == "basis":
+        pass
+    elif len(row) >= 3:
+        try:
+            transaktionen = state["transaktionen"]
+            ordinal = transaktionen.ordinal(row[0])
+            cents = parse_cents(row[2])
+            row_id = int(row[3]) if len(row) > 3 and row[3].strip() else None
+        except ValueError:
+            return
+        if state.get("katalog") is None:
+            kategorie = row[1]
+        else:
+            kategorie = _kategorie_name(state, row)
+        transaktionen.append_values(ordinal, kategorie, cents, row_id)
+
+
+def _read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.reader(f, delimiter=";")
+
+
+def _read_rows_backwards(path, chunk_size=64 * 1024):
+    """Yield the rows of ``path`` from the last one to the first.
+
+    Reads fixed-size chunks from the end, so only the part of the file that
+    is actually consumed is touched.
+    """
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        rest = b""
+        while pos > 0:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + rest).split(b"\n")
+            rest = lines.pop(0)  # may start in the middle of a line
+            for line in reversed(lines):
+                if line.strip():
+                    yield _parse_line(line)
+        if rest.strip():
+            yield _parse_line(rest)
+
+
+def _parse_line(line):
+    text = line.decode("utf-8").rstrip("\r")
+    return next(csv.reader([text], delimiter=";"))
+
+
+def _is_transaction_row(row):
+    return (
+        len(row) >= 3
+        and row[0].strip().lower() not in ("firma", "anfangsbestand", "basis")
+    )
+
+
+def _has_id(row):
+    return len(row) > 3 and row[3].strip() != ""
+
+
+def open_storage(path, journal=True, katalog=None):
+    """Return the storage backend for ``path``, chosen by its extension.
+
+    ``*.sqlite``/``*.sqlite3``/``*.db`` open a
+    :class:`~euer_sqlite.SqliteStorage`, everything else a
+    :class:`CsvStorage`; both store the category ids of ``katalog``.
+    """
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        from euer_sqlite import SqliteStorage
+
+        return SqliteStorage(path, katalog)
+    return CsvStorage(path, journal=journal, katalog=katalog)
+
+
+class CsvStorage:
+    """db.csv storage with optional append-only journal.
+
+    Without journal every change rewrites the whole file (atomically). With
+    journal, changes are appended as single records and
+    :meth:`compact_in_background` folds them back into ``db.csv``. With
+    ``snapshot`` the binary snapshot is used and kept up to date. With a
+    ``katalog`` the rows carry the catalog id of their category.
+    """
+
+    def __init__(self, path, journal=True, compact_after=200, snapshot=True,
+                 katalog=None):
+        self.path = path
+        self.journal = journal
+        self.compact_after = compact_after
+        self.snapshot = snapshot
+        self.katalog = katalog
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.rotated_path = path + ROTATED_SUFFIX
+        self.snapshot_path = path + SNAPSHOT_SUFFIX
+        self.journal_records = 0
+        self._lock = threading.Lock()
+        self._compaction = None
+
+    # --- Lesen ---------------------------------------------------------
+    def _base_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return ["Basis", "0", "0", "0"]
+        return ["Basis", str(st.st_ino), str(st.st_size), str(st.st_mtime_ns)]
+
+    def _snapshot_oeffnen(self):
+        """The mapped snapshot if it matches db.csv, else ``None``."""
+        if not self.snapshot or not os.path.exists(self.path):
+            return None
+        stamp = tuple(int(teil) for teil in self._base_stamp()[1:])
+        return Snapshot.oeffnen(self.snapshot_path, stamp)
+
+    def _kategorie_ids(self, transaktionen):
+        """Catalog ids parallel to ``transaktionen.kategorien``, if any."""
+        if self.katalog is None:
+            return None
+        return [self.katalog.kategorie_id(name) for name in transaktionen.kategorien]
+
+    def _snapshot_aufloesen(self, snapshot, transaktionen):
+        """Give the categories read from ``snapshot`` their catalog names."""
+        if self.katalog is None:
+            return
+        namen = [
+            self.katalog.aufloesen(kategorie_id, name).name
+            for kategorie_id, name in zip(snapshot.kategorie_ids, snapshot.kategorien)
+        ]
+        if namen != transaktionen.kategorien:
+            transaktionen.kategorien_umbenennen(namen)
+
+    @gemessen("storage.snapshot")
+    def _snapshot_schreiben(self, firmenname, anfangsbestand, transaktionen,
+                            kategorie_ids=None):
+        """Write the snapshot of the db.csv just written or read."""
+        if not self.snapshot:
+            return
+        stamp = [int(teil) for teil in self._base_stamp()[1:]]
+        try:
+            atomic_write_bytes(
+                self.snapshot_path,
+                schnappschuss_bytes(
+                    stamp, firmenname, anfangsbestand, transaktionen, kategorie_ids
+                ),
+            )
+        except OSError:
+            # Only a cache: the next start parses db.csv again.
+            pass
+
+    def _journal_matches_base(self, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            first = next(csv.reader(f, delimiter=";"), None)
+        return first == self._base_stamp()
+
+    def _replay(self, path, state):
+        """Apply a journal file to ``state`` and return its record count."""
+        count = -1  # Basis-Zeile
+        for row in _read_rows(path):
+            apply_row(row, state)
+            count += 1
+        return max(count, 0)
+
+    @gemessen("storage.load_recent")
+    def load_recent(self):
+        """Return a quick preview ``(firmenname, anfangsbestand, transaktionen)``.
+
+        Only the header at the start of db.csv and the trailing period (the
+        month of the last booking) at its end are read, so the window can
+        show the current bookings before :meth:`load` has streamed the whole
+        history. Journaled bookings and deletes are only previewed if the
+        previewed rows carry their stored ids, so that every delete in the
+        journal hits the right row; otherwise only Firma and Anfangsbestand
+        are taken from the journal.
+        """
+        state = _new_state(self.katalog)
+        ohne_ids = False
+        snapshot = self._snapshot_oeffnen()
+        if snapshot is not None:
+            with snapshot:
+                state["firmenname"] = snapshot.firmenname
+                state["anfangsbestand"] = snapshot.anfangsbestand
+                state["transaktionen"] = snapshot.transaktionen(
+                    snapshot.start_letzter_monat()
+                )
+                self._snapshot_aufloesen(snapshot, state["transaktionen"])
+        elif os.path.exists(self.path):
+            for row in _read_rows(self.path):
+                if _is_transaction_row(row):
+                    break
+                apply_row(row, state)
+
+            recent = []
+            period = None
+            for row in _read_rows_backwards(self.path):
+                if not _is_transaction_row(row):
+                    break
+                if period is None:
+                    period = row[0][:7]
+                elif row[0][:7] != period:
+                    break
+                recent.append(row)
+            ohne_ids = not all(map(_has_id, recent))
+            for row in reversed(recent):
+                apply_row(row, state)
+
+        journal_rows = []
+        for path in (self.rotated_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+            if path == self.rotated_path and not self._journal_matches_base(path):
+                continue
+            journal_rows.extend(_read_rows(path))
+        unresolved_deletes = ohne_ids and any(
+            row and row[0] == "Löschen" for row in journal_rows
+        )
+        for row in journal_rows:
+            # Deletes against synthetic preview ids would hit the wrong rows.
+            if unresolved_deletes and (
+                _is_transaction_row(row) or (row and row[0] == "Löschen")
+            ):
+                continue
+            apply_row(row, state)
+
+        return state["firmenname"], state["anfangsbestand"], state["transaktionen"]
+
+    @gemessen("storage.load")
+    def load(self):
+        """Return ``(firmenname, anfangsbestand, transaktionen)``.
+
+        Takes the columns from the snapshot if it matches db.csv, else
+        streams db.csv row by row and writes a new snapshot. Pending
+        journals are replayed on top. A rotated journal whose compaction
+        already reached db.csv is stale and gets removed.
+        """
+        state = _new_state(self.katalog)
+        with self._lock:
+            snapshot = self._snapshot_oeffnen()
+            if snapshot is not None:
+                with snapshot:
+                    state["firmenname"] = snapshot.firmenname
+                    state["anfangsbestand"] = snapshot.anfangsbestand
+                    state["transaktionen"] = snapshot.transaktionen()
+                    self._snapshot_aufloesen(snapshot, state["transaktionen"])
+            elif os.path.exists(self.path):
+                for row in _read_rows(self.path):
+                    apply_row(row, state)
+                transaktionen = state["transaktionen"]
+                self._snapshot_schreiben(
+                    state["firmenname"], state["anfangsbestand"], transaktionen,
+                    self._kategorie_ids(transaktionen),
+                )
+
+            self.journal_records = 0
+            if os.path.exists(self.rotated_path):
+                if self._journal_matches_base(self.rotated_path):
+                    self.journal_records += self._replay(self.rotated_path, state)
+                else:
+                    os.remove(self.rotated_path)
+            if os.path.exists(self.journal_path):
+                self.journal_records += self._replay(self.journal_path, state)
+                if not self._journal_matches_base(self.journal_path):
+                    self._restamp_journal()
+
+        return state["firmenname"], state["anfangsbestand"], state["transaktionen"]
+
+    # --- Schreiben -----------------------------------------------------
+    def _append_record(self, row):
+        self._append_records([row])
+
+    def _append_records(self, rows):
+        """Append ``rows`` to the journal with a single fsync."""
+        with self._lock:
+            new_file = not os.path.exists(self.journal_path)
+            with open(self.journal_path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, delimiter=";")
+                if new_file:
+                    writer.writerow(self._base_stamp())
+                count = 0
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+            self.journal_records += count
+
+    def _restamp_journal(self):
+        """Point the current journal at the current db.csv (lock held)."""
+        rows = list(_read_rows(self.journal_path))[1:]
+        atomic_write_rows(self.journal_path, [self._base_stamp(), *rows])
+
+    @gemessen("storage.add")
+    def add(self, transaktion, state):
+        """Persist a newly appended transaction.
+
+        ``state`` is a zero-argument callable returning the full
+        ``(firmenname, anfangsbestand, transaktionen)`` state, only used
+        when the journal is disabled.
+        """
+        if self.journal:
+            kategorie_id = None
+            if self.katalog is not None:
+                kategorie_id = self.katalog.kategorie_id(transaktion["Kategorie"])
+            self._append_record(transaction_row(transaktion, kategorie_id))
+        else:
+            self.rewrite(*state())
+
+    @gemessen("storage.add_many")
+    def add_many(self, neue, state):
+        """Persist a batch of appended transactions in one write.
+
+        ``neue`` is a :class:`~euer_store.TransactionStore` holding just the
+        new bookings with their final ids (see ``TransactionStore.copy``).
+        """
+        if self.journal:
+            self._append_records(neue.csv_rows(self._kategorie_ids(neue)))
+        else:
+            self.rewrite(*state())
+
+    @gemessen("storage.delete")
+    def delete(self, row_id, state):
+        """Persist the removal of the transaction with id ``row_id``."""
+        if self.journal:
+            self._append_record(["Löschen", f"#{row_id}"])
+        else:
+            self.rewrite(*state())
+
+    @gemessen("storage.delete_many")
+    def delete_many(self, row_ids, state):
+        """Persist the removal of several transactions in one write."""
+        if self.journal:
+            self._append_records(["Löschen", f"#{row_id}"] for row_id in row_ids)
+        else:
+            self.rewrite(*state())
+
+    @gemessen("storage.set_firma")
+    def set_firma(self, firmenname, state):
+        if self.journal:
+            self._append_record(["Firma", firmenname])
+        else:
+            self.rewrite(*state())
+
+    @gemessen("storage.set_anfangsbestand")
+    def set_anfangsbestand(self, anfangsbestand, state):
+        if self.journal:
+            self._append_record(["Anfangsbestand", f"{anfangsbestand:.2f}"])
+        else:
+            self.rewrite(*state())
+
+    @gemessen("storage.rewrite")
+    def rewrite(self, firmenname, anfangsbestand, transaktionen):
+        """Replace db.csv with the given state and drop all journals."""
+        self.wait_for_compaction()
+        kategorie_ids = self._kategorie_ids(transaktionen)
+        with self._lock:
+            if os.path.exists(self.journal_path):
+                os.replace(self.journal_path, self.rotated_path)
+            atomic_write_rows(
+                self.path,
+                db_rows(firmenname, anfangsbestand, transaktionen, kategorie_ids),
+            )
+            self._snapshot_schreiben(
+                firmenname, anfangsbestand, transaktionen, kategorie_ids
+            )
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+            self.journal_records = 0
+
+    # --- Kompaktierung -------------------------------------------------
+    def needs_compaction(self):
+        return (
+            self.journal
+            and self.journal_records >= self.compact_after
+            and self._compaction is None
+        )
+
+    def compact_in_background(self, firmenname, anfangsbestand, transaktionen):
+        """Fold the journal into db.csv on a worker thread.
+
+        Must be called with the state that matches everything journaled so
+        far; records appended afterwards go to a fresh journal and survive
+        the compaction.
+        """
+        if self._compaction is not None:
+            return
+        with self._lock:
+            if not os.path.exists(self.journal_path):
+                return
+            os.replace(self.journal_path, self.rotated_path)
+            self.journal_records = 0
+        stand = (
+            firmenname, anfangsbestand, transaktionen.copy(),
+            self._kategorie_ids(transaktionen),
+        )
+        self._compaction = threading.Thread(
+            target=self._compact, args=(stand,), name="db-kompaktierung", daemon=True
+        )
+        self._compaction.start()
+
+    @gemessen("storage.kompaktieren")
+    def _compact(self, stand):
+        try:
+            try:
+                atomic_write_rows(self.path, db_rows(*stand))
+            except OSError:
+                # db.csv is unchanged, so the rotated journal is still live.
+                # Merge it back in front of the current journal for a retry.
+                with self._lock:
+                    self._restore_rotated()
+                return
+            with self._lock:
+                os.remove(self.rotated_path)
+                if os.path.exists(self.journal_path):
+                    self._restamp_journal()
+            # rewrite() waits for this thread, so db.csv cannot change meanwhile.
+            self._snapshot_schreiben(*stand)
+        finally:
+            self._compaction = None
+
+    def _restore_rotated(self):
+        """Merge the rotated journal back into the current one (lock held)."""
+        rows = list(_read_rows(self.rotated_path))
+        if os.path.exists(self.journal_path):
+            rows.extend(list(_read_rows(self.journal_path))[1:])
+        atomic_write_rows(self.journal_path, rows)
+        os.remove(self.rotated_path)
+        self.journal_records = len(rows) - 1
+
+    def wait_for_compaction(self):
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+    def close(self):
+        self.wait_for_compaction()
+
+    # --- Abfragen ------------------------------------------------------
+    def kassenbestand_cents(self, ordinal):
+        """Not available for db.csv without loading the whole history."""
+        return None
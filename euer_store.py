@@ -0,0 +1,354 @@
+"""Kompakter, spaltenorientierter Speicher für Transaktionen.
+
+Statt einer Liste von Dicts liegen die Buchungen in drei parallelen
+``array``-Spalten: Datum als Ordinalzahl, Kategorie als Code in eine
+Tabelle internierter Kategorienamen und Betrag in ganzen Cent. Eine Buchung
+belegt so 16 Byte statt mehrerer hundert.
+
+Die bisherigen Aufrufer arbeiten unverändert weiter: ``store[i]``, Iteration
+und ``pop`` liefern Dicts mit ``ID``, ``Datum``, ``Kategorie`` und ``Betrag``.
+
+Jede Zeile trägt außerdem eine stabile, aufsteigende ID, die mit gespeichert
+wird (vierte Spalte in db.csv). Ansichten, Importe und das Löschen beziehen
+sich auf diese ID statt auf die Listenposition; die Position einer ID findet
+:meth:`TransactionStore.position` per Binärsuche. Über die IDs laufen auch
+die Datums- und Kategorie-Indizes (:mod:`euer_index`), die beim ersten
+:meth:`TransactionStore.query_ids` aufgebaut und danach mitgeführt werden.
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import date
+
+from euer_index import DateCategoryIndex
+
+
+def parse_cents(text):
+    """Parse ``"294.10"`` or ``"294,10"`` into integer cents."""
+    return round(float(text.replace(",", ".")) * 100)
+
+
+def cents_to_text(cents):
+    """Format cents like ``f"{betrag:.2f}"`` without going through float."""
+    sign = "-" if cents < 0 else ""
+    cents = abs(cents)
+    return f"{sign}{cents // 100}.{cents % 100:02d}"
+
+
+class TransactionStore:
+    """Columnar list of bookings behind the familiar list-of-dicts API."""
+
+    def __init__(self, rows=()):
+        self._datum = array("i")
+        self._kategorie = array("I")
+        self._cents = array("q")
+        self._ids = array("I")
+        self._next_id = 0
+        self._index = None
+        self.kategorien = []
+        self._codes = {}
+        self._iso = {}
+        self._ordinals = {}
+        for t in rows:
+            self.append(t)
+
+    # --- Spalten -------------------------------------------------------
+    @property
+    def datum_ordinals(self):
+        """Date column as ``array('i')`` of ``date.toordinal()`` values."""
+        return self._datum
+
+    @property
+    def kategorie_codes(self):
+        """Category column as ``array('I')`` of codes into :attr:`kategorien`."""
+        return self._kategorie
+
+    @property
+    def cents(self):
+        """Amount column as ``array('q')`` of signed cents."""
+        return self._cents
+
+    @property
+    def ids(self):
+        """Row id column as ascending ``array('I')``."""
+        return self._ids
+
+    @property
+    def next_id(self):
+        """Id the next appended booking gets."""
+        return self._next_id
+
+    @classmethod
+    def from_columns(cls, datum, kategorie, cents, ids, kategorien, next_id=None):
+        """Build a store around finished columns, e.g. from a snapshot.
+
+        The columns are taken over, not copied; ``kategorie`` holds codes
+        into ``kategorien``.
+        """
+        store = cls()
+        store._datum, store._kategorie, store._cents, store._ids = (
+            datum, kategorie, cents, ids
+        )
+        store.kategorien = list(kategorien)
+        store._codes = {name: code for code, name in enumerate(store.kategorien)}
+        if next_id is None:
+            next_id = ids[-1] + 1 if len(ids) else 0
+        store._next_id = next_id
+        return store
+
+    def kategorie_code(self, name):
+        """Return the interned code of ``name``, adding it if needed."""
+        code = self._codes.get(name)
+        if code is None:
+            code = len(self.kategorien)
+            self.kategorien.append(name)
+            self._codes[name] = code
+        return code
+
+    def ordinal(self, datum):
+        """Return the ordinal of an ISO date string (cached per day)."""
+        ordinal = self._ordinals.get(datum)
+        if ordinal is None:
+            ordinal = date.fromisoformat(datum).toordinal()
+            self._ordinals[datum] = ordinal
+            self._iso.setdefault(ordinal, datum)
+        return ordinal
+
+    def iso_datum(self, ordinal):
+        text = self._iso.get(ordinal)
+        if text is None:
+            text = self._iso[ordinal] = date.fromordinal(ordinal).isoformat()
+        return text
+
+    # --- Zeilen-IDs und Indizes ---------------------------------------
+    def row_id(self, idx):
+        """Stable id of the row at position ``idx``."""
+        return self._ids[idx]
+
+    def get(self, row_id):
+        """Return the booking with id ``row_id`` as a dict."""
+        return self._row(self.position(row_id))
+
+    def pop_id(self, row_id):
+        """Remove the booking with id ``row_id`` and return it as a dict."""
+        return self.pop(self.position(row_id))
+
+    def position(self, row_id):
+        """Current position of ``row_id`` (ids are kept in ascending order)."""
+        idx = bisect_left(self._ids, row_id)
+        if idx == len(self._ids) or self._ids[idx] != row_id:
+            raise KeyError(row_id)
+        return idx
+
+    def rank(self, row_id):
+        """Number of rows whose id is smaller than ``row_id``."""
+        return bisect_left(self._ids, row_id)
+
+    def query_ids(self, von=None, bis=None, kategorie=None):
+        """Ids of the bookings between the ordinals ``von`` and ``bis``.
+
+        Both bounds are inclusive and optional; ``kategorie`` restricts the
+        result to one category. The ids come in date order.
+        """
+        code = None
+        if kategorie is not None:
+            code = self._codes.get(kategorie)
+            if code is None:
+                return []
+        if self._index is None:
+            self._index = DateCategoryIndex.build(
+                self._datum, self._kategorie, self._ids
+            )
+        return self._index.row_ids(von, bis, code)
+
+    # --- Zeilen --------------------------------------------------------
+    def append_values(self, ordinal, kategorie, cents, row_id=None):
+        """Append a booking without building an intermediate dict.
+
+        A stored ``row_id`` keeps its place: ids larger than all so far are
+        appended, smaller ones (e.g. restored by an undo) are inserted where
+        they belong. A duplicate id gets a new one. Returns the id.
+        """
+        code = self.kategorie_code(kategorie)
+        if row_id is None:
+            row_id = self._next_id
+        elif row_id < self._next_id:
+            idx = bisect_left(self._ids, row_id)
+            if idx == len(self._ids) or self._ids[idx] != row_id:
+                self._insert_at(idx, ordinal, code, cents, row_id)
+                return row_id
+            row_id = self._next_id
+        self._next_id = row_id + 1
+        self._datum.append(ordinal)
+        self._kategorie.append(code)
+        self._cents.append(cents)
+        self._ids.append(row_id)
+        if self._index is not None:
+            self._index.add(ordinal, code, row_id)
+        return row_id
+
+    def append(self, t):
+        return self.append_values(
+            self.ordinal(t["Datum"]),
+            t["Kategorie"],
+            round(t["Betrag"] * 100),
+            t.get("ID"),
+        )
+
+    def extend(self, other):
+        """Append all bookings of another store (they get new ids)."""
+        kategorien = other.kategorien
+        for ordinal, code, cents in zip(other._datum, other._kategorie, other._cents):
+            self.append_values(ordinal, kategorien[code], cents)
+
+    def insert(self, idx, t, row_id=None):
+        """Insert a booking at ``idx``.
+
+        Rows in the middle need the ``row_id`` they had before (see
+        :meth:`row_id`, or the ``ID`` of a popped row), e.g. to undo a
+        :meth:`pop`, so that the ids stay in ascending order.
+        """
+        if idx < 0:
+            idx = max(0, len(self) + idx)
+        idx = min(idx, len(self))
+        if row_id is None:
+            row_id = t.get("ID")
+        if row_id is None:
+            if idx < len(self):
+                raise ValueError("insert in the middle needs the original row_id")
+            row_id = self._next_id
+        self._insert_at(
+            idx,
+            self.ordinal(t["Datum"]),
+            self.kategorie_code(t["Kategorie"]),
+            round(t["Betrag"] * 100),
+            row_id,
+        )
+
+    def _insert_at(self, idx, ordinal, code, cents, row_id):
+        self._datum.insert(idx, ordinal)
+        self._kategorie.insert(idx, code)
+        self._cents.insert(idx, cents)
+        self._ids.insert(idx, row_id)
+        self._next_id = max(self._next_id, row_id + 1)
+        if self._index is not None:
+            self._index.add(ordinal, code, row_id)
+
+    def _row(self, idx):
+        return {
+            "ID": self._ids[idx],
+            "Datum": self.iso_datum(self._datum[idx]),
+            "Kategorie": self.kategorien[self._kategorie[idx]],
+            "Betrag": self._cents[idx] / 100,
+        }
+
+    def __len__(self):
+        return len(self._cents)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._row(i) for i in range(*idx.indices(len(self)))]
+        return self._row(idx)
+
+    def __iter__(self):
+        kategorien = self.kategorien
+        iso_datum = self.iso_datum
+        for row_id, ordinal, code, cents in zip(
+            self._ids, self._datum, self._kategorie, self._cents
+        ):
+            yield {
+                "ID": row_id,
+                "Datum": iso_datum(ordinal),
+                "Kategorie": kategorien[code],
+                "Betrag": cents / 100,
+            }
+
+    def __delitem__(self, idx):
+        if self._index is not None:
+            if isinstance(idx, slice):
+                self._index = None
+            else:
+                self._index.remove(self._datum[idx], self._kategorie[idx], self._ids[idx])
+        del self._datum[idx]
+        del self._kategorie[idx]
+        del self._cents[idx]
+        del self._ids[idx]
+
+    def pop(self, idx=-1):
+        row = self._row(idx)
+        del self[idx]
+        return row
+
+    def csv_rows(self, kategorie_ids=None):
+        """Yield the db.csv rows of all bookings, the id in the fourth column.
+
+        ``kategorie_ids`` (parallel to :attr:`kategorien`) adds the catalog
+        id of each booking's category as a fifth column.
+        """
+        kategorien = self.kategorien
+        iso_datum = self.iso_datum
+        zeilen = zip(self._ids, self._datum, self._kategorie, self._cents)
+        if kategorie_ids is None:
+            for row_id, ordinal, code, cents in zeilen:
+                yield [iso_datum(ordinal), kategorien[code], cents_to_text(cents), row_id]
+        else:
+            for row_id, ordinal, code, cents in zeilen:
+                yield [
+                    iso_datum(ordinal), kategorien[code], cents_to_text(cents),
+                    row_id, kategorie_ids[code],
+                ]
+
+    def kategorien_umbenennen(self, namen):
+        """Give the categories new names (``namen`` parallel to :attr:`kategorien`).
+
+        Categories that end up with the same name are merged into one code.
+        """
+        neue_codes = []
+        kategorien = []
+        codes = {}
+        for name in namen:
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(kategorien)
+                kategorien.append(name)
+            neue_codes.append(code)
+        if len(kategorien) < len(self.kategorien):
+            self._kategorie = array("I", (neue_codes[code] for code in self._kategorie))
+            self._index = None
+        self.kategorien = kategorien
+        self._codes = codes
+
+    def copy(self, start=0):
+        """Return an independent snapshot (array copies, no per-row objects).
+
+        With ``start`` only the rows from that position on are copied, ids
+        included.
+        """
+        other = TransactionStore()
+        other._datum = self._datum[start:]
+        other._kategorie = self._kategorie[start:]
+        other._cents = self._cents[start:]
+        other._ids = self._ids[start:]
+        other._next_id = self._next_id
+        other.kategorien = list(self.kategorien)
+        other._codes = dict(self._codes)
+        other._iso = dict(self._iso)
+        return other
+
+    # --- Summen --------------------------------------------------------
+    def einnahmen_cents(self):
+        return sum(filter((0).__lt__, self._cents))
+
+    def ausgaben_cents(self):
+        """Sum of all expenses as a positive number of cents."""
+        return -sum(filter((0).__gt__, self._cents))
+
+    def summe_cents(self):
+        return sum(self._cents)
+
+    def nbytes(self):
+        """Approximate memory used by the columns."""
+        return sum(
+            col.itemsize * len(col)
+            for col in (self._datum, self._kategorie, self._cents, self._ids)
+        )
@@ -0,0 +1,210 @@
+"""Zeitmessung der heißen Pfade: Speichern, Liste, Summen, Export.
+
+Gemessen wird mit :func:`messung` (Kontextmanager) oder :func:`gemessen`
+(Decorator) unter einem Namen wie ``"storage.add"``. Solange die Messung
+aus ist (Standard), liefert :func:`messung` ein geteiltes Objekt ohne
+Wirkung und eine gemessene Funktion prüft nur ein Flag; die Kosten liegen
+bei einem Funktionsaufruf.
+
+Eingeschaltet (:func:`aktivieren`) landet jede Dauer in einem
+:class:`Histogramm` je Name mit logarithmischen Klassen (acht je
+Verdopplung, also auf etwa 9 % genau). Daraus kommen p50, p95 und das
+exakte Maximum bei konstantem Speicher, egal wie oft gemessen wurde.
+:func:`letzte` liefert die jüngsten Messungen für die Anzeige im Fenster.
+
+:func:`profil_naechste` lässt die nächste äußerste Messung des
+Hauptthreads unter cProfile laufen und schreibt das Profil als ``.prof``
+(auszuwerten mit ``pstats`` oder ``snakeviz``).
+"""
+
+import cProfile
+import functools
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+STUFEN = 8
+LETZTE = 20
+
+_aktiv = False
+_lock = threading.Lock()
+_histogramme = {}
+_letzte = deque(maxlen=LETZTE)
+_tiefe = threading.local()
+# (name or None for any action, directory) while a profile is requested
+_profil_auftrag = None
+_letztes_profil = None
+
+
+class Histogramm:
+    """Log-bucketed durations with count, sum and exact maximum."""
+
+    def __init__(self):
+        self.anzahl = 0
+        self.summe = 0.0
+        self.max = 0.0
+        self._eimer = {}
+
+    def add(self, sekunden):
+        self.anzahl += 1
+        self.summe += sekunden
+        if sekunden > self.max:
+            self.max = sekunden
+        eimer = int(math.log2(max(sekunden, 1e-9) * 1e9) * STUFEN)
+        self._eimer[eimer] = self._eimer.get(eimer, 0) + 1
+
+    def quantil(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile, in seconds."""
+        if not self.anzahl:
+            return 0.0
+        rang = q * self.anzahl
+        summe = 0
+        for eimer in sorted(self._eimer):
+            summe += self._eimer[eimer]
+            if summe >= rang:
+                return min(2 ** ((eimer + 1) / STUFEN) / 1e9, self.max)
+        return self.max
+
+
+def aktivieren(an=True):
+    global _aktiv
+    _aktiv = an
+
+
+def ist_aktiv():
+    return _aktiv
+
+
+def zuruecksetzen():
+    with _lock:
+        _histogramme.clear()
+        _letzte.clear()
+
+
+def _merken(name, sekunden):
+    with _lock:
+        histogramm = _histogramme.get(name)
+        if histogramm is None:
+            histogramm = _histogramme[name] = Histogramm()
+        histogramm.add(sekunden)
+        _letzte.append((name, sekunden))
+
+
+class _Aus:
+    """Shared no-op context manager while measuring is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_AUS = _Aus()
+
+
+class _Messung:
+    def __init__(self, name):
+        self.name = name
+        self._profil = None
+
+    def __enter__(self):
+        global _profil_auftrag
+        tiefe = getattr(_tiefe, "wert", 0)
+        _tiefe.wert = tiefe + 1
+        # cProfile only sees its own thread; the request is meant for the
+        # next action in the GUI, not for whatever a loader thread does.
+        if (
+            tiefe == 0
+            and _profil_auftrag is not None
+            and threading.current_thread() is threading.main_thread()
+        ):
+            with _lock:
+                auftrag = _profil_auftrag
+                if auftrag is not None and auftrag[0] in (None, self.name):
+                    _profil_auftrag = None
+                    self._profil = (cProfile.Profile(), auftrag[1])
+            if self._profil is not None:
+                self._profil[0].enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _letztes_profil
+        dauer = time.perf_counter() - self._start
+        _tiefe.wert -= 1
+        if self._profil is not None:
+            profil, verzeichnis = self._profil
+            profil.disable()
+            stempel = datetime.now().strftime("%Y%m%d-%H%M%S")
+            pfad = os.path.join(verzeichnis, f"profil-{self.name}-{stempel}.prof")
+            profil.dump_stats(pfad)
+            _letztes_profil = pfad
+        _merken(self.name, dauer)
+        return False
+
+
+def messung(name):
+    """``with messung("storage.add"): ...`` records the block's duration."""
+    return _Messung(name) if _aktiv else _AUS
+
+
+def gemessen(name):
+    """Decorator form of :func:`messung`."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _aktiv:
+                return func(*args, **kwargs)
+            with _Messung(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def profil_naechste(name=None, verzeichnis="."):
+    """Profile the next outermost measured action (of ``name``, if given).
+
+    Only actions on the main thread are profiled. Turns measuring on.
+    :func:`letztes_profil` returns the path of the written profile.
+    """
+    global _profil_auftrag
+    aktivieren()
+    with _lock:
+        _profil_auftrag = (name, verzeichnis)
+
+
+def letztes_profil():
+    return _letztes_profil
+
+
+def statistik():
+    """``[(name, anzahl, p50, p95, max)]`` in seconds, sorted by name."""
+    with _lock:
+        return [
+            (name, h.anzahl, h.quantil(0.5), h.quantil(0.95), h.max)
+            for name, h in sorted(_histogramme.items())
+        ]
+
+
+def letzte(anzahl=LETZTE):
+    """The most recent ``(name, sekunden)`` measurements, newest first."""
+    with _lock:
+        return list(_letzte)[::-1][:anzahl]
+
+
+def bericht():
+    """Text table of :func:`statistik` in milliseconds."""
+    zeilen = [f"{'Operation':<24} {'n':>6} {'p50':>9} {'p95':>9} {'max':>9}"]
+    for name, anzahl, p50, p95, maximum in statistik():
+        zeilen.append(
+            f"{name:<24} {anzahl:>6} {p50 * 1000:>7.1f}ms {p95 * 1000:>7.1f}ms"
+            f" {maximum * 1000:>7.1f}ms"
+        )
+    return "\n".join(zeilen)
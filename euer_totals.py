@@ -0,0 +1,169 @@
+"""Inkrementell gepflegte Summen und laufender Kassenbestand.
+
+:class:`Totals` wird beim Laden einmal aus dem
+:class:`~euer_store.TransactionStore` aufgebaut und danach bei jedem
+Hinzufügen oder Löschen in O(1) nachgeführt (Tag, Monat, Kategorie). Der
+Kassenbestand zu einem beliebigen Datum kommt aus einem Fenwick-Baum über
+die Tage und kostet O(log Tage).
+"""
+
+from datetime import date
+
+from euer_timing import gemessen
+
+
+class _DaySums:
+    """Fenwick tree of net cents per day for prefix sums up to a date."""
+
+    def __init__(self, net=None):
+        self._base = 0
+        self._tree = [0]
+        self._net = {}
+        if net:
+            self._net = net
+            self._rebuild()
+
+    def add(self, ordinal, cents):
+        self._net[ordinal] = self._net.get(ordinal, 0) + cents
+        size = len(self._tree) - 1
+        if not self._base <= ordinal < self._base + size:
+            self._rebuild()
+            return
+        i = ordinal - self._base + 1
+        tree = self._tree
+        while i <= size:
+            tree[i] += cents
+            i += i & -i
+
+    def prefix(self, ordinal):
+        """Net cents of all days up to and including ``ordinal``."""
+        size = len(self._tree) - 1
+        i = min(ordinal - self._base + 1, size)
+        total = 0
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _rebuild(self):
+        first, last = min(self._net), max(self._net)
+        # Leave a year of headroom on both sides so that bookings on
+        # neighbouring days don't trigger another rebuild.
+        self._base = first - 366
+        size = last - self._base + 1 + 366
+        tree = [0] * (size + 1)
+        for ordinal, cents in self._net.items():
+            tree[ordinal - self._base + 1] += cents
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+
+class Totals:
+    """Einnahmen/Ausgaben per day, month and category plus Kassenbestand.
+
+    All amounts are integer cents. The per-key dicts map to
+    ``[einnahmen, ausgaben, anzahl]`` lists, ``ausgaben`` as a positive
+    number.
+    """
+
+    def __init__(self, anfangsbestand_cents=0):
+        self.anfangsbestand_cents = anfangsbestand_cents
+        self.einnahmen_cents = 0
+        self.ausgaben_cents = 0
+        self.per_tag = {}
+        self.per_monat = {}
+        self.per_kategorie = {}
+        self._monat_von_tag = {}
+        self._saldo = _DaySums()
+
+    @classmethod
+    @gemessen("totals.from_store")
+    def from_store(cls, transaktionen, anfangsbestand):
+        """Build the aggregates for a whole store in one pass.
+
+        Rows are first summed per day and category; the per-key tables and
+        the Fenwick tree are then filled from those few thousand groups.
+        """
+        totals = cls(round(anfangsbestand * 100))
+        gruppen = {}
+        for key, cents in zip(
+            zip(transaktionen.datum_ordinals, transaktionen.kategorie_codes),
+            transaktionen.cents,
+        ):
+            entry = gruppen.get(key)
+            if entry is None:
+                entry = gruppen[key] = [0, 0, 0]
+            if cents > 0:
+                entry[0] += cents
+            else:
+                entry[1] -= cents
+            entry[2] += 1
+
+        kategorien = transaktionen.kategorien
+        net = {}
+        for (ordinal, code), werte in gruppen.items():
+            for table, key in (
+                (totals.per_tag, ordinal),
+                (totals.per_monat, totals.monat(ordinal)),
+                (totals.per_kategorie, kategorien[code]),
+            ):
+                entry = table.get(key)
+                if entry is None:
+                    entry = table[key] = [0, 0, 0]
+                for i, wert in enumerate(werte):
+                    entry[i] += wert
+            totals.einnahmen_cents += werte[0]
+            totals.ausgaben_cents += werte[1]
+            net[ordinal] = net.get(ordinal, 0) + werte[0] - werte[1]
+        totals._saldo = _DaySums(net)
+        return totals
+
+    @property
+    def gewinn_cents(self):
+        return self.einnahmen_cents - self.ausgaben_cents
+
+    @property
+    def endbestand_cents(self):
+        return self.anfangsbestand_cents + self.gewinn_cents
+
+    def monat(self, ordinal):
+        """Return the ``(year, month)`` key of a day ordinal."""
+        key = self._monat_von_tag.get(ordinal)
+        if key is None:
+            tag = date.fromordinal(ordinal)
+            key = self._monat_von_tag[ordinal] = (tag.year, tag.month)
+        return key
+
+    def add(self, ordinal, kategorie, cents):
+        self._apply(ordinal, kategorie, cents, 1)
+
+    def remove(self, ordinal, kategorie, cents):
+        self._apply(ordinal, kategorie, cents, -1)
+
+    def _apply(self, ordinal, kategorie, cents, sign):
+        einnahme = cents if cents > 0 else 0
+        ausgabe = -cents if cents < 0 else 0
+        self.einnahmen_cents += sign * einnahme
+        self.ausgaben_cents += sign * ausgabe
+        for table, key in (
+            (self.per_tag, ordinal),
+            (self.per_monat, self.monat(ordinal)),
+            (self.per_kategorie, kategorie),
+        ):
+            entry = table.get(key)
+            if entry is None:
+                entry = table[key] = [0, 0, 0]
+            entry[0] += sign * einnahme
+            entry[1] += sign * ausgabe
+            entry[2] += sign
+            if entry[2] == 0:
+                del table[key]
+        self._saldo.add(ordinal, sign * cents)
+
+    def kassenbestand(self, ordinal):
+        """Cash balance at the end of the day ``ordinal`` in cents."""
+        return self.anfangsbestand_cents + self._saldo.prefix(ordinal)
@@ -0,0 +1,91 @@
+"""Rückgängig/Wiederholen über ein Operationsprotokoll.
+
+Jede Änderung wird als kleine :class:`Operation` protokolliert, nicht als
+Kopie der ganzen Liste: hinzugefügte oder gelöschte Buchungen als Tupel
+``(id, ordinal, kategorie, cents)``, geänderte Kopfwerte als
+``(alt, neu)``. Der Speicherbedarf wächst so nur mit den Änderungen, nicht
+mit der Größe des Buchs. Die Historie gilt für die ganze Sitzung und über
+Firmenwechsel hinweg; jede Operation kennt die Datenbank (``datei``) der
+Firma, auf die sie sich bezieht.
+
+Arten und ihre ``daten``:
+
+``hinzufuegen`` / ``loeschen``
+    Tupel der betroffenen Buchungszeilen.
+``anfangsbestand`` / ``firma``
+    ``(alt, neu)``.
+``neue_firma``
+    ``(vorherige_datei, eintrag, position)`` aus firmen.json; rückgängig
+    gemacht wird zur vorherigen Firma gewechselt und die neue ausgetragen
+    (ihre Dateien bleiben erhalten).
+"""
+
+from collections import namedtuple
+
+from euer_store import TransactionStore
+
+Operation = namedtuple("Operation", "art datei daten")
+
+
+def store_zeilen(transaktionen, start=0):
+    """Rows of ``transaktionen`` from ``start`` on as undo tuples."""
+    kategorien = transaktionen.kategorien
+    return tuple(
+        (row_id, ordinal, kategorien[code], cents)
+        for row_id, ordinal, code, cents in zip(
+            transaktionen.ids[start:],
+            transaktionen.datum_ordinals[start:],
+            transaktionen.kategorie_codes[start:],
+            transaktionen.cents[start:],
+        )
+    )
+
+
+def zeilen_store(zeilen):
+    """Build a :class:`~euer_store.TransactionStore` from undo tuples."""
+    store = TransactionStore()
+    for row_id, ordinal, kategorie, cents in sorted(zeilen):
+        store.append_values(ordinal, kategorie, cents, row_id)
+    return store
+
+
+def beschreibung(op):
+    """Short German description for the status line."""
+    if op.art in ("hinzufuegen", "loeschen"):
+        anzahl = len(op.daten)
+        was = "Buchung" if anzahl == 1 else f"{anzahl} Buchungen"
+        return f"{was} {'hinzugefügt' if op.art == 'hinzufuegen' else 'gelöscht'}"
+    if op.art == "anfangsbestand":
+        return "Anfangsbestand geändert"
+    if op.art == "firma":
+        return "Firmenname geändert"
+    if op.art == "neue_firma":
+        return "Neuer Umsatz angelegt"
+    return op.art
+
+
+class UndoLog:
+    """Unlimited undo and redo stacks of :class:`Operation` entries."""
+
+    def __init__(self):
+        self._undo = []
+        self._redo = []
+
+    def record(self, op):
+        """Log a new operation; this discards everything that could be redone."""
+        self._undo.append(op)
+        self._redo.clear()
+
+    def next_undo(self):
+        return self._undo[-1] if self._undo else None
+
+    def next_redo(self):
+        return self._redo[-1] if self._redo else None
+
+    def undone(self):
+        """The operation from :meth:`next_undo` was reverted."""
+        self._redo.append(self._undo.pop())
+
+    def redone(self):
+        """The operation from :meth:`next_redo` was applied again."""
+        self._undo.append(self._redo.pop())
@@ -0,0 +1,173 @@
+"""Arbeitsbereich mit mehreren Firmen, je Firma eine eigene Datenbank.
+
+``firmen.json`` listet die Firmen mit ihrer Datenbankdatei und merkt sich
+die zuletzt aktive. Die bisherige ``db.csv`` im Programmverzeichnis ist die
+erste Firma, jede weitere bekommt ein eigenes Verzeichnis unter
+``firmen/``. Gelöscht wird beim Wechseln oder Anlegen nichts.
+
+Geladene Firmen bleiben in einem LRU-Cache, damit das Zurückwechseln sofort
+geht. Der Cache ist nach Speicherbedarf begrenzt; die am längsten nicht
+benutzte Firma wird zuerst verworfen und bei Bedarf neu geladen.
+"""
+
+import json
+import os
+import re
+from collections import OrderedDict
+
+from euer_storage import atomic_write_text, open_storage
+
+INDEX_DATEI = "firmen.json"
+FIRMEN_VERZEICHNIS = "firmen"
+CACHE_BYTES = 64 * 1024 * 1024
+
+
+def _slug(name):
+    slug = re.sub(r"[^0-9A-Za-zÄÖÜäöüß]+", "_", name).strip("_")
+    return slug or "firma"
+
+
+class Workspace:
+    """The list of companies, their storages and the LRU cache of loaded data.
+
+    Companies are identified by their database path (``datei``). Cached
+    entries are opaque to the workspace; their size is given by the caller
+    when they are stored with :meth:`remember`.
+    """
+
+    def __init__(self, default_datei, index_path=INDEX_DATEI, journal=True,
+                 cache_bytes=CACHE_BYTES, katalog=None):
+        self.index_path = index_path
+        self.journal = journal
+        self.katalog = katalog
+        self.cache_bytes = cache_bytes
+        self._storages = {}
+        self._cache = OrderedDict()
+        self._cache_groesse = 0
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            self.firmen = index["firmen"]
+            self.aktiv = index["aktiv"]
+        except FileNotFoundError:
+            self.firmen = [{"name": "", "datei": default_datei}]
+            self.aktiv = default_datei
+
+    def _save(self):
+        atomic_write_text(
+            self.index_path,
+            json.dumps(
+                {"aktiv": self.aktiv, "firmen": self.firmen},
+                ensure_ascii=False,
+                indent=2,
+            ),
+        )
+
+    # --- Firmen --------------------------------------------------------
+    def name(self, datei):
+        for firma in self.firmen:
+            if firma["datei"] == datei:
+                return firma["name"]
+        raise KeyError(datei)
+
+    def rename(self, datei, name):
+        """Update the display name, e.g. after the Firma was edited."""
+        for firma in self.firmen:
+            if firma["datei"] == datei and firma["name"] != name:
+                firma["name"] = name
+                self._save()
+
+    def add_firma(self, name):
+        """Register a new company and return its database path.
+
+        The database uses the same backend (file extension) as the first
+        company and is created on the first write.
+        """
+        basis = os.path.basename(self.firmen[0]["datei"])
+        slug = _slug(name)
+        verzeichnis = os.path.join(FIRMEN_VERZEICHNIS, slug)
+        nummer = 2
+        while os.path.exists(verzeichnis):
+            verzeichnis = os.path.join(FIRMEN_VERZEICHNIS, f"{slug}_{nummer}")
+            nummer += 1
+        os.makedirs(verzeichnis)
+        datei = os.path.join(verzeichnis, basis)
+        self.firmen.append({"name": name, "datei": datei})
+        self._save()
+        return datei
+
+    def remove_firma(self, datei):
+        """Unregister a company, e.g. to undo :meth:`add_firma`.
+
+        Its files stay on disk. Returns ``(eintrag, position)`` for
+        :meth:`restore_firma`.
+        """
+        if datei == self.aktiv:
+            raise ValueError("die aktive Firma kann nicht entfernt werden")
+        for position, firma in enumerate(self.firmen):
+            if firma["datei"] == datei:
+                break
+        else:
+            raise KeyError(datei)
+        del self.firmen[position]
+        self.forget(datei)
+        storage = self._storages.pop(datei, None)
+        if storage is not None:
+            storage.close()
+        self._save()
+        return firma, position
+
+    def restore_firma(self, eintrag, position):
+        self.firmen.insert(position, eintrag)
+        self._save()
+
+    def set_aktiv(self, datei):
+        self.name(datei)  # KeyError for unknown companies
+        if datei != self.aktiv:
+            self.aktiv = datei
+            self._save()
+
+    def storage(self, datei):
+        """Return the (cached) storage backend of a company."""
+        storage = self._storages.get(datei)
+        if storage is None:
+            storage = self._storages[datei] = open_storage(
+                datei, journal=self.journal, katalog=self.katalog
+            )
+        return storage
+
+    def verzeichnis(self, datei):
+        """Directory of a company's files, e.g. for its exports."""
+        return os.path.dirname(datei) or "."
+
+    # --- Cache ---------------------------------------------------------
+    def cached(self, datei):
+        """Return the cached data of a company or ``None``."""
+        entry = self._cache.get(datei)
+        if entry is None:
+            return None
+        self._cache.move_to_end(datei)
+        return entry[0]
+
+    def remember(self, datei, daten, nbytes):
+        """Cache ``daten`` of a company and evict the least recently used.
+
+        An entry larger than the whole budget is not cached at all.
+        """
+        self.forget(datei)
+        if nbytes > self.cache_bytes:
+            return
+        self._cache[datei] = (daten, nbytes)
+        self._cache_groesse += nbytes
+        while self._cache_groesse > self.cache_bytes:
+            _, (_, groesse) = self._cache.popitem(last=False)
+            self._cache_groesse -= groesse
+
+    def forget(self, datei):
+        entry = self._cache.pop(datei, None)
+        if entry is not None:
+            self._cache_groesse -= entry[1]
+
+    def close(self):
+        for storage in self._storages.values():
+            storage.close()
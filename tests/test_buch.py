@@ -0,0 +1,33 @@
+import pytest
+
+from euer_buch import HistorieNichtGeladen, Kassenbuch
+from euer_storage import CsvStorage
+
+ZEILEN = [
+    "Firma;Test",
+    "Anfangsbestand;0.00",
+    "2025-10-30;⛽  Tankbeleg;-10.00;0",
+    "2025-11-01;⛽  Tankbeleg;-20.00;1",
+]
+
+
+def test_kopfwerte_erst_nach_vollstaendigem_laden(tmp_path):
+    db = tmp_path / "db.csv"
+    db.write_text("\n".join(ZEILEN) + "\n", encoding="utf-8")
+    inhalt = db.read_text(encoding="utf-8")
+    buch = Kassenbuch(CsvStorage(str(db), journal=False, snapshot=False))
+    buch.laden_vorschau()
+    assert len(buch.transaktionen) == 1
+
+    # Without journal this would rewrite db.csv from the preview alone.
+    with pytest.raises(HistorieNichtGeladen):
+        buch.anfangsbestand_setzen(10.0)
+    with pytest.raises(HistorieNichtGeladen):
+        buch.firma_setzen("Neu")
+    assert db.read_text(encoding="utf-8") == inhalt
+
+    buch.laden()
+    buch.anfangsbestand_setzen(10.0)
+    _, anfangsbestand, transaktionen = CsvStorage(str(db), snapshot=False).load()
+    assert anfangsbestand == 10.0
+    assert [t["Datum"] for t in transaktionen] == ["2025-10-30", "2025-11-01"]
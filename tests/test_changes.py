@@ -0,0 +1,88 @@
+from datetime import date
+
+from euer_buch import Kassenbuch
+from euer_changes import ChangeBus, store_positionen
+from euer_storage import CsvStorage
+
+TAG = date(2025, 11, 3).toordinal()
+
+
+class _Ansicht:
+    """A list view that follows the bus like the GUI's store-order lists."""
+
+    def __init__(self, buch, bus):
+        self.buch = buch
+        self.zeilen = []
+        self.neu_geladen = 0
+        bus.subscribe(self.aktualisieren)
+
+    def aktualisieren(self, aenderung):
+        transaktionen = self.buch.transaktionen
+        if aenderung.neu:
+            self.zeilen = list(transaktionen.ids)
+            self.neu_geladen += 1
+            return
+        entfernt, eingefuegt = store_positionen(transaktionen, aenderung)
+        for idx in reversed(entfernt):
+            del self.zeilen[idx]
+        for idx in eingefuegt:
+            self.zeilen.insert(idx, transaktionen.row_id(idx))
+
+
+def _aufbauen(tmp_path):
+    geplant = []
+    bus = ChangeBus(lambda delay_ms, callback: geplant.append(callback))
+    buch = Kassenbuch(
+        CsvStorage(str(tmp_path / "db.csv"), snapshot=False), on_change=bus.publish
+    )
+    ansicht = _Ansicht(buch, bus)
+
+    def frame():
+        while geplant:
+            geplant.pop(0)()
+        assert ansicht.zeilen == list(buch.transaktionen.ids)
+
+    return buch, ansicht, geplant, frame
+
+
+def test_positionen_fuer_hinzufuegen_und_loeschen(tmp_path):
+    buch, ansicht, geplant, frame = _aufbauen(tmp_path)
+    buch.laden()
+    frame()
+    for i in range(6):
+        buch.hinzufuegen(TAG - i, "Porto", -100 * i)
+    frame()
+    assert ansicht.zeilen == [0, 1, 2, 3, 4, 5]
+
+    # Several changes in one frame, including a row added and removed again.
+    geloescht = [buch.loeschen(1), buch.loeschen(4)]
+    buch.hinzufuegen(TAG, "Porto", -700)
+    buch.loeschen(6)
+    buch.hinzufuegen(TAG, "Porto", -800)
+    assert len(geplant) == 1
+    frame()
+    assert ansicht.zeilen == [0, 2, 3, 5, 7]
+
+    # Undo puts the old ids back in the middle.
+    for op in reversed(geloescht):
+        buch.anwenden(op, rueckwaerts=True)
+    buch.loeschen(0)
+    frame()
+    assert ansicht.zeilen == [1, 2, 3, 4, 5, 7]
+    assert ansicht.neu_geladen == 1
+
+
+def test_neu_laden_ersetzt_ausstehende_aenderungen(tmp_path):
+    buch, ansicht, _, frame = _aufbauen(tmp_path)
+    buch.laden()
+    buch.hinzufuegen(TAG, "Porto", -100)
+    buch.hinzufuegen(TAG, "Porto", -200)
+    frame()
+
+    buch.loeschen(0)
+    buch.laden()
+    buch.hinzufuegen(TAG, "Porto", -300)
+    frame()
+
+    assert ansicht.neu_geladen == 2
+    assert ansicht.zeilen == [1, 2]
@@ -0,0 +1,61 @@
+import pytest
+
+from euer_cli import main
+
+
+@pytest.fixture
+def im_verzeichnis(tmp_path, monkeypatch):
+    # kategorien.json and the export history live in the working directory.
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _euer(capsys, *argv):
+    ergebnis = main(["--db", "db.csv", *argv])
+    ausgabe = capsys.readouterr()
+    return ergebnis, ausgabe.out, ausgabe.err
+
+
+def test_buchen_und_summen_des_monats(im_verzeichnis, capsys):
+    assert _euer(capsys, "add", "2025-11-01", "Tagesumsatz Kasse", "294,10")[1] == (
+        "2025-11-01 💰  Tagesumsatz Kasse: 294,10 €\n"
+    )
+    assert _euer(capsys, "add", "2025-11-02", "tankbeleg", "12,50")[1] == (
+        "2025-11-02 ⛽  Tankbeleg: -12,50 €\n"
+    )
+    _euer(capsys, "add", "2025-12-01", "Tankbeleg", "1,00")
+
+    ergebnis, ausgabe, _ = _euer(capsys, "totals", "--month", "2025-11")
+
+    assert ergebnis == 0
+    zeilen = [" ".join(zeile.split()) for zeile in ausgabe.splitlines()]
+    assert zeilen[:4] == [
+        "Einnahmen: 294,10 €",
+        "Ausgaben: 12,50 €",
+        "Gewinn: 281,60 €",
+        "Buchungen: 2",
+    ]
+    assert zeilen[4].startswith("Kassenbestand: 281,60 €")
+
+
+def test_unbekannte_kategorie_braucht_vorzeichen(im_verzeichnis, capsys):
+    ergebnis, _, fehler = _euer(capsys, "add", "2025-11-01", "Porto", "1,00")
+
+    assert ergebnis == 2
+    assert "--einnahme oder --ausgabe" in fehler
+    assert not (im_verzeichnis / "db.csv.journal").exists()
+
+    assert _euer(capsys, "add", "2025-11-01", "Porto", "1,00", "--ausgabe")[0] == 0
+    assert "Porto" in (im_verzeichnis / "kategorien.json").read_text(encoding="utf-8")
+
+
+def test_wiederholter_export_ist_unveraendert(im_verzeichnis, capsys):
+    assert _euer(capsys, "add", "2025-11-01", "tagesumsatz kasse", "10")[0] == 0
+
+    assert _euer(capsys, "export", "--month", "2025-11")[1] == (
+        "./Umsatz 25.11.xlsx: exportiert\n"
+    )
+    assert _euer(capsys, "export", "--month", "2025-11")[1] == (
+        "./Umsatz 25.11.xlsx: unverändert\n"
+    )
+    assert (im_verzeichnis / "Umsatz 25.11.xlsx").exists()
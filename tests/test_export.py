@@ -0,0 +1,87 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import euer_export
+from euer_export import export_month, export_year, monats_dateiname
+from euer_import import read_euer_workbook
+from euer_store import TransactionStore
+
+
+class _Pool(ThreadPoolExecutor):
+    """In-process stand-in for the process pool that records the months."""
+
+    geschrieben = []
+
+    def __init__(self, max_workers=None, mp_context=None):
+        super().__init__(max_workers)
+
+    def submit(self, fn, filename, *args):
+        self.geschrieben.append(filename)
+        return super().submit(fn, filename, *args)
+
+
+def _store(*zeilen):
+    store = TransactionStore()
+    for datum, kategorie, cents in zeilen:
+        store.append_values(store.ordinal(datum), kategorie, cents)
+    return store
+
+
+def test_jahresexport_traegt_nur_bestaende_nach(tmp_path, monkeypatch):
+    monkeypatch.setattr(euer_export, "ProcessPoolExecutor", _Pool)
+    monkeypatch.setattr(_Pool, "geschrieben", [])
+    zeilen = [
+        ("2025-01-10", "⛽  Tankbeleg", -1000),
+        ("2025-02-10", "💰  Tagesumsatz Kasse", 5000),
+        ("2025-03-10", "⛽  Tankbeleg", -2000),
+    ]
+    export_year(2025, "Test", 100.0, _store(*zeilen), str(tmp_path))
+    assert len(_Pool.geschrieben) == 3
+
+    _Pool.geschrieben.clear()
+    zeilen[0] = ("2025-01-10", "⛽  Tankbeleg", -1500)
+    ergebnisse = export_year(2025, "Test", 100.0, _store(*zeilen), str(tmp_path))
+
+    januar, februar, maerz = (
+        str(tmp_path / monats_dateiname(2025, monat)) for monat in (1, 2, 3)
+    )
+    assert _Pool.geschrieben == [januar]
+    assert [e.endbestand for e in ergebnisse[:3]] == [85.0, 135.0, 115.0]
+    mappe = read_euer_workbook(maerz)
+    assert (mappe.anfangsbestand_cents, mappe.endbestand_cents) == (13500, 11500)
+    assert [t["Betrag"] for t in mappe.transaktionen] == [-20.0]
+
+    _Pool.geschrieben.clear()
+    ergebnisse = export_year(2025, "Test", 100.0, _store(*zeilen), str(tmp_path))
+    assert _Pool.geschrieben == []
+    assert all(e.unveraendert for e in ergebnisse)
+
+
+def test_export_beachtet_umask(tmp_path):
+    umask = os.umask(0)
+    os.umask(umask)
+    ergebnis = export_month(
+        2025, 11, "Test", 0.0, _store(("2025-11-01", "⛽  Tankbeleg", -1000)),
+        str(tmp_path),
+    )
+    assert os.stat(ergebnis.filename).st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_negativer_bestand_behaelt_vorzeichen(tmp_path, monkeypatch):
+    monkeypatch.setattr(euer_export, "ProcessPoolExecutor", _Pool)
+    monkeypatch.setattr(_Pool, "geschrieben", [])
+    zeilen = [
+        ("2025-01-10", "⛽  Tankbeleg", -1000),
+        # same text as the balance cells, to catch a patch of the wrong cell
+        ("2025-02-10", "⛽ Endbestand:", -500),
+    ]
+    export_year(2025, "Test", 0.0, _store(*zeilen), str(tmp_path))
+    zeilen[0] = ("2025-01-10", "⛽  Tankbeleg", -4000)
+    export_year(2025, "Test", 0.0, _store(*zeilen), str(tmp_path))
+
+    assert len(_Pool.geschrieben) == 3
+    mappe = read_euer_workbook(str(tmp_path / monats_dateiname(2025, 2)))
+    assert (mappe.anfangsbestand_cents, mappe.endbestand_cents) == (-4000, -4500)
+    assert [(t["Kategorie"], t["Betrag"]) for t in mappe.transaktionen] == [
+        ("Endbestand:", -5.0),
+    ]
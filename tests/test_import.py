@@ -0,0 +1,102 @@
+from datetime import date, datetime
+
+import openpyxl
+import pytest
+
+from euer_import import ohne_duplikate, parse_betrag_cents, read_euer_workbook
+from euer_store import TransactionStore
+
+
+def _mappe(path, zeilen):
+    wb = openpyxl.Workbook()
+    for zeile in zeilen:
+        wb.active.append(zeile)
+    wb.save(path)
+
+
+def test_arbeitsmappe_mit_zahlen_und_datumszellen(tmp_path):
+    # As saved back by Excel: amounts as numbers, a date as a date cell.
+    path = tmp_path / "Umsatz 25.11.xlsx"
+    _mappe(path, [
+        ("Test GmbH",),
+        (),
+        (None, None, None, "Anfangsbestand:", 100),
+        ("Beleg-Nr.", "Datum", "Transaktion", "Einnahmen", "Ausgaben"),
+        (1, "2025/11/01", "Tagesumsatz Kasse", "250,00 €", ""),
+        (2, datetime(2025, 11, 2), "Tankbeleg", None, 12.5),
+        (),
+        (),
+        (None, None, "Gesamt:", 250, "12,50 €"),
+        (None, None, None, "Endbestand:", 337.5),
+    ])
+
+    mappe = read_euer_workbook(path, ["💰  Tagesumsatz Kasse", "⛽  Tankbeleg"])
+
+    assert mappe.firmenname == "Test GmbH"
+    assert mappe.anfangsbestand_cents == 10000
+    assert [(t["Datum"], t["Kategorie"], t["Betrag"]) for t in mappe.transaktionen] == [
+        ("2025-11-01", "💰  Tagesumsatz Kasse", 250.0),
+        ("2025-11-02", "⛽  Tankbeleg", -12.5),
+    ]
+    assert (mappe.einnahmen_cents, mappe.ausgaben_cents) == (25000, 1250)
+    assert mappe.endbestand_cents == 33750
+
+
+def test_arbeitsmappe_mit_unlesbarer_zelle(tmp_path):
+    path = tmp_path / "Umsatz 25.11.xlsx"
+    _mappe(path, [
+        ("Test GmbH",),
+        (None, None, None, "Anfangsbestand:", datetime(2025, 11, 1)),
+    ])
+
+    with pytest.raises(ValueError):
+        read_euer_workbook(path)
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("1.234,56", 123456),
+    ("1234.56", 123456),
+    ("1.234", 123400),
+    ("-3,10", -310),
+    ("3,10-", -310),
+    ("+12 €", 1200),
+    ("1\xa0234,5", 123450),
+    ("0,005", 1),
+    (",99", 99),
+])
+def test_betraege_exakt_in_cent(text, cents):
+    assert parse_betrag_cents(text) == cents
+
+
+@pytest.mark.parametrize("text", ["", "€", "-", "abc", "12,3x", "1,2,3"])
+def test_ungueltige_betraege(text):
+    with pytest.raises(ValueError):
+        parse_betrag_cents(text)
+
+
+def test_ohne_duplikate_zaehlt_vorkommen():
+    tag = date(2025, 11, 3).toordinal()
+    transaktionen = TransactionStore()
+    for ordinal, kategorie, cents in [
+        (tag, "💰  Tagesumsatz Kasse", 5000),
+        (tag, "⛽  Tankbeleg", -1250),
+        (tag - 40, "⛽  Tankbeleg", -700),
+    ]:
+        transaktionen.append_values(ordinal, kategorie, cents)
+
+    neue, doppelt = ohne_duplikate([
+        # Older files wrote the category with a single space.
+        (tag, "💰 Tagesumsatz Kasse", 5000),
+        (tag, "💰 Tagesumsatz Kasse", 5000),
+        (tag, "⛽  Tankbeleg", -1250),
+        (tag, "⛽  Tankbeleg", -1251),
+        (tag - 1, "⛽  Tankbeleg", -1250),
+    ], transaktionen)
+
+    assert doppelt == 2
+    assert [(t["Datum"], t["Kategorie"], t["Betrag"]) for t in neue] == [
+        ("2025-11-03", "💰 Tagesumsatz Kasse", 50.0),
+        ("2025-11-03", "⛽  Tankbeleg", -12.51),
+        ("2025-11-02", "⛽  Tankbeleg", -12.5),
+    ]
+    assert ohne_duplikate([], transaktionen)[1] == 0
@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from euer_index import DateCategoryIndex, zeitraum
+
+
+def _tage(von, bis):
+    return date.fromordinal(von), date.fromordinal(bis)
+
+
+@pytest.mark.parametrize("tag, art, erwartet", [
+    (date(2025, 2, 14), "Tag", (date(2025, 2, 14), date(2025, 2, 14))),
+    (date(2024, 2, 14), "Monat", (date(2024, 2, 1), date(2024, 2, 29))),
+    (date(2025, 12, 31), "Monat", (date(2025, 12, 1), date(2025, 12, 31))),
+    (date(2025, 1, 1), "Quartal", (date(2025, 1, 1), date(2025, 3, 31))),
+    (date(2025, 6, 30), "Quartal", (date(2025, 4, 1), date(2025, 6, 30))),
+    (date(2025, 10, 1), "Quartal", (date(2025, 10, 1), date(2025, 12, 31))),
+    (date(2025, 12, 31), "Quartal", (date(2025, 10, 1), date(2025, 12, 31))),
+    (date(2025, 12, 31), "Jahr", (date(2025, 1, 1), date(2025, 12, 31))),
+    (date(2024, 1, 1), "Jahr", (date(2024, 1, 1), date(2024, 12, 31))),
+])
+def test_zeitraum_grenzen(tag, art, erwartet):
+    assert _tage(*zeitraum(tag, art)) == erwartet
+
+
+def test_zeitraum_alle_und_unbekannt():
+    assert zeitraum(date(2025, 1, 1), "Alle") == (None, None)
+    with pytest.raises(ValueError):
+        zeitraum(date(2025, 1, 1), "Woche")
+
+
+def _ordinal(tag):
+    return date(2025, 12, tag).toordinal()
+
+
+def test_gleicher_tag_in_buchungsreihenfolge_und_entfernen():
+    # (tag, kategorie-code, id); ids 1, 2 and 5 share the 30th
+    buchungen = [(31, 0, 0), (30, 1, 1), (30, 0, 2), (31, 1, 3), (1, 0, 4), (30, 0, 5)]
+    index = DateCategoryIndex.build(
+        [_ordinal(tag) for tag, _, _ in buchungen],
+        [code for _, code, _ in buchungen],
+        [row_id for _, _, row_id in buchungen],
+    )
+    inkrementell = DateCategoryIndex()
+    for tag, code, row_id in buchungen:
+        inkrementell.add(_ordinal(tag), code, row_id)
+
+    for idx in (index, inkrementell):
+        assert idx.row_ids() == [4, 1, 2, 5, 0, 3]
+        assert idx.row_ids(_ordinal(30), _ordinal(30)) == [1, 2, 5]
+        assert idx.row_ids(_ordinal(2), None, code=0) == [2, 5, 0]
+        assert idx.row_ids(code=7) == []
+
+        idx.remove(_ordinal(30), 0, 2)
+        idx.remove(_ordinal(31), 1, 3)
+        assert idx.row_ids(_ordinal(30), _ordinal(31)) == [1, 5, 0]
+        assert idx.row_ids(code=1) == [1]
@@ -0,0 +1,125 @@
+import os
+import sqlite3
+
+from euer_kategorien import Katalog
+from euer_sqlite import SqliteStorage
+from euer_storage import CsvStorage
+from euer_store import TransactionStore
+
+
+def _store(*zeilen):
+    store = TransactionStore()
+    for datum, kategorie, cents in zeilen:
+        store.append_values(store.ordinal(datum), kategorie, cents)
+    return store
+
+
+def _umbenannt(katalog, kategorie_id, name):
+    """Copy of ``katalog`` with one category renamed, like an edited json."""
+    return Katalog(
+        katalog[i]._replace(name=name) if i == kategorie_id else katalog[i]
+        for i in range(len(katalog))
+    )
+
+
+def test_aufnehmen_erkennt_namen_am_suchschluessel():
+    katalog = Katalog.standard()
+    anzahl = len(katalog)
+
+    katalog.aufnehmen(["⛽ Tankbeleg", "tankbeleg", "💰 Tagesumsatz  Kasse"])
+
+    assert len(katalog) == anzahl
+    assert not katalog.geaendert
+    assert katalog.kategorie_id("Tankbeleg") == katalog.kategorie_id("⛽  Tankbeleg")
+    assert katalog.ist_einnahme("💰 Tagesumsatz  Kasse")
+
+    katalog.aufnehmen(["Porto"])
+    assert len(katalog) == anzahl + 1
+    assert katalog.geaendert
+    assert not katalog.ist_einnahme("Porto")
+
+
+def test_sqlite_speichert_katalog_ids(tmp_path):
+    katalog = Katalog.standard()
+    katalog.setzen("Porto", False)
+    db = str(tmp_path / "db.sqlite3")
+    storage = SqliteStorage(db, katalog)
+    storage.rewrite("Test", 0.0, _store(
+        ("2025-11-01", "Porto", -100),
+        ("2025-11-02", "⛽ Tankbeleg", -200),
+    ))
+    storage.close()
+
+    conn = sqlite3.connect(db)
+    assert dict(conn.execute("SELECT name, id FROM kategorien")) == {
+        "Porto": katalog.kategorie_id("Porto"),
+        "⛽  Tankbeleg": katalog.kategorie_id("⛽  Tankbeleg"),
+    }
+    conn.close()
+
+
+def test_sqlite_nummeriert_bestehende_datenbank_um(tmp_path):
+    db = str(tmp_path / "db.sqlite3")
+    ohne_katalog = SqliteStorage(db)
+    ohne_katalog.rewrite("Test", 0.0, _store(
+        ("2025-11-01", "Porto", -100),
+        ("2025-11-02", "⛽  Tankbeleg", -200),
+        ("2025-11-03", "💰  Tagesumsatz Kasse", 300),
+    ))
+    ohne_katalog.close()
+    katalog = Katalog.standard()
+
+    storage = SqliteStorage(db, katalog)
+    _, _, transaktionen = storage.load()
+    storage.close()
+
+    assert [(t["Kategorie"], t["Betrag"]) for t in transaktionen] == [
+        ("Porto", -1.0),
+        ("⛽  Tankbeleg", -2.0),
+        ("💰  Tagesumsatz Kasse", 3.0),
+    ]
+    assert katalog.geaendert
+    conn = sqlite3.connect(db)
+    assert dict(conn.execute("SELECT name, id FROM kategorien")) == {
+        name: katalog.kategorie_id(name)
+        for name in ("Porto", "⛽  Tankbeleg", "💰  Tagesumsatz Kasse")
+    }
+    conn.close()
+
+
+def test_csv_speichert_katalog_ids_und_folgt_umbenennung(tmp_path):
+    katalog = Katalog.standard()
+    tank = katalog.kategorie_id("⛽  Tankbeleg")
+    db = str(tmp_path / "db.csv")
+    storage = CsvStorage(db, katalog=katalog)
+    storage.rewrite("Test", 0.0, _store(("2025-11-01", "Tankbeleg", -100)))
+    storage.add(
+        {"ID": 1, "Datum": "2025-11-02", "Kategorie": "⛽  Tankbeleg", "Betrag": -2.0},
+        None,
+    )
+    with open(db, encoding="utf-8") as f:
+        assert f.read().splitlines()[-1] == f"2025-11-01;Tankbeleg;-1.00;0;{tank}"
+
+    umbenannt = _umbenannt(katalog, tank, "⛽  Kraftstoff")
+    # From the snapshot, then from db.csv; the journal row either way.
+    for _ in range(2):
+        _, _, transaktionen = CsvStorage(db, katalog=umbenannt).load()
+        assert [t["Kategorie"] for t in transaktionen] == ["⛽  Kraftstoff"] * 2
+        assert transaktionen.kategorien == ["⛽  Kraftstoff"]
+        os.remove(db + ".snapshot")
+    assert not umbenannt.geaendert
+
+
+def test_sqlite_folgt_umbenennung_im_katalog(tmp_path):
+    katalog = Katalog.standard()
+    tank = katalog.kategorie_id("⛽  Tankbeleg")
+    db = str(tmp_path / "db.sqlite3")
+    storage = SqliteStorage(db, katalog)
+    storage.rewrite("Test", 0.0, _store(("2025-11-01", "⛽  Tankbeleg", -100)))
+    storage.close()
+
+    storage = SqliteStorage(db, _umbenannt(katalog, tank, "⛽  Kraftstoff"))
+    _, _, transaktionen = storage.load()
+    storage.close()
+
+    assert [t["Kategorie"] for t in transaktionen] == ["⛽  Kraftstoff"]
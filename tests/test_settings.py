@@ -0,0 +1,29 @@
+from euer_settings import ExportHistory
+
+
+def _historie(tmp_path):
+    historie = ExportHistory(
+        str(tmp_path / "umsatz_historie.csv"), str(tmp_path / "umsatz_historie.json")
+    )
+    historie.load()
+    return historie
+
+
+def test_zwei_schreiber_sehen_die_exporte_des_anderen(tmp_path):
+    gui = _historie(tmp_path)
+    cli = _historie(tmp_path)
+
+    gui.record("db.csv", "Umsatz 25.10.xlsx", 100, 50, 50, 150)
+    cli.record("db.csv", "Umsatz 25.11.xlsx", 200, 0, 200, 350)
+    gui.record("db.csv", "Umsatz 25.12.xlsx", 0, 100, -100, 250)
+
+    # Each writer picked up the other's earlier record with its own.
+    assert cli.letzter_export("db.csv", 2025, 10).endbestand == 150
+    assert gui.letzter_export("db.csv", 2025, 11).endbestand == 350
+    assert gui.letzter_export("db.csv").datei == "Umsatz 25.12.xlsx"
+    # The index must cover the other writer's record too.
+    gui.save_index()
+    neu = _historie(tmp_path)
+    assert [neu.letzter_export("db.csv", 2025, m).endbestand for m in (10, 11, 12)] == [
+        150, 350, 250,
+    ]
@@ -0,0 +1,64 @@
+import os
+
+from euer_snapshot import KOPF
+from euer_storage import CsvStorage
+
+ZEILEN = [
+    "Firma;Test",
+    "Anfangsbestand;100.00",
+    "2025-10-30;⛽  Tankbeleg;-10.00;0",
+    "2025-11-01;💰  Tagesumsatz Kasse;50.00;1",
+]
+
+
+def _db(tmp_path):
+    db = tmp_path / "db.csv"
+    db.write_text("\n".join(ZEILEN) + "\n", encoding="utf-8")
+    return db
+
+
+def _betraege(transaktionen):
+    return [t["Betrag"] for t in transaktionen]
+
+
+def test_schnappschuss_wird_genutzt(tmp_path):
+    db = _db(tmp_path)
+    storage = CsvStorage(str(db))
+    assert _betraege(storage.load()[2]) == [-10.0, 50.0]
+    assert storage._snapshot_oeffnen() is not None
+
+    firmenname, anfangsbestand, vorschau = CsvStorage(str(db)).load_recent()
+    assert (firmenname, anfangsbestand) == ("Test", 100.0)
+    assert _betraege(vorschau) == [50.0]
+    assert list(vorschau.ids) == [1]
+
+
+def test_veralteter_schnappschuss_faellt_auf_db_csv_zurueck(tmp_path):
+    db = _db(tmp_path)
+    CsvStorage(str(db)).load()
+    # Edited outside the program: the stamp no longer matches.
+    with open(db, "a", encoding="utf-8") as f:
+        f.write("2025-11-02;⛽  Tankbeleg;-20.00;2\n")
+
+    assert _betraege(CsvStorage(str(db)).load_recent()[2]) == [50.0, -20.0]
+    assert _betraege(CsvStorage(str(db)).load()[2]) == [-10.0, 50.0, -20.0]
+
+
+def test_beschaedigter_schnappschuss_faellt_auf_db_csv_zurueck(tmp_path):
+    db = _db(tmp_path)
+    CsvStorage(str(db)).load()
+    snapshot = str(db) + ".snapshot"
+    # The header still matches db.csv, but the columns are cut off.
+    with open(snapshot, "r+b") as f:
+        f.truncate(KOPF.size + 4)
+    stat = os.stat(db)
+
+    storage = CsvStorage(str(db))
+    assert storage._snapshot_oeffnen() is None
+    assert _betraege(storage.load_recent()[2]) == [50.0]
+    firmenname, _, transaktionen = storage.load()
+    assert firmenname == "Test"
+    assert _betraege(transaktionen) == [-10.0, 50.0]
+    # The full load writes a fresh snapshot and leaves db.csv alone.
+    assert os.stat(db).st_mtime_ns == stat.st_mtime_ns
+    assert storage._snapshot_oeffnen() is not None
@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from euer_sqlite import SqliteStorage, migrate_csv
+from euer_store import TransactionStore
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _store(*zeilen):
+    store = TransactionStore()
+    for datum, kategorie, cents in zeilen:
+        store.append_values(store.ordinal(datum), kategorie, cents)
+    return store
+
+
+def _laden(db):
+    storage = SqliteStorage(db)
+    try:
+        return storage.load()
+    finally:
+        storage.close()
+
+
+def _zeilen(transaktionen):
+    return [(t["ID"], t["Datum"], t["Kategorie"], t["Betrag"]) for t in transaktionen]
+
+
+def test_rewrite_und_laden(tmp_path):
+    db = str(tmp_path / "db.sqlite3")
+    storage = SqliteStorage(db)
+    storage.rewrite("Test GmbH", 100.5, _store(
+        ("2025-10-30", "⛽  Tankbeleg", -1010),
+        ("2025-11-01", "💰  Tagesumsatz Kasse", 29410),
+        ("2025-11-02", "⛽  Tankbeleg", -1),
+    ))
+    storage.close()
+
+    storage = SqliteStorage(db)
+    firmenname, anfangsbestand, transaktionen = storage.load()
+    _, _, vorschau = storage.load_recent()
+    storage.close()
+
+    assert (firmenname, anfangsbestand) == ("Test GmbH", 100.5)
+    assert _zeilen(transaktionen) == [
+        (0, "2025-10-30", "⛽  Tankbeleg", -10.1),
+        (1, "2025-11-01", "💰  Tagesumsatz Kasse", 294.1),
+        (2, "2025-11-02", "⛽  Tankbeleg", -0.01),
+    ]
+    assert list(transaktionen.cents) == [-1010, 29410, -1]
+    assert list(vorschau.ids) == [1, 2]
+
+
+def test_hinzufuegen_loeschen_und_kopfwerte(tmp_path):
+    db = str(tmp_path / "db.sqlite3")
+    storage = SqliteStorage(db)
+    storage.rewrite("", 0.0, _store(("2025-11-01", "Porto", -100)))
+    storage.add({"ID": 1, "Datum": "2025-11-02", "Kategorie": "Porto", "Betrag": -2.5})
+    storage.add({"ID": 2, "Datum": "2025-11-03", "Kategorie": "Miete", "Betrag": -4.0})
+    storage.delete(0)
+    storage.set_firma("Neu GmbH")
+    storage.set_anfangsbestand(-12.3)
+
+    assert storage.summen() == (0, 650, 2)
+    assert storage.per_kategorie() == {"Porto": [0, 250, 1], "Miete": [0, 400, 1]}
+    storage.close()
+
+    firmenname, anfangsbestand, transaktionen = _laden(db)
+    assert (firmenname, anfangsbestand) == ("Neu GmbH", -12.3)
+    assert [t["ID"] for t in transaktionen] == [1, 2]
+
+
+def test_wiederoeffnen_nach_absturz(tmp_path):
+    db = str(tmp_path / "db.sqlite3")
+    # Killed after the commits, without closing: the changes sit in the WAL.
+    skript = textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {REPO!r})
+        from euer_sqlite import SqliteStorage
+        storage = SqliteStorage({db!r})
+        storage.set_firma("Test")
+        storage.add({{"ID": 0, "Datum": "2025-11-01", "Kategorie": "Porto", "Betrag": -1.0}})
+        storage.add({{"ID": 1, "Datum": "2025-11-02", "Kategorie": "Porto", "Betrag": -2.0}})
+        storage.delete(0)
+        os._exit(0)
+    """)
+    subprocess.run([sys.executable, "-c", skript], check=True)
+    assert os.path.exists(db + "-wal")
+
+    storage = SqliteStorage(db)
+    firmenname, _, transaktionen = storage.load()
+    storage.add({"ID": 2, "Datum": "2025-11-03", "Kategorie": "Porto", "Betrag": -3.0})
+    storage.close()
+
+    assert firmenname == "Test"
+    assert [t["ID"] for t in transaktionen] == [1]
+    assert [t["ID"] for t in _laden(db)[2]] == [1, 2]
+
+
+def test_migration_aus_db_csv(tmp_path):
+    csv_pfad = tmp_path / "db.csv"
+    csv_pfad.write_text(
+        "Firma;Test\nAnfangsbestand;10.00\n2025-11-01;Porto;-1.00;4\n",
+        encoding="utf-8",
+    )
+    db = str(tmp_path / "db.sqlite3")
+
+    assert migrate_csv(str(csv_pfad), db) == 1
+    assert _zeilen(_laden(db)[2]) == [(4, "2025-11-01", "Porto", -1.0)]
@@ -0,0 +1,129 @@
+from datetime import date
+
+from euer_buch import Kassenbuch
+from euer_storage import CsvStorage
+
+
+def _schreiben(path, zeilen):
+    path.write_text("\n".join(zeilen) + "\n", encoding="utf-8")
+
+
+def _daten(transaktionen):
+    return [(t["Datum"], t["Kategorie"], t["Betrag"]) for t in transaktionen]
+
+
+def _tag(text):
+    return date.fromisoformat(text).toordinal()
+
+
+def test_vorschau_ohne_ids_ignoriert_loeschungen(tmp_path):
+    db = tmp_path / "db.csv"
+    _schreiben(db, [
+        "Firma;Test",
+        "Anfangsbestand;100.00",
+        "2025-10-30;⛽  Tankbeleg;-10.00",
+        "2025-11-01;⛽  Tankbeleg;-20.00",
+        "2025-11-02;⛽  Tankbeleg;-30.00",
+        "2025-11-03;⛽  Tankbeleg;-40.00",
+    ])
+    storage = CsvStorage(str(db), snapshot=False)
+    storage.delete(2, None)
+    storage.set_firma("Neu", None)
+
+    firmenname, _, vorschau = CsvStorage(str(db), snapshot=False).load_recent()
+
+    assert firmenname == "Neu"
+    # The synthetic preview ids differ from the stored ones, so the delete
+    # must wait for the full load instead of removing a wrong row.
+    assert _daten(vorschau) == [
+        ("2025-11-01", "⛽  Tankbeleg", -20.0),
+        ("2025-11-02", "⛽  Tankbeleg", -30.0),
+        ("2025-11-03", "⛽  Tankbeleg", -40.0),
+    ]
+    _, _, alle = CsvStorage(str(db), snapshot=False).load()
+    assert [t["Betrag"] for t in alle] == [-10.0, -20.0, -40.0]
+
+
+def test_neuschreiben_behaelt_dateirechte(tmp_path):
+    db = tmp_path / "db.csv"
+    _schreiben(db, ["Anfangsbestand;0.00", "2025-11-01;⛽  Tankbeleg;-20.00;0"])
+    db.chmod(0o644)
+    storage = CsvStorage(str(db), journal=False)
+    storage.rewrite(*storage.load())
+    assert db.stat().st_mode & 0o777 == 0o644
+
+
+def test_journal_wird_abgespielt(tmp_path):
+    db = tmp_path / "db.csv"
+    _schreiben(db, ["Firma;Test", "Anfangsbestand;100.00"])
+    buch = Kassenbuch(CsvStorage(str(db), snapshot=False))
+    buch.laden()
+    buch.hinzufuegen(_tag("2025-11-01"), "⛽  Tankbeleg", -1000)
+    zweite = buch.hinzufuegen(_tag("2025-11-02"), "⛽  Tankbeleg", -2000)
+    buch.hinzufuegen(_tag("2025-11-03"), "💰  Tagesumsatz Kasse", 5000)
+    buch.loeschen(zweite.daten[0][0])
+    buch.firma_setzen("Neu")
+    buch.anfangsbestand_setzen(50.0)
+
+    # db.csv itself is untouched, everything is in the journal.
+    assert db.read_text(encoding="utf-8") == "Firma;Test\nAnfangsbestand;100.00\n"
+    storage = CsvStorage(str(db), snapshot=False)
+    firmenname, anfangsbestand, transaktionen = storage.load()
+    assert (firmenname, anfangsbestand) == ("Neu", 50.0)
+    assert _daten(transaktionen) == [
+        ("2025-11-01", "⛽  Tankbeleg", -10.0),
+        ("2025-11-03", "💰  Tagesumsatz Kasse", 50.0),
+    ]
+    assert list(transaktionen.ids) == list(buch.transaktionen.ids)
+    assert storage.journal_records == 6
+
+
+def test_kompaktierung_behaelt_spaetere_aenderungen(tmp_path):
+    db = tmp_path / "db.csv"
+    _schreiben(db, ["Anfangsbestand;0.00"])
+    storage = CsvStorage(str(db), compact_after=2, snapshot=False)
+    buch = Kassenbuch(storage)
+    buch.laden()
+    buch.hinzufuegen(_tag("2025-11-01"), "⛽  Tankbeleg", -1000)
+    buch.hinzufuegen(_tag("2025-11-02"), "⛽  Tankbeleg", -2000)
+    assert storage.needs_compaction()
+
+    buch.kompaktieren()
+    # Booked while the compaction runs: lands in a fresh journal.
+    buch.hinzufuegen(_tag("2025-11-03"), "⛽  Tankbeleg", -3000)
+    storage.wait_for_compaction()
+
+    assert not (tmp_path / "db.csv.journal.alt").exists()
+    assert "2025-11-02" in db.read_text(encoding="utf-8")
+    _, _, transaktionen = CsvStorage(str(db), snapshot=False).load()
+    assert [t["Betrag"] for t in transaktionen] == [-10.0, -20.0, -30.0]
+    assert list(transaktionen.ids) == list(buch.transaktionen.ids)
+
+
+def test_db_csv_ohne_ids_bekommt_feste_ids(tmp_path):
+    db = tmp_path / "db.csv"
+    _schreiben(db, [
+        "Anfangsbestand;0.00",
+        "2025-11-01;⛽  Tankbeleg;-10.00",
+        "2025-11-02;⛽  Tankbeleg;-20.00",
+        "2025-11-03;⛽  Tankbeleg;-30.00",
+    ])
+    buch = Kassenbuch(CsvStorage(str(db), snapshot=False))
+    buch.laden()
+    ids = list(buch.transaktionen.ids)
+    assert len(set(ids)) == 3
+
+    # Deleting by id is replayed onto the same rows after a restart ...
+    buch.loeschen(ids[1])
+    _, _, transaktionen = CsvStorage(str(db), snapshot=False).load()
+    assert list(transaktionen.ids) == [ids[0], ids[2]]
+    assert [t["Betrag"] for t in transaktionen] == [-10.0, -30.0]
+
+    # ... and the next rewrite stores the ids in db.csv.
+    buch.neu_schreiben()
+    zeilen = db.read_text(encoding="utf-8").splitlines()[1:]
+    assert [zeile.rsplit(";", 1)[1] for zeile in zeilen] == [str(ids[0]), str(ids[2])]
+    buch.hinzufuegen(_tag("2025-11-04"), "⛽  Tankbeleg", -4000)
+    _, _, transaktionen = CsvStorage(str(db), snapshot=False).load()
+    assert list(transaktionen.ids) == list(buch.transaktionen.ids)
+    assert len(set(transaktionen.ids)) == 3
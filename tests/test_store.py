@@ -0,0 +1,96 @@
+from datetime import date
+
+import pytest
+
+from euer_store import TransactionStore, cents_to_text, parse_cents
+
+
+def _buchung(datum, kategorie, betrag, row_id=None):
+    t = {"Datum": datum, "Kategorie": kategorie, "Betrag": betrag}
+    if row_id is not None:
+        t["ID"] = row_id
+    return t
+
+
+def test_kategorien_werden_interniert():
+    store = TransactionStore([
+        _buchung("2025-11-01", "⛽  Tankbeleg", -10.0),
+        _buchung("2025-11-02", "💰  Tagesumsatz Kasse", 50.0),
+        _buchung("2025-11-03", "⛽  Tankbeleg", -20.0),
+    ])
+
+    assert store.kategorien == ["⛽  Tankbeleg", "💰  Tagesumsatz Kasse"]
+    assert list(store.kategorie_codes) == [0, 1, 0]
+    assert store.kategorie_code("⛽  Tankbeleg") == 0
+    assert store.kategorie_code("Porto") == 2
+    assert list(store.datum_ordinals) == [
+        date(2025, 11, tag).toordinal() for tag in (1, 2, 3)
+    ]
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("294.10", 29410), ("294,10", 29410), ("-0.01", -1), ("0.29", 29),
+    ("-1234.56", -123456), ("0.00", 0),
+])
+def test_cent_betraege_ohne_rundungsfehler(text, cents):
+    assert parse_cents(text) == cents
+    assert parse_cents(cents_to_text(cents)) == cents
+    store = TransactionStore()
+    store.append_values(store.ordinal("2025-11-01"), "Porto", cents)
+    assert store[0]["Betrag"] == cents / 100
+    assert list(store.csv_rows()) == [["2025-11-01", "Porto", cents_to_text(cents), 0]]
+
+
+def test_loeschen_haelt_spalten_zusammen_und_ids_stabil():
+    store = TransactionStore(
+        _buchung(f"2025-11-{tag:02d}", "Porto", -tag) for tag in range(1, 6)
+    )
+
+    entfernt = store.pop_id(1)
+    del store[store.position(3)]
+
+    assert entfernt == _buchung("2025-11-02", "Porto", -2.0, 1)
+    assert list(store.ids) == [0, 2, 4]
+    assert list(store.cents) == [-100, -300, -500]
+    assert len(store.datum_ordinals) == len(store.kategorie_codes) == len(store) == 3
+    assert store.get(4)["Datum"] == "2025-11-05"
+    with pytest.raises(KeyError):
+        store.position(1)
+    # New rows never reuse an id, an undo puts the old id back in place.
+    assert store.append_values(store.ordinal("2025-11-06"), "Porto", -600) == 5
+    assert store.append_values(store.ordinal("2025-11-02"), "Porto", -200, 1) == 1
+    assert list(store.ids) == [0, 1, 2, 4, 5]
+    # A duplicate id gets a fresh one.
+    assert store.append_values(store.ordinal("2025-11-07"), "Porto", -700, 2) == 6
+
+
+def test_kopie_ab_position_ist_unabhaengig():
+    store = TransactionStore([
+        _buchung("2025-11-01", "⛽  Tankbeleg", -10.0),
+        _buchung("2025-11-02", "⛽  Tankbeleg", -20.0),
+        _buchung("2025-11-03", "Porto", -1.0),
+    ])
+    kopie = store.copy(1)
+
+    del store[2]
+    store.append_values(store.ordinal("2025-11-04"), "Miete", -5)
+
+    assert [t["Kategorie"] for t in kopie] == ["⛽  Tankbeleg", "Porto"]
+    assert list(kopie.ids) == [1, 2]
+    assert kopie.next_id == 3
+
+
+def test_umbenennen_fuehrt_gleiche_namen_zusammen():
+    store = TransactionStore([
+        _buchung("2025-11-01", "Tankbeleg", -10.0),
+        _buchung("2025-11-02", "⛽  Tankbeleg", -20.0),
+        _buchung("2025-11-03", "Porto", -1.0),
+    ])
+    assert store.query_ids(kategorie="Tankbeleg") == [0]
+
+    store.kategorien_umbenennen(["⛽  Tankbeleg", "⛽  Tankbeleg", "✉️  Porto"])
+
+    assert store.kategorien == ["⛽  Tankbeleg", "✉️  Porto"]
+    assert list(store.kategorie_codes) == [0, 0, 1]
+    assert store.query_ids(kategorie="⛽  Tankbeleg") == [0, 1]
+    assert [t["Kategorie"] for t in store] == ["⛽  Tankbeleg"] * 2 + ["✉️  Porto"]
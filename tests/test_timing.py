@@ -0,0 +1,26 @@
+import threading
+
+import euer_timing
+from euer_timing import aktivieren, letztes_profil, messung, profil_naechste
+
+
+def _laden():
+    with messung("lader"):
+        pass
+
+
+def test_profil_nur_im_hauptthread(tmp_path):
+    profil_naechste(verzeichnis=str(tmp_path))
+    try:
+        lader = threading.Thread(target=_laden)
+        lader.start()
+        lader.join()
+        assert not list(tmp_path.iterdir())
+
+        with messung("aktion"):
+            pass
+        assert letztes_profil().startswith(str(tmp_path))
+        assert len(list(tmp_path.glob("profil-aktion-*.prof"))) == 1
+    finally:
+        euer_timing._profil_auftrag = None
+        aktivieren(False)
@@ -0,0 +1,84 @@
+import random
+from datetime import date
+
+from euer_store import TransactionStore
+from euer_totals import Totals
+
+KATEGORIEN = ["💰  Tagesumsatz Kasse", "⛽  Tankbeleg", "Porto"]
+
+
+def _naiv(buchungen, anfangsbestand_cents):
+    """Per-key sums and a balance function by brute force."""
+    tabellen = ({}, {}, {})
+    for ordinal, kategorie, cents in buchungen:
+        tag = date.fromordinal(ordinal)
+        for table, key in zip(tabellen, (ordinal, (tag.year, tag.month), kategorie)):
+            entry = table.setdefault(key, [0, 0, 0])
+            entry[0 if cents > 0 else 1] += abs(cents)
+            entry[2] += 1
+
+    def bestand(ordinal):
+        return anfangsbestand_cents + sum(c for o, _, c in buchungen if o <= ordinal)
+
+    return tabellen, bestand
+
+
+def _pruefen(totals, buchungen):
+    (per_tag, per_monat, per_kategorie), bestand = _naiv(
+        buchungen, totals.anfangsbestand_cents
+    )
+    assert totals.per_tag == per_tag
+    assert totals.per_monat == per_monat
+    assert totals.per_kategorie == per_kategorie
+    assert totals.einnahmen_cents == sum(c for _, _, c in buchungen if c > 0)
+    assert totals.ausgaben_cents == -sum(c for _, _, c in buchungen if c < 0)
+    tage = sorted({o for o, _, _ in buchungen})
+    stichtage = [tage[0] - 1000, tage[0] - 1, *tage, tage[-1] + 1, tage[-1] + 5000]
+    for ordinal in stichtage:
+        assert totals.kassenbestand(ordinal) == bestand(ordinal)
+
+
+def _zufallsbuchung(zufall, start):
+    return (
+        start + zufall.randrange(3 * 365),
+        zufall.choice(KATEGORIEN),
+        zufall.choice((1, -1)) * zufall.randrange(1, 100_000),
+    )
+
+
+def test_kassenbestand_aus_dem_fenwick_baum():
+    zufall = random.Random(5)
+    start = date(2023, 1, 1).toordinal()
+    buchungen = sorted(_zufallsbuchung(zufall, start) for _ in range(500))
+    store = TransactionStore()
+    for ordinal, kategorie, cents in buchungen:
+        store.append_values(ordinal, kategorie, cents)
+
+    _pruefen(Totals.from_store(store, 123.45), buchungen)
+
+
+def test_inkrementelle_summen_wie_neu_berechnet():
+    zufall = random.Random(7)
+    start = date(2024, 6, 1).toordinal()
+    totals = Totals(-5000)
+    buchungen = []
+    for schritt in range(600):
+        if buchungen and zufall.random() < 0.3:
+            buchung = buchungen.pop(zufall.randrange(len(buchungen)))
+            totals.remove(*buchung)
+        else:
+            buchung = _zufallsbuchung(zufall, start)
+            if schritt % 50 == 0:
+                # Far outside the tree's range, before and after it.
+                buchung = (buchung[0] + zufall.choice((-3000, 3000)), *buchung[1:])
+            buchungen.append(buchung)
+            totals.add(*buchung)
+        if schritt % 100 == 0:
+            _pruefen(totals, buchungen)
+    _pruefen(totals, buchungen)
+
+    # Removing everything leaves no empty keys behind.
+    for buchung in buchungen:
+        totals.remove(*buchung)
+    assert (totals.per_tag, totals.per_monat, totals.per_kategorie) == ({}, {}, {})
+    assert totals.kassenbestand(start) == -5000
@@ -0,0 +1,62 @@
+from datetime import date
+
+from euer_buch import Kassenbuch
+from euer_store import TransactionStore
+from euer_undo import UndoLog
+from euer_workspace import Workspace
+
+
+def _tag(text):
+    return date.fromisoformat(text).toordinal()
+
+
+def _stand(buch):
+    """State of ``buch``, checked against the state reloaded from its storage."""
+    geladen = Kassenbuch(buch.storage, buch.datei)
+    geladen.laden()
+    im_speicher, gespeichert = (
+        (
+            b.firmenname,
+            b.anfangsbestand,
+            [(t["ID"], t["Datum"], t["Kategorie"], t["Betrag"]) for t in b.transaktionen],
+        )
+        for b in (buch, geladen)
+    )
+    assert im_speicher == gespeichert
+    return im_speicher
+
+
+def test_rueckgaengig_und_wiederholen_ueber_zwei_firmen(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    workspace = Workspace("db.csv")
+    zweite = workspace.add_firma("Zweite")
+    buecher = {}
+    for datei in ("db.csv", zweite):
+        buecher[datei] = Kassenbuch(workspace.storage(datei), datei)
+        buecher[datei].laden()
+    erste = buecher["db.csv"]
+    vorher = {datei: _stand(buch) for datei, buch in buecher.items()}
+
+    log = UndoLog()
+    log.record(erste.hinzufuegen(_tag("2025-11-01"), "⛽  Tankbeleg", -1000))
+    neue = TransactionStore()
+    for datum, cents in (("2025-11-02", 5000), ("2025-11-03", 7000)):
+        neue.append_values(_tag(datum), "💰  Tagesumsatz Kasse", cents)
+    log.record(erste.importieren(neue))
+    log.record(erste.loeschen(erste.transaktionen.ids[1]))
+    log.record(buecher[zweite].firma_setzen("Zweite GmbH"))
+    log.record(buecher[zweite].anfangsbestand_setzen(25.0))
+    log.record(buecher[zweite].hinzufuegen(_tag("2025-11-05"), "⛽  Tankbeleg", -500))
+    nachher = {datei: _stand(buch) for datei, buch in buecher.items()}
+
+    while log.next_undo() is not None:
+        op = log.next_undo()
+        buecher[op.datei].anwenden(op, rueckwaerts=True)
+        log.undone()
+    assert {datei: _stand(buch) for datei, buch in buecher.items()} == vorher
+
+    while log.next_redo() is not None:
+        op = log.next_redo()
+        buecher[op.datei].anwenden(op, rueckwaerts=False)
+        log.redone()
+    assert {datei: _stand(buch) for datei, buch in buecher.items()} == nachher